@@ -1,20 +1,37 @@
 import streamlit as st
 import pandas as pd
-import sqlite3
 from datetime import datetime, timedelta
-import plotly.express as px
-import tempfile
 import os
-import requests
-import json
-import time
-from playwright.sync_api import sync_playwright
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "src"))
+
+from app_tiktok import cache, db, export, metrics, scrape_cache
+from app_tiktok.analise import gerar_analise
+from app_tiktok.collector import agendar_influencer
+from app_tiktok.downsample import max_pontos_por_serie
+from app_tiktok.parsing import estimate_earnings
+from app_tiktok.resilience import BloqueioError, PerfilInexistenteError
+from app_tiktok.scraper import scrape_profiles
 
 # ==============================================
 # CONFIGURAÇÃO INICIAL DO APP
 # ==============================================
 st.set_page_config(layout="wide", page_title="Agência Referência TikTok")
 
+# Usuários que veem o painel de desempenho na barra lateral
+USUARIOS_ADMIN = {'admin'}
+# Escala dos gráficos da análise: opção -> (divisor, sufixo dos títulos)
+ESCALAS = {
+    "Unidades": (1, ""),
+    "Milhares (K)": (1000, " (em Milhares)"),
+    "Dez Milhares (10K)": (10000, " (em Dez Milhares)"),
+    "Cem Milhares (100K)": (100000, " (em Cem Milhares)"),
+}
+# Com METRICAS_PORTA definida, os histogramas ficam em http://<host>:<porta>/metrics
+if os.environ.get("METRICAS_PORTA"):
+    metrics.servir(int(os.environ["METRICAS_PORTA"]))
+
 # ==============================================
 # CSS para Estilização
 # ==============================================
@@ -66,209 +83,87 @@ st.markdown(
 """, unsafe_allow_html=True
 )
 
-# ...existing code...
-def convert_to_int(text):
-    """Converte texto do TikTok (ex: '1.2M') para inteiro."""
-    text = text.replace(',', '').replace('.', '')
-    if 'K' in text:
-        return int(float(text.replace('K', '')) * 1000)
-    elif 'M' in text:
-        return int(float(text.replace('M', '')) * 1000000)
-    elif 'B' in text:
-        return int(float(text.replace('B', '')) * 1000000000)
-    else:
-        try:
-            return int(text)
-        except:
-            return 0
-
-def estimate_earnings(views):
-    """Estimativa simples de ganhos baseada em visualizações."""
-    # Ajuste conforme sua lógica
-    return views * 0.01
-# ...existing code...
-
 # ==============================================
 # BANCO DE DADOS
 # ==============================================
-def init_db():
-    """Inicializa o banco de dados e cria as tabelas necessárias."""
-    try:
-        conn = sqlite3.connect("influencers.db", check_same_thread=False)
-        cursor = conn.cursor()
-
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS usuarios (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            usuario TEXT UNIQUE,
-            senha TEXT,
-            tipo TEXT
-        )
-        """)
-
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS historico (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            usuario TEXT,
-            influencer TEXT,
-            tipo TEXT,
-            valor INTEGER,
-            data TEXT,
-            metodo TEXT,
-            ganhos REAL,
-            live_curtidas INTEGER,
-            live_visualizacoes INTEGER
-        )
-        """)
-
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS produtos_live (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            influencer TEXT,
-            nome_produto TEXT,
-            valor_estimado REAL,
-            data TEXT
-        )
-        """)
+USUARIOS_PADRAO = [('admin', 'alfa@01admin', 'criador'), ('dev', 'dev@123', 'criador')]
 
-        # Adiciona colunas se não existirem
-        try:
-            cursor.execute("ALTER TABLE historico ADD COLUMN ganhos REAL")
-        except sqlite3.OperationalError:
-            pass
 
-        try:
-            cursor.execute("ALTER TABLE historico ADD COLUMN live_curtidas INTEGER")
-        except sqlite3.OperationalError:
-            pass
+@st.cache_resource(show_spinner=False)
+def _preparar_banco():
+    # As tabelas são criadas pela primeira conexão (``db.preparar``)
+    db.garantir_usuarios(db.get_connection(), USUARIOS_PADRAO)
 
-        try:
-            cursor.execute("ALTER TABLE historico ADD COLUMN live_visualizacoes INTEGER")
-        except sqlite3.OperationalError:
-            pass
-
-        # Adiciona ou atualiza usuários de login
-        cursor.execute("INSERT OR IGNORE INTO usuarios (usuario, senha, tipo) VALUES (?, ?, ?)",
-                       ('admin', 'alfa@01admin', 'criador'))
-        cursor.execute("INSERT OR IGNORE INTO usuarios (usuario, senha, tipo) VALUES (?, ?, ?)",
-                       ('dev', 'dev@123', 'criador'))
-
-        conn.commit()
-        return conn, cursor
 
+def init_db():
+    """Prepara o banco uma vez por processo; as execuções seguintes do script não repetem nada."""
+    try:
+        _preparar_banco()
+        return True
     except Exception as e:
         st.error(f"Erro ao inicializar banco de dados: {str(e)}")
-        return None, None
-
-
-conn, cursor = init_db()
-
+        return False
 
-# ==============================================
-# CONFIGURAÇÃO DO PLAYWRIGHT E NAVEGADOR
-# ==============================================
-def setup_playwright():
-    p = sync_playwright().start()
-    browser = p.chromium.launch(headless=True)
-    return p, browser
 
 # ==============================================
 # FUNÇÕES DE SCRAPING
 # ==============================================
-def get_tiktok_data_from_scraping(username):
+def get_tiktok_data_from_scraping(username, incluir_live=False):
+    """Busca o perfil (e a live, se pedido) num único lote; retorna (dados, live_data).
+
+    Resultados recentes vêm de ``scrape_cache``, e buscas simultâneas do mesmo
+    perfil (em outras sessões ou no coletor) são feitas uma única vez.
+    """
+    username = username.strip().lstrip('@')
+    live_data = {'live_curtidas': 0, 'live_visualizacoes': 0}
+
+    def coletar():
+        st.info(f"Conectando ao TikTok para buscar dados de @{username}...")
+        lote = scrape_profiles([username], concurrency=2, include_live=incluir_live)
+        erro_live = lote.live_errors.get(username)
+        if erro_live is not None:
+            st.warning(f"Não foi possível verificar a live de @{username}: {str(erro_live)}")
+        if username in lote.errors:
+            raise lote.errors[username]
+        return lote.results[username], lote.lives.get(username)
+
     try:
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=True)
-            context = browser.new_context(
-                user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/90.0.4430.212 Safari/537.36"
-            )
-            page = context.new_page()
-
-            st.info(f"Conectando ao TikTok para buscar dados de @{username}...")
-            page.goto(f"https://www.tiktok.com/@{username}", timeout=120000)
-
-            followers_elem = page.locator("xpath=//strong[@data-e2e='followers-count']")
-            likes_elem = page.locator("xpath=//strong[@data-e2e='likes-count']")
-
-            # Wait for elements to be visible
-            followers_elem.wait_for(state="visible")
-            likes_elem.wait_for(state="visible")
-
-            followers_num = convert_to_int(followers_elem.inner_text())
-            likes_num = convert_to_int(likes_elem.inner_text())
-            views_num = likes_num
-
-            return {
-                'seguidores': followers_num,
-                'curtidas': likes_num,
-                'visualizacoes': views_num
-            }
-
-    except TimeoutError:
-        st.error("Erro: O tempo limite para carregar a página ou encontrar elementos foi excedido. O influencer pode não existir ou a conexão está lenta.")
-        return None
-    except PlaywrightError as e:
-        st.error(f"Erro do Playwright. Verifique a página do influencer. Erro: {str(e)}")
-        return None
+        dados, live = scrape_cache.obter(username, coletar, incluir_live)
+    except PerfilInexistenteError:
+        st.error(f"O perfil @{username} não existe no TikTok. Verifique o nome de usuário.")
+        return None, live_data
+    except BloqueioError:
+        st.error("O TikTok está bloqueando as buscas no momento (captcha). Tente novamente em alguns minutos.")
+        return None, live_data
     except Exception as e:
-        st.error(f"Erro inesperado no scraping: {str(e)}")
-        return None
+        # Importado só aqui: se o erro veio do navegador, o Playwright já está carregado
+        from playwright.async_api import Error as PlaywrightError, TimeoutError as PlaywrightTimeoutError
 
-# ...existing code...
-conn, cursor = init_db()
-
-# ==============================================
-# FUNÇÕES UTILITÁRIAS
-# ==============================================
-def convert_to_int(text):
-    """Converte texto do TikTok (ex: '1.2M') para inteiro."""
-    text = text.replace(',', '').replace('.', '')
-    if 'K' in text:
-        return int(float(text.replace('K', '')) * 1000)
-    elif 'M' in text:
-        return int(float(text.replace('M', '')) * 1000000)
-    elif 'B' in text:
-        return int(float(text.replace('B', '')) * 1000000000)
-    else:
-        try:
-            return int(text)
-        except:
-            return 0
+        if isinstance(e, PlaywrightTimeoutError):
+            st.error("Erro: O tempo limite para carregar a página ou encontrar elementos foi excedido. O influencer pode não existir ou a conexão está lenta.")
+        elif isinstance(e, PlaywrightError):
+            st.error(f"Erro do Playwright. Verifique a página do influencer. Erro: {str(e)}")
+        else:
+            st.error(f"Erro inesperado no scraping: {str(e)}")
+        return None, live_data
+    return dados, live or live_data
 
-def estimate_earnings(views):
-    """Estimativa simples de ganhos baseada em visualizações."""
-    # Ajuste conforme sua lógica
-    return views * 0.01
 
-# ==============================================
-# CONFIGURAÇÃO DO PLAYWRIGHT PARA AMBIENTES HEADLESS
-# ==============================================
-def setup_playwright():
-    p = sync_playwright().start()
-    browser = p.chromium.launch(headless=True)
-    return p, browser
-# ...existing code...
 # ==============================================
 # FUNÇÕES DO APLICATIVO
 # ==============================================
 def verificar_login(usuario, senha):
     try:
-        cursor.execute("SELECT * FROM usuarios WHERE usuario=? AND senha=?", (usuario, senha))
-        return cursor.fetchone()
+        return db.verificar_login(db.get_connection(), usuario, senha)
     except Exception as e:
         st.error(f"Erro ao verificar login: {str(e)}")
         return None
 
 
-def adicionar_registro(usuario, influencer, tipo, valor, metodo, live_curtidas=0, live_visualizacoes=0):
+def registrar_snapshot(usuario, influencer, dados, live_data):
     try:
-        data = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        ganhos_estimados = estimate_earnings(valor)
-        cursor.execute("""
-        INSERT INTO historico (usuario, influencer, tipo, valor, data, metodo, ganhos, live_curtidas, live_visualizacoes) 
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (usuario, influencer, tipo, valor, data, metodo, ganhos_estimados, live_curtidas, live_visualizacoes))
-        conn.commit()
+        db.registrar_coleta(db.get_connection(), usuario, influencer, dados, live_data)
+        cache.invalidar_usuario(usuario)
         return True
     except Exception as e:
         st.error(f"Erro ao adicionar registro: {str(e)}")
@@ -276,28 +171,13 @@ def adicionar_registro(usuario, influencer, tipo, valor, metodo, live_curtidas=0
 
 
 def check_monthly_live_scrape(influencer, usuario):
-    cursor.execute("""
-    SELECT data FROM historico
-    WHERE influencer = ? AND usuario = ? AND live_visualizacoes > 0
-    ORDER BY data DESC LIMIT 1
-    """, (influencer, usuario))
-    last_scrape = cursor.fetchone()
-
-    if last_scrape:
-        last_date = datetime.strptime(last_scrape[0], "%Y-%m-%d %H:%M:%S")
-        if last_date.month == datetime.now().month and last_date.year == datetime.now().year:
-            return False
-    return True
+    return db.precisa_verificar_live(db.get_connection().cursor(), influencer, usuario)
 
 
 def adicionar_produto_live(influencer, nome_produto, valor_estimado):
     try:
-        data = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        cursor.execute("""
-        INSERT INTO produtos_live (influencer, nome_produto, valor_estimado, data)
-        VALUES (?, ?, ?, ?)
-        """, (influencer, nome_produto, valor_estimado, data))
-        conn.commit()
+        db.inserir_produto(db.get_connection(), influencer, nome_produto, valor_estimado)
+        cache.invalidar_produtos()
         return True
     except Exception as e:
         st.error(f"Erro ao adicionar produto: {str(e)}")
@@ -306,39 +186,57 @@ def adicionar_produto_live(influencer, nome_produto, valor_estimado):
 
 def get_produtos_ganhados(influencers, data_inicio, data_fim):
     try:
-        query = """
-        SELECT influencer, nome_produto, valor_estimado, data
-        FROM produtos_live
-        WHERE influencer IN ({}) AND data >= ? AND data <= ?
-        """.format(','.join(['?'] * len(influencers)))
-
-        params = influencers + [data_inicio.strftime("%Y-%m-%d 00:00:00"), data_fim.strftime("%Y-%m-%d 23:59:59")]
-
-        df = pd.read_sql_query(query, conn, params=params)
-        return df
+        df = cache.carregar_produtos(db.get_connection(), influencers, data_inicio, data_fim)
+        return df.drop(columns='id')
     except Exception as e:
         st.error(f"Erro ao buscar produtos: {str(e)}")
         return pd.DataFrame()
 
 
-def exportar_excel(df, filename="relatorio.xlsx"):
+ROTULOS_EXPORTACAO = {
+    'xlsx': "📊 Exportar para Excel",
+    'csv': "📄 Exportar para CSV",
+    'parquet': "🗂️ Exportar para Parquet",
+}
+
+
+def exportar_relatorio(dados, nome_base, key, origem=None):
+    """Escolha do formato e botão de download; o arquivo só é gerado depois da escolha.
+
+    ``dados`` é um DataFrame, uma sequência de lotes ou uma função que os
+    devolve (veja ``app_tiktok.export``). Os bytes ficam na sessão enquanto
+    o formato e ``origem`` (o objeto da sessão de onde vêm os dados) forem os
+    mesmos, então os reruns seguintes não serializam de novo.
+    """
     try:
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".xlsx") as tmp:
-            df.to_excel(tmp.name, index=False)
-            tmp_path = tmp.name
-
-        with open(tmp_path, "rb") as f:
-            st.download_button(
-                "📊 Exportar para Excel",
-                f,
-                file_name=filename,
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-            )
-        os.unlink(tmp_path)
+        formatos = export.formatos_disponiveis()
+        formato = st.selectbox("Exportar relatório", formatos, index=None, key=f"{key}_formato",
+                               format_func=ROTULOS_EXPORTACAO.get, placeholder="Escolha o formato")
+        if formato is None:
+            return
+        guardado = st.session_state.get(f"{key}_arquivo")
+        if guardado is None or guardado[0] != formato or guardado[1] is not origem:
+            guardado = (formato, origem, export.serializar(dados, formato))
+            st.session_state[f"{key}_arquivo"] = guardado
+        extensao, mime = export.FORMATOS[formato]
+        st.download_button(
+            ROTULOS_EXPORTACAO[formato],
+            guardado[2],
+            file_name=nome_base + extensao,
+            mime=mime,
+            key=f"{key}_{formato}",
+            on_click="ignore"
+        )
     except Exception as e:
         st.error(f"Erro ao exportar arquivo: {str(e)}")
 
 
+def mostrar_grafico(fig):
+    """``st.plotly_chart`` medindo a serialização da figura."""
+    with metrics.medir('grafico_serializacao'):
+        st.plotly_chart(fig, use_container_width=True)
+
+
 # ==============================================
 # INTERFACES DO USUÁRIO
 # ==============================================
@@ -363,338 +261,322 @@ def login_section():
             st.error("Usuário ou senha inválidos")
 
 
-def main_app():
-    st.title(f"Bem-vindo, ao gerenciamento de carreira de tiktokers {st.session_state.usuario}!")
+def painel_desempenho():
+    """Histogramas de tempo deste processo, na barra lateral."""
+    with st.sidebar.expander("Desempenho"):
+        resumo = metrics.registro.resumo()
+        if not resumo:
+            st.caption("Nenhuma medição ainda.")
+            return
+        st.dataframe(pd.DataFrame(resumo).T.drop(columns='buckets').astype(float).round(4),
+                     use_container_width=True)
+        st.download_button("Prometheus", metrics.registro.para_prometheus(), file_name="metricas.prom",
+                           mime="text/plain", on_click="ignore")
+        st.download_button("JSON", metrics.registro.para_json(), file_name="metricas.json",
+                           mime="application/json", on_click="ignore")
+        if st.button("Zerar medições"):
+            metrics.registro.limpar()
+            st.rerun()
 
+
+def mostrar_analise(analise, escala_unidade):
+    """Monta os gráficos de uma análise já calculada, na escala escolhida."""
+    # Plotly só é carregado quando há gráficos para montar
+    import plotly.express as px
+
+    escala, unidade_label = ESCALAS[escala_unidade]
+
+    st.subheader("Resumo do Crescimento no Período")
+    for row in analise['crescimento'].to_dict('records'):
+        st.write(f"### {row['influencer']}")
+        col_seg, col_cur, col_vis, col_ganhos = st.columns(4)
+        with col_seg:
+            st.metric("Novos Seguidores", f"{row['seguidores']:,.0f}",
+                      f"{row['seguidores_percentual']:.2f}%")
+        with col_cur:
+            st.metric("Novas Curtidas", f"{row['curtidas']:,.0f}",
+                      f"{row['curtidas_percentual']:.2f}%")
+        with col_vis:
+            st.metric("Novas Visualizações", f"{row['visualizacoes']:,.0f}",
+                      f"{row['visualizacoes_percentual']:.2f}%")
+        with col_ganhos:
+            st.metric("Ganhos Estimados (R$)", f"R$ {row['ganhos']:,.2f}",
+                      f"{row['ganhos_percentual']:.2f}%")
+
+    st.subheader("Evolução das Métricas" + unidade_label)
+    # A escala só é aplicada aos pontos que vão para o gráfico
+    fig_evolucao = px.line(analise['metricas'].assign(valor_escala=lambda d: d['valor'] / escala),
+                           x='data', y='valor_escala', color='influencer', line_dash='tipo',
+                           title="Evolução de Seguidores, Curtidas e Visualizações")
+    fig_evolucao.update_layout(yaxis_tickformat='.2s')
+    fig_evolucao.update_traces(
+        hovertemplate='<b>%{fullData.name}</b><br>Data: %{x}<br>Valor: %{y:,.0f}' + unidade_label.replace(
+            " (", "").replace(")", ""))
+    mostrar_grafico(fig_evolucao)
+
+    # Novo gráfico de variação diária
+    st.subheader("Variação Diária de Seguidores e Curtidas")
+    fig_variacao = px.bar(analise['variacao'], x='data', y='variacao', color='influencer', barmode='group',
+                          facet_col='metrica', title="Variação Diária de Seguidores e Curtidas")
+    mostrar_grafico(fig_variacao)
+
+    st.subheader("Evolução de Ganhos Estimados (R$)" + unidade_label)
+    fig_ganhos = px.line(analise['ganhos'].assign(valor_escala=lambda d: d['valor'] / escala),
+                         x='data', y='valor_escala', color='influencer',
+                         title="Evolução de Ganhos Estimados")
+    fig_ganhos.update_layout(yaxis_tickformat='.2s')
+    fig_ganhos.update_traces(
+        hovertemplate='<b>%{fullData.name}</b><br>Data: %{x}<br>Ganhos: R$ %{y:,.2f}')
+    mostrar_grafico(fig_ganhos)
+
+    st.subheader("Taxa de Engajamento por Influencer")
+    df_engagement = analise['engajamento']
+    if df_engagement is not None:
+        st.dataframe(df_engagement.sort_index().rename(
+            columns={'taxa_engajamento_absoluta': 'Engajamento Absoluto (curtidas/seguidores)'}),
+            use_container_width=True)
+
+        fig_engajamento = px.bar(df_engagement, x='influencer', y='taxa_engajamento_absoluta',
+                                 title="Taxa de Engajamento Média (Valor Absoluto)",
+                                 labels={
+                                     'taxa_engajamento_absoluta': 'Engajamento (curtidas/seguidores)',
+                                     'influencer': 'Influencer'})
+        mostrar_grafico(fig_engajamento)
+    else:
+        st.info(
+            "Para visualizar a taxa de engajamento, certifique-se de que o histórico inclui dados de 'seguidores' e 'curtidas'.")
+
+    st.subheader("Análise de Lives")
+    df_lives = analise['lives']
+    if not df_lives.empty:
+        st.subheader("Quantidade de Lives por Mês")
+        fig_lives_mes = px.bar(analise['lives_por_mes'], x='mes', y='quantidade_lives', color='influencer',
+                               title="Quantidade de Lives Registradas por Mês")
+        mostrar_grafico(fig_lives_mes)
+
+        st.subheader("Visualizações e Curtidas em Lives")
+        # Escala em milhares só nos pontos do gráfico; o hover mostra o valor original
+        fig_lives = px.scatter(df_lives.assign(live_visualizacoes_k=lambda d: d['live_visualizacoes'] / 1000),
+                               x='data', y='live_visualizacoes_k', color='influencer',
+                               size='live_curtidas',
+                               hover_data={
+                                   'live_visualizacoes': ':.0f',
+                                   'live_curtidas': ':.0f',
+                                   'live_visualizacoes_k': False
+                               },
+                               title="Visualizações e Curtidas em Lives por Período")
+
+        fig_lives.update_layout(
+            yaxis_title="Visualizações de Live (em milhares)",
+            hovermode="x unified"
+        )
+        mostrar_grafico(fig_lives)
+
+    else:
+        st.info("Nenhum dado de live encontrado para o período selecionado.")
+
+    df_serie_live = analise['serie_live']
+    if not df_serie_live.empty:
+        st.subheader("Espectadores por Minuto nas Lives")
+        fig_serie_live = px.line(df_serie_live, x='data', y='espectadores', color='influencer',
+                                 hover_data={'curtidas': ':.0f'},
+                                 title="Espectadores Simultâneos por Minuto")
+        mostrar_grafico(fig_serie_live)
+
+
+def mostrar_busca(busca):
+    """Resultado da última busca da seção 1 (guardado na sessão)."""
+    influencer, dados, live_data = busca['influencer'], busca['dados'], busca['live_data']
+    st.success(f"Dados de @{influencer} salvos com sucesso!")
+    st.write(f"**Seguidores:** {dados['seguidores']:,}")
+    st.write(f"**Curtidas:** {dados['curtidas']:,}")
+    st.write(f"**Visualizações:** {dados['visualizacoes']:,}")
+    st.write(f"**Ganhos Estimados (R$):** R$ {estimate_earnings(dados['visualizacoes']):,.2f}")
+    if live_data['live_visualizacoes'] > 0:
+        st.write(f"**Live Curtidas:** {live_data['live_curtidas']:,}")
+        st.write(f"**Live Visualizações:** {live_data['live_visualizacoes']:,}")
+
+
+# Cada seção é um fragmento: interagir com um widget dela reexecuta só a própria
+# seção, não o script inteiro. Os resultados ficam em st.session_state
+# ('busca', 'analise', 'produtos') para sobreviver a esses reruns. O tempo de
+# cada seção vai para as métricas (fases secao_*), para acompanhar o custo dos reruns.
+@st.fragment
+@metrics.medir('secao_busca')
+def secao_busca(influencers_disponiveis):
     st.header("1. Buscar e Adicionar Influencer")
     influencer = st.text_input("Nome do influencer (sem @)", placeholder="ex: simoneses")
+    agendar_coleta = st.checkbox("Incluir na coleta automática", value=True,
+                                 help="O coletor em segundo plano atualiza os dados periodicamente.")
 
     if st.button("Buscar Dados e Salvar"):
         if not influencer:
             st.warning("Por favor, digite o nome do influencer.")
         else:
             with st.spinner(f"Buscando dados de @{influencer}..."):
-                dados = get_tiktok_data_from_scraping(influencer)
-
-                live_data = {'live_curtidas': 0, 'live_visualizacoes': 0}
-                if check_monthly_live_scrape(f"@{influencer}", st.session_state.usuario):
-                    live_data = get_live_data_from_scraping(influencer)
-                else:
+                incluir_live = check_monthly_live_scrape(f"@{influencer}", st.session_state.usuario)
+                if not incluir_live:
                     st.info(f"A verificação de lives para @{influencer} já foi realizada este mês. Pulando esta etapa.")
 
+                dados, live_data = get_tiktok_data_from_scraping(influencer, incluir_live=incluir_live)
+
                 if dados:
-                    salvo_seguidores = adicionar_registro(st.session_state.usuario, f"@{influencer}", 'seguidores',
-                                                          dados['seguidores'], 'Scraping',
-                                                          live_data['live_curtidas'], live_data['live_visualizacoes'])
-                    salvo_curtidas = adicionar_registro(st.session_state.usuario, f"@{influencer}", 'curtidas',
-                                                        dados['curtidas'], 'Scraping')
-                    salvo_visualizacoes = adicionar_registro(st.session_state.usuario, f"@{influencer}",
-                                                             'visualizacoes', dados['visualizacoes'], 'Scraping')
-                    salvo_ganhos = adicionar_registro(st.session_state.usuario, f"@{influencer}", 'ganhos',
-                                                      estimate_earnings(dados['visualizacoes']), 'Estimativa')
-
-                    if salvo_seguidores and salvo_curtidas and salvo_visualizacoes and salvo_ganhos:
-                        st.success(f"Dados de @{influencer} salvos com sucesso!")
-                        st.write(f"**Seguidores:** {dados['seguidores']:,}")
-                        st.write(f"**Curtidas:** {dados['curtidas']:,}")
-                        st.write(f"**Visualizações:** {dados['visualizacoes']:,}")
-                        st.write(f"**Ganhos Estimados (R$):** R$ {estimate_earnings(dados['visualizacoes']):,.2f}")
-                        if live_data['live_visualizacoes'] > 0:
-                            st.write(f"**Live Curtidas:** {live_data['live_curtidas']:,}")
-                            st.write(f"**Live Visualizações:** {live_data['live_visualizacoes']:,}")
+                    if registrar_snapshot(st.session_state.usuario, f"@{influencer}", dados, live_data):
+                        if agendar_coleta:
+                            agendar_influencer(db.get_connection(), st.session_state.usuario, influencer, coletar_agora=False)
+                        st.session_state.busca = {'influencer': influencer, 'dados': dados, 'live_data': live_data}
+                        if f"@{influencer}" not in influencers_disponiveis:
+                            # Influencer novo: reexecuta o app todo para as seções 2 e 3 o listarem
+                            st.rerun(scope="app")
                     else:
                         st.error("Erro ao salvar os dados no banco.")
                 else:
                     st.error("Não foi possível obter os dados do influencer. Verifique o nome ou tente novamente.")
 
+    if 'busca' in st.session_state:
+        mostrar_busca(st.session_state.busca)
+
+
+@st.fragment
+@metrics.medir('secao_analise')
+def secao_analise(influencers_disponiveis):
     st.header("2. Análise do Histórico de Influencers")
-    influencers_disponiveis = pd.read_sql_query(
-        "SELECT DISTINCT influencer FROM historico WHERE usuario = ?", conn, params=[st.session_state.usuario]
-    )['influencer'].tolist()
 
     if not influencers_disponiveis:
         st.info("Nenhum influencer encontrado no histórico. Use a seção acima para adicionar um.")
+        return
+
+    col_filtros1, col_filtros2 = st.columns([2, 1])
+
+    with col_filtros1:
+        influencers_selecionados = st.multiselect("Selecione os Influencers para Análise:", influencers_disponiveis)
+    with col_filtros2:
+        escala_unidade = st.selectbox("Escala de Visualização dos Gráficos", options=list(ESCALAS))
+
+    col_data_inicio, col_data_fim = st.columns(2)
+    with col_data_inicio:
+        data_inicio = st.date_input("Data de Início", datetime.now() - timedelta(days=30))
+    with col_data_fim:
+        data_fim = st.date_input("Data de Fim", datetime.now())
+    resolucao_completa = st.checkbox("Resolução completa na série das lives", value=False,
+                                     help="Sem isso, a audiência por minuto das lives é reduzida a "
+                                          f"{max_pontos_por_serie()} pontos por linha, preservando picos e vales.")
+    filtros = (tuple(influencers_selecionados), data_inicio, data_fim, resolucao_completa)
+
+    if st.button("Gerar Análise"):
+        if not influencers_selecionados:
+            st.warning("Por favor, selecione ao menos um influencer.")
+        else:
+            st.session_state.analise = {'filtros': filtros, 'resultado': gerar_analise(
+                db.get_connection(), st.session_state.usuario, influencers_selecionados, data_inicio, data_fim,
+                resolucao_completa, carregar_rollups=cache.carregar_rollups)}
+
+    analise = st.session_state.get('analise')
+    if analise is None:
+        return
+    if analise['filtros'] != filtros:
+        st.caption("Mostrando a última análise gerada; clique em Gerar Análise para aplicar os filtros atuais.")
+    if analise['resultado'] is None:
+        st.warning("Nenhum dado encontrado para os filtros selecionados.")
+        return
+
+    mostrar_analise(analise['resultado'], escala_unidade)
+
+    # O relatório exportado traz as coletas brutas do período, não os agregados
+    # (lido em lotes direto do banco, só depois de escolhido o formato)
+    usuario = st.session_state.usuario
+    selecionados, inicio, fim, _ = analise['filtros']
+    exportar_relatorio(
+        lambda: (db.snapshots_para_longo(lote) for lote in db.carregar_snapshots(
+            db.get_connection(), usuario, list(selecionados), inicio, fim, tamanho_lote=export.TAMANHO_LOTE)),
+        f"relatorio_tiktok_{inicio}_{fim}", key="exportar_analise", origem=analise)
+
+
+@st.fragment
+@metrics.medir('secao_produtos')
+def secao_produtos(influencers_disponiveis):
+    st.header("3. Gerenciamento de Produtos Ganhados em Live")
 
-    else:
-        col_filtros1, col_filtros2 = st.columns([2, 1])
-
-        with col_filtros1:
-            influencers_selecionados = st.multiselect("Selecione os Influencers para Análise:", influencers_disponiveis)
-        with col_filtros2:
-            escala_unidade = st.selectbox("Escala de Visualização dos Gráficos",
-                                          options=["Unidades", "Milhares (K)", "Dez Milhares (10K)",
-                                                   "Cem Milhares (100K)"])
-
-        col_data_inicio, col_data_fim = st.columns(2)
-        with col_data_inicio:
-            data_inicio = st.date_input("Data de Início", datetime.now() - timedelta(days=30))
-        with col_data_fim:
-            data_fim = st.date_input("Data de Fim", datetime.now())
-
-        if st.button("Gerar Análise"):
-            if not influencers_selecionados:
-                st.warning("Por favor, selecione ao menos um influencer.")
-            else:
-                query = """
-                SELECT influencer, tipo, valor, data, ganhos, live_curtidas, live_visualizacoes
-                FROM historico
-                WHERE usuario = ? AND data >= ? AND data <= ? AND influencer IN ({})
-                """.format(','.join(['?'] * len(influencers_selecionados)))
-
-                params = [st.session_state.usuario, data_inicio.strftime("%Y-%m-%d 00:00:00"),
-                          data_fim.strftime("%Y-%m-%d 23:59:59")] + influencers_selecionados
-
-                df = pd.read_sql_query(query, conn, params=params)
-
-                if not df.empty:
-                    df['data'] = pd.to_datetime(df['data'])
-                    df = df.sort_values(by=['influencer', 'data'])
-
-                    escala = 1
-                    unidade_label = ""
-                    if escala_unidade == "Milhares (K)":
-                        escala = 1000
-                        unidade_label = " (em Milhares)"
-                    elif escala_unidade == "Dez Milhares (10K)":
-                        escala = 10000
-                        unidade_label = " (em Dez Milhares)"
-                    elif escala_unidade == "Cem Milhares (100K)":
-                        escala = 100000
-                        unidade_label = " (em Cem Milhares)"
-
-                    df['valor_escala'] = df['valor'] / escala
-                    df['ganhos_escala'] = df['ganhos'] / escala
-
-                    st.subheader("Resumo do Crescimento no Período")
-                    crescimento_df = pd.DataFrame()
-
-                    for influencer in influencers_selecionados:
-                        temp_df = df[df['influencer'] == influencer]
-                        if not temp_df.empty:
-                            crescimentos = {}
-                            for tipo in ['seguidores', 'curtidas', 'visualizacoes']:
-                                df_tipo = temp_df[temp_df['tipo'] == tipo]
-                                if not df_tipo.empty:
-                                    start_value = df_tipo['valor'].iloc[0]
-                                    end_value = df_tipo['valor'].iloc[-1]
-                                    crescimento = end_value - start_value
-                                    crescimento_percentual = ((
-                                                                      end_value - start_value) / start_value) * 100 if start_value != 0 else 0
-                                    crescimentos[tipo] = crescimento
-                                    crescimentos[f'{tipo}_percentual'] = crescimento_percentual
-                                else:
-                                    crescimentos[tipo] = 0
-                                    crescimentos[f'{tipo}_percentual'] = 0
-
-                            df_ganhos = temp_df[temp_df['tipo'] == 'ganhos']
-                            if not df_ganhos.empty:
-                                start_ganhos = df_ganhos['valor'].iloc[0]
-                                end_ganhos = df_ganhos['valor'].iloc[-1]
-                                crescimento_ganhos = end_ganhos - start_ganhos
-                                crescimento_ganhos_percentual = ((
-                                                                         end_ganhos - start_ganhos) / start_ganhos) * 100 if start_ganhos != 0 else 0
-                            else:
-                                crescimento_ganhos = 0
-                                crescimento_ganhos_percentual = 0
-
-                            crescimento_df = pd.concat(
-                                [crescimento_df,
-                                 pd.DataFrame(
-                                     [{'influencer': influencer, **crescimentos, 'ganhos': crescimento_ganhos,
-                                       'ganhos_percentual': crescimento_ganhos_percentual}])],
-                                ignore_index=True)
-
-                    if not crescimento_df.empty:
-                        for index, row in crescimento_df.iterrows():
-                            st.write(f"### {row['influencer']}")
-                            col_seg, col_cur, col_vis, col_ganhos = st.columns(4)
-                            with col_seg:
-                                st.metric("Novos Seguidores", f"{row['seguidores']:,}",
-                                          f"{row['seguidores_percentual']:.2f}%")
-                            with col_cur:
-                                st.metric("Novas Curtidas", f"{row['curtidas']:,}",
-                                          f"{row['curtidas_percentual']:.2f}%")
-                            with col_vis:
-                                st.metric("Novas Visualizações", f"{row['visualizacoes']:,}",
-                                          f"{row['visualizacoes_percentual']:.2f}%")
-                            with col_ganhos:
-                                st.metric("Ganhos Estimados (R$)", f"R$ {row['ganhos']:,.2f}",
-                                          f"{row['ganhos_percentual']:.2f}%")
-
-                    st.subheader("Evolução das Métricas" + unidade_label)
-                    df_filtrado_metrica = df[df['tipo'].isin(['seguidores', 'curtidas', 'visualizacoes'])]
-                    fig_evolucao = px.line(df_filtrado_metrica, x='data', y='valor_escala', color='influencer',
-                                           line_dash='tipo',
-                                           title="Evolução de Seguidores, Curtidas e Visualizações")
-                    fig_evolucao.update_layout(yaxis_tickformat='.2s')
-                    fig_evolucao.update_traces(
-                        hovertemplate='<b>%{fullData.name}</b><br>Data: %{x}<br>Valor: %{y:,.0f}' + unidade_label.replace(
-                            " (", "").replace(")", ""))
-                    st.plotly_chart(fig_evolucao, use_container_width=True)
-
-                    # Novo gráfico de variação diária
-                    st.subheader("Variação Diária de Seguidores e Curtidas")
-                    df_seguidores = df[df['tipo'] == 'seguidores'].set_index('data')
-                    df_curtidas = df[df['tipo'] == 'curtidas'].set_index('data')
-
-                    df_seguidores_diff = df_seguidores.groupby('influencer')['valor'].diff().fillna(0)
-                    df_curtidas_diff = df_curtidas.groupby('influencer')['valor'].diff().fillna(0)
-
-                    df_variacao = pd.DataFrame({
-                        'seguidores_diff': df_seguidores_diff,
-                        'curtidas_diff': df_curtidas_diff,
-                        'influencer': df_seguidores['influencer']
-                    }).reset_index().melt(id_vars=['data', 'influencer'],
-                                          value_vars=['seguidores_diff', 'curtidas_diff'],
-                                          var_name='metrica',
-                                          value_name='variacao')
-
-                    fig_variacao = px.bar(df_variacao, x='data', y='variacao', color='influencer', barmode='group',
-                                          facet_col='metrica', title="Variação Diária de Seguidores e Curtidas")
-                    st.plotly_chart(fig_variacao, use_container_width=True)
-
-                    st.subheader("Evolução de Ganhos Estimados (R$)" + unidade_label)
-                    df_filtrado_ganhos = df[df['tipo'] == 'ganhos']
-                    fig_ganhos = px.line(df_filtrado_ganhos, x='data', y='valor_escala', color='influencer',
-                                         title="Evolução de Ganhos Estimados")
-                    fig_ganhos.update_layout(yaxis_tickformat='.2s')
-                    fig_ganhos.update_traces(
-                        hovertemplate='<b>%{fullData.name}</b><br>Data: %{x}<br>Ganhos: R$ %{y:,.2f}')
-                    st.plotly_chart(fig_ganhos, use_container_width=True)
-
-                    st.subheader("Taxa de Engajamento por Influencer")
-                    df_pivot = df.pivot_table(index='influencer', columns='tipo', values='valor',
-                                              aggfunc='mean').reset_index()
-
-                    if 'curtidas' in df_pivot.columns and 'seguidores' in df_pivot.columns:
-                        df_pivot['taxa_engajamento_absoluta'] = (df_pivot['curtidas'] / df_pivot['seguidores']).fillna(
-                            0)
-                        df_engagement = df_pivot[['influencer', 'taxa_engajamento_absoluta']].round(4)
-
-                        st.dataframe(df_engagement.rename(
-                            columns={'taxa_engajamento_absoluta': 'Engajamento Absoluto (curtidas/seguidores)'}),
-                            use_container_width=True)
-
-                        # Ordena os influencers por engajamento
-                        df_engagement_sorted = df_engagement.sort_values(by='taxa_engajamento_absoluta',
-                                                                         ascending=False)
-
-                        fig_engajamento = px.bar(df_engagement_sorted, x='influencer', y='taxa_engajamento_absoluta',
-                                                 title="Taxa de Engajamento Média (Valor Absoluto)",
-                                                 labels={
-                                                     'taxa_engajamento_absoluta': 'Engajamento (curtidas/seguidores)',
-                                                     'influencer': 'Influencer'})
-                        st.plotly_chart(fig_engajamento, use_container_width=True)
-                    else:
-                        st.info(
-                            "Para visualizar a taxa de engajamento, certifique-se de que o histórico inclui dados de 'seguidores' e 'curtidas'.")
-
-                    st.subheader("Análise de Lives")
-                    df_lives = df[
-                        ['influencer', 'data', 'live_curtidas', 'live_visualizacoes']].drop_duplicates().dropna(
-                        subset=['live_curtidas'])
-                    if not df_lives.empty:
-                        df_lives['mes'] = df_lives['data'].dt.to_period('M')
-                        lives_por_mes = df_lives.groupby(['influencer', 'mes']).size().reset_index(
-                            name='quantidade_lives')
-                        lives_por_mes['mes'] = lives_por_mes['mes'].astype(str)
-
-                        st.subheader("Quantidade de Lives por Mês")
-                        fig_lives_mes = px.bar(lives_por_mes, x='mes', y='quantidade_lives', color='influencer',
-                                               title="Quantidade de Lives Registradas por Mês")
-                        st.plotly_chart(fig_lives_mes, use_container_width=True)
-
-                        st.subheader("Visualizações e Curtidas em Lives")
-                        # Modificação para ajustar a escala e o hover
-                        df_lives['live_visualizacoes_k'] = df_lives['live_visualizacoes'] / 1000
-
-                        fig_lives = px.scatter(df_lives, x='data', y='live_visualizacoes_k', color='influencer',
-                                               size='live_curtidas',
-                                               hover_data={
-                                                   'live_visualizacoes': ':.0f',
-                                                   'live_curtidas': ':.0f',
-                                                   'live_visualizacoes_k': False
-                                               },
-                                               title="Visualizações e Curtidas em Lives por Período")
-
-                        fig_lives.update_layout(
-                            yaxis_title="Visualizações de Live (em milhares)",
-                            hovermode="x unified"
-                        )
-                        st.plotly_chart(fig_lives, use_container_width=True)
+    if not influencers_disponiveis:
+        st.info("Nenhum influencer encontrado no histórico. Adicione um na seção 1 para gerenciar produtos.")
+        return
 
-                    else:
-                        st.info("Nenhum dado de live encontrado para o período selecionado.")
+    tab1, tab2 = st.tabs(["Adicionar Produto", "Consultar Produtos"])
+
+    with tab1:
+        st.subheader("Adicionar Produto Manualmente")
+        influencer_produto = st.selectbox("Selecione o Influencer", influencers_disponiveis)
+        nome_produto = st.text_input("Nome do Produto")
+        valor_estimado = st.number_input("Valor Estimado (R$)", min_value=0.0, format="%.2f")
 
-                    exportar_excel(df, filename=f"relatorio_tiktok_{data_inicio}_{data_fim}.xlsx")
+        if st.button("Adicionar Produto Ganhado"):
+            if not nome_produto or valor_estimado <= 0:
+                st.warning("Por favor, preencha o nome do produto e o valor estimado.")
+            else:
+                if adicionar_produto_live(influencer_produto, nome_produto, valor_estimado):
+                    st.success(f"Produto '{nome_produto}' adicionado com sucesso para {influencer_produto}!")
                 else:
-                    st.warning("Nenhum dado encontrado para os filtros selecionados.")
+                    st.error("Falha ao adicionar o produto.")
 
-    # ---
-    # SEÇÃO DE PRODUTOS GANHADOS
-    # ---
-    st.header("3. Gerenciamento de Produtos Ganhados em Live")
+    with tab2:
+        st.subheader("Consultar Produtos Ganhados")
+        influencers_consulta_prod = st.multiselect(
+            "Selecione os Influencers para a Consulta de Produtos:",
+            influencers_disponiveis
+        )
 
-    if not influencers_disponiveis:
-        st.info("Nenhum influencer encontrado no histórico. Adicione um na seção 1 para gerenciar produtos.")
-    else:
-        tab1, tab2 = st.tabs(["Adicionar Produto", "Consultar Produtos"])
+        col_data_inicio_prod, col_data_fim_prod = st.columns(2)
+        with col_data_inicio_prod:
+            data_inicio_prod = st.date_input("Data de Início da Consulta", datetime.now() - timedelta(days=30),
+                                             key="data_inicio_prod")
+        with col_data_fim_prod:
+            data_fim_prod = st.date_input("Data de Fim da Consulta", datetime.now(), key="data_fim_prod")
+
+        if st.button("Buscar Produtos Ganhados"):
+            if not influencers_consulta_prod:
+                st.warning("Selecione pelo menos um influencer para a consulta.")
+            else:
+                df_produtos = get_produtos_ganhados(
+                    influencers_consulta_prod,
+                    data_inicio_prod,
+                    data_fim_prod
+                )
+                if not df_produtos.empty:
+                    df_produtos['data'] = pd.to_datetime(df_produtos['data']).dt.strftime('%Y-%m-%d %H:%M:%S')
+                st.session_state.produtos = df_produtos
+
+        df_produtos = st.session_state.get('produtos')
+        if df_produtos is not None:
+            if not df_produtos.empty:
+                st.dataframe(df_produtos, use_container_width=True)
+                exportar_relatorio(df_produtos, "produtos_ganhados", key="exportar_produtos",
+                                   origem=df_produtos)
+            else:
+                st.info("Nenhum produto encontrado para os influencers e período selecionados.")
 
-        with tab1:
-            st.subheader("Adicionar Produto Manualmente")
-            influencer_produto = st.selectbox("Selecione o Influencer", influencers_disponiveis)
-            nome_produto = st.text_input("Nome do Produto")
-            valor_estimado = st.number_input("Valor Estimado (R$)", min_value=0.0, format="%.2f")
 
-            if st.button("Adicionar Produto Ganhado"):
-                if not nome_produto or valor_estimado <= 0:
-                    st.warning("Por favor, preencha o nome do produto e o valor estimado.")
-                else:
-                    if adicionar_produto_live(influencer_produto, nome_produto, valor_estimado):
-                        st.success(f"Produto '{nome_produto}' adicionado com sucesso para {influencer_produto}!")
-                    else:
-                        st.error("Falha ao adicionar o produto.")
-
-        with tab2:
-            st.subheader("Consultar Produtos Ganhados")
-            influencers_consulta_prod = st.multiselect(
-                "Selecione os Influencers para a Consulta de Produtos:",
-                influencers_disponiveis
-            )
-
-            col_data_inicio_prod, col_data_fim_prod = st.columns(2)
-            with col_data_inicio_prod:
-                data_inicio_prod = st.date_input("Data de Início da Consulta", datetime.now() - timedelta(days=30),
-                                                 key="data_inicio_prod")
-            with col_data_fim_prod:
-                data_fim_prod = st.date_input("Data de Fim da Consulta", datetime.now(), key="data_fim_prod")
-
-            if st.button("Buscar Produtos Ganhados"):
-                if not influencers_consulta_prod:
-                    st.warning("Selecione pelo menos um influencer para a consulta.")
-                else:
-                    df_produtos = get_produtos_ganhados(
-                        influencers_consulta_prod,
-                        data_inicio_prod,
-                        data_fim_prod
-                    )
-
-                    if not df_produtos.empty:
-                        df_produtos['data'] = pd.to_datetime(df_produtos['data']).dt.strftime('%Y-%m-%d %H:%M:%S')
-                        st.dataframe(df_produtos, use_container_width=True)
-                        exportar_excel(df_produtos, filename="produtos_ganhados.xlsx")
-                    else:
-                        st.info("Nenhum produto encontrado para os influencers e período selecionados.")
+def main_app():
+    st.title(f"Bem-vindo, ao gerenciamento de carreira de tiktokers {st.session_state.usuario}!")
+
+    # Consultado só nos reruns completos; os fragmentos reaproveitam a lista recebida
+    influencers_disponiveis = cache.listar_influencers(db.get_connection(), st.session_state.usuario)
+
+    secao_busca(influencers_disponiveis)
+    secao_analise(influencers_disponiveis)
+    secao_produtos(influencers_disponiveis)
+
+    if st.session_state.usuario in USUARIOS_ADMIN:
+        painel_desempenho()
 
     if st.sidebar.button("Sair"):
         st.session_state.clear()
         st.rerun()
 
-
 # ==============================================
 # EXECUÇÃO PRINCIPAL
 # ==============================================
+init_db()
 if 'logged_in' not in st.session_state:
     login_section()
 else:
-    main_app()
\ No newline at end of file
+    main_app()
@@ -0,0 +1,142 @@
+"""Latência das consultas do painel sobre um histórico sintético grande.
+
+Uso::
+
+    python benchmarks/bench_db_queries.py --snapshots 2000000 --influencers 2000 [--json saida.json]
+
+Gera um banco temporário com ``snapshots`` e o equivalente em ``historico``
+(formato longo, quatro linhas por coleta) e mede as consultas do painel.
+A consulta legada em ``historico`` é medida sem e com o índice composto.
+As duas tabelas são comparadas com o mesmo tipo de chamada: o SQL puro
+(``fetchall``) e a carga em DataFrame com as datas convertidas, como o
+painel faz. Cada medição descarta uma execução de aquecimento (que inclui,
+por exemplo, a importação preguiçosa do pandas).
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+
+from comum import gravar_resultado, medir
+from app_tiktok import db
+
+USUARIO = "admin"
+LOTE = 50000
+
+
+def gerar_snapshots(total, influencers, dias, semente=42):
+    rng = random.Random(semente)
+    inicio = datetime.now() - timedelta(days=dias)
+    passo = dias * 86400 / max(1, total // influencers)
+    for i in range(total):
+        n = i % influencers
+        data = inicio + timedelta(seconds=(i // influencers) * passo + n)
+        seguidores = 1000 + n * 10 + i // influencers
+        curtidas = seguidores * rng.randint(5, 20)
+        yield (USUARIO, f"@influencer{n}", data.strftime(db.DATE_FORMAT), 'Scraping',
+               seguidores, curtidas, curtidas, curtidas * 0.01, 0, 0)
+
+
+def popular(conn, total, influencers, dias):
+    snapshots = []
+    historico = []
+
+    def gravar():
+        conn.executemany("""
+        INSERT OR IGNORE INTO snapshots (usuario, influencer, data, metodo, seguidores, curtidas,
+                                         visualizacoes, ganhos, live_curtidas, live_visualizacoes)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, snapshots)
+        conn.executemany("""
+        INSERT INTO historico (usuario, influencer, tipo, valor, data, metodo, ganhos,
+                               live_curtidas, live_visualizacoes)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, historico)
+        snapshots.clear()
+        historico.clear()
+
+    with conn:
+        for row in gerar_snapshots(total, influencers, dias):
+            snapshots.append(row)
+            usuario, influencer, data, metodo, seguidores, curtidas, visualizacoes, ganhos, _, _ = row
+            for tipo, valor in (('seguidores', seguidores), ('curtidas', curtidas),
+                                ('visualizacoes', visualizacoes), ('ganhos', ganhos)):
+                historico.append((usuario, influencer, tipo, valor, data, metodo, valor * 0.01, 0, 0))
+            if len(snapshots) >= LOTE:
+                gravar()
+        gravar()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--snapshots", type=int, default=1000000)
+    parser.add_argument("--influencers", type=int, default=1000)
+    parser.add_argument("--dias", type=int, default=365)
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--json", help="Grava o resultado neste arquivo.")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = db.connect(os.path.join(tmp, "bench.db"))
+        db.criar_tabelas(conn.cursor())
+        conn.commit()
+
+        inicio = time.perf_counter()
+        popular(conn, args.snapshots, args.influencers, args.dias)
+        carga = time.perf_counter() - inicio
+
+        selecionados = [f"@influencer{n}" for n in range(min(5, args.influencers))]
+        fim = date.today()
+        comeco = fim - timedelta(days=30)
+        consulta_legada = """
+        SELECT influencer, tipo, valor, data, ganhos, live_curtidas, live_visualizacoes
+        FROM historico
+        WHERE usuario = ? AND data >= ? AND data <= ? AND influencer IN ({})
+        """.format(','.join(['?'] * len(selecionados)))
+        params_legada = [USUARIO, comeco.strftime("%Y-%m-%d 00:00:00"),
+                         fim.strftime("%Y-%m-%d 23:59:59")] + selecionados
+
+        consulta_snapshots = """
+        SELECT {}
+        FROM snapshots
+        WHERE usuario = ? AND data >= ? AND data <= ? AND influencer IN ({})
+        ORDER BY influencer, data
+        """.format(', '.join(db.COLUNAS_SNAPSHOTS), ','.join(['?'] * len(selecionados)))
+
+        def legada():
+            conn.execute(consulta_legada, params_legada).fetchall()
+
+        def legada_df():
+            return pd.read_sql_query(consulta_legada, conn, params=params_legada, parse_dates=['data'])
+
+        consultas = {}
+        conn.execute("DROP INDEX idx_historico_usuario_influencer_data")
+        consultas['historico_periodo_sem_indice'] = medir(legada, args.repeticoes)
+        conn.execute(db.INDEXES[0])
+        consultas['historico_periodo_com_indice'] = medir(legada, args.repeticoes)
+        consultas['snapshots_periodo'] = medir(
+            lambda: conn.execute(consulta_snapshots, params_legada).fetchall(), args.repeticoes)
+
+        consultas['historico_periodo_df'] = medir(legada_df, args.repeticoes)
+        consultas['snapshots_periodo_df'] = medir(
+            lambda: db.carregar_snapshots(conn, USUARIO, selecionados, comeco, fim), args.repeticoes)
+        consultas['listar_influencers'] = medir(
+            lambda: db.listar_influencers(conn, USUARIO), args.repeticoes)
+        consultas['verificar_live'] = medir(
+            lambda: db.precisa_verificar_live(conn.cursor(), selecionados[0], USUARIO), args.repeticoes)
+        conn.close()
+
+    print(f"{'carga':>32}: {carga:.1f} s")
+    for nome, r in consultas.items():
+        print(f"{nome:>32}: mediana {r['mediana_ms']:.2f} ms (máx {r['max_ms']:.2f} ms)")
+
+    if args.json:
+        gravar_resultado(args.json, "db_queries", vars(args), {'carga': {'segundos': carga}, **consultas})
+
+
+if __name__ == "__main__":
+    main()
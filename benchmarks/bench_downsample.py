@@ -0,0 +1,66 @@
+"""Tamanho do JSON e tempo de montagem da figura de evolução, com e sem ``reduzir_series``.
+
+Uso::
+
+    python benchmarks/bench_downsample.py --pontos 1000 10000 100000 [--influencers 5] [--json saida.json]
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+
+from comum import gravar_resultado, medir
+from app_tiktok.downsample import reduzir_series
+
+
+def gerar(influencers, pontos, semente=42):
+    rng = np.random.default_rng(semente)
+    partes = []
+    for n in range(influencers):
+        for tipo in ('seguidores', 'curtidas', 'visualizacoes'):
+            partes.append(pd.DataFrame({
+                'influencer': f"@influencer{n}",
+                'tipo': tipo,
+                'data': pd.date_range("2024-01-01", periods=pontos, freq="min"),
+                'valor_escala': rng.integers(-50, 100, pontos).cumsum() + 1_000_000,
+            }))
+    return pd.concat(partes, ignore_index=True)
+
+
+def montar(df):
+    """Tamanho em bytes do JSON da figura."""
+    return len(px.line(df, x='data', y='valor_escala', color='influencer', line_dash='tipo').to_json())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pontos", type=int, nargs="+", default=[1000, 10_000, 100_000],
+                        help="Pontos por série.")
+    parser.add_argument("--influencers", type=int, default=5)
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--json", help="Grava o resultado neste arquivo.")
+    args = parser.parse_args(argv)
+
+    medicoes = {}
+    for pontos in args.pontos:
+        df = gerar(args.influencers, pontos)
+        reduzido = reduzir_series(df, 'data', 'valor_escala', ['influencer', 'tipo'])
+        completo = medicoes[f"{pontos}/completo"] = {**medir(lambda: montar(df), args.repeticoes),
+                                                     'linhas': len(df), 'bytes': montar(df)}
+        # Redução e montagem juntas: é o que o painel paga por gráfico
+        menor = medicoes[f"{pontos}/reduzido"] = {
+            **medir(lambda: montar(reduzir_series(df, 'data', 'valor_escala', ['influencer', 'tipo'])),
+                    args.repeticoes),
+            'linhas': len(reduzido), 'bytes': montar(reduzido)}
+        reducao = medicoes[f"{pontos}/reducao"] = medir(
+            lambda: reduzir_series(df, 'data', 'valor_escala', ['influencer', 'tipo']), args.repeticoes)
+        print(f"{pontos:>7} pontos/série: redução {reducao['mediana_ms']:.1f} ms, completo {completo['mediana_ms']:.0f} ms "
+              f"{completo['bytes'] / 1e6:.2f} MB, reduzido {menor['mediana_ms']:.0f} ms {menor['bytes'] / 1e6:.2f} MB")
+
+    if args.json:
+        gravar_resultado(args.json, "downsample", vars(args), medicoes)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Resumo de crescimento: laço por influencer (antigo) vs. ``resumo_crescimento_rollups``.
+
+Para cada quantidade de influencers gera um banco sintético
+(``sintetico.py``) e mede o resumo como o painel o calcula hoje, a partir
+dos agregados diários já carregados (``rollups.carregar_rollups``), e o
+laço que o painel usava antes, sobre as coletas no formato longo. Só o
+cálculo é cronometrado; as consultas ficam de fora.
+
+Uso::
+
+    python benchmarks/bench_growth_summary.py --influencers 10 100 1000 5000 [--pontos 50] [--json saida.json]
+"""
+import argparse
+import os
+import tempfile
+from datetime import date, timedelta
+
+import pandas as pd
+
+from comum import gravar_resultado, medir
+from sintetico import USUARIO, gerar_banco
+from app_tiktok import db, rollups
+from app_tiktok.analytics import resumo_crescimento_rollups
+
+
+def resumo_antigo(df, influencers_selecionados):
+    """Cópia do laço que o painel usava antes (formato longo, concat a cada influencer)."""
+    crescimento_df = pd.DataFrame()
+    for influencer in influencers_selecionados:
+        temp_df = df[df['influencer'] == influencer]
+        if not temp_df.empty:
+            crescimentos = {}
+            for tipo in ['seguidores', 'curtidas', 'visualizacoes', 'ganhos']:
+                df_tipo = temp_df[temp_df['tipo'] == tipo]
+                if not df_tipo.empty:
+                    start_value = df_tipo['valor'].iloc[0]
+                    end_value = df_tipo['valor'].iloc[-1]
+                    crescimentos[tipo] = end_value - start_value
+                    crescimentos[f'{tipo}_percentual'] = (
+                        (end_value - start_value) / start_value * 100 if start_value != 0 else 0)
+                else:
+                    crescimentos[tipo] = 0
+                    crescimentos[f'{tipo}_percentual'] = 0
+            crescimento_df = pd.concat(
+                [crescimento_df, pd.DataFrame([{'influencer': influencer, **crescimentos}])],
+                ignore_index=True)
+    return crescimento_df
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--influencers", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--pontos", type=int, default=50, help="Coletas por influencer.")
+    parser.add_argument("--dias", type=int, default=30, help="Período analisado (agregados diários).")
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--limite-antigo", type=int, default=2000,
+                        help="Não roda o laço antigo acima deste número de influencers.")
+    parser.add_argument("--json", help="Grava o resultado neste arquivo.")
+    args = parser.parse_args(argv)
+
+    medicoes = {}
+    fim = date.today()
+    inicio = fim - timedelta(days=args.dias)
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.influencers:
+            caminho = os.path.join(tmp, f"bench_{n}.db")
+            gerar_banco(caminho, n * args.pontos, n, dias=args.dias)
+            conn = db.connect(caminho)
+            nomes = [f"@influencer{i}" for i in range(n)]
+            df_rollups = rollups.carregar_rollups(conn, USUARIO, nomes, inicio, fim, 'dia')
+
+            atual = medir(lambda: resumo_crescimento_rollups(df_rollups, nomes), args.repeticoes)
+            medicoes[f"{n}/rollups"] = {**atual, 'linhas': len(df_rollups)}
+            antigo = "(pulado)"
+            if n <= args.limite_antigo:
+                longo = db.snapshots_para_longo(db.carregar_snapshots(conn, USUARIO, nomes, inicio, fim))
+                medicoes[f"{n}/antigo"] = {**medir(lambda: resumo_antigo(longo, nomes), args.repeticoes),
+                                           'linhas': len(longo)}
+                antigo = f"{medicoes[f'{n}/antigo']['mediana_ms']:.1f} ms"
+            conn.close()
+            print(f"{n:>6} influencers: rollups {atual['mediana_ms']:.1f} ms ({len(df_rollups)} linhas), "
+                  f"antigo {antigo}")
+
+    if args.json:
+        gravar_resultado(args.json, "growth_summary", vars(args), medicoes)
+
+
+if __name__ == "__main__":
+    main()
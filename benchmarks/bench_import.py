@@ -0,0 +1,85 @@
+"""Tempo de importação a frio dos módulos do pacote e da primeira execução do app.
+
+Cada medição roda num processo Python novo, para não aproveitar módulos já
+carregados. Além do tempo, lista quais dependências pesadas (pandas,
+Playwright, Plotly...) a importação arrastou. A primeira execução do
+``app.py`` (tela de login) usa o ``AppTest`` do Streamlit com um banco
+temporário e não inclui a importação do próprio Streamlit.
+
+Uso::
+
+    python benchmarks/bench_import.py [--repeticoes 5] [--json saida.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+from comum import RAIZ, gravar_resultado
+
+MODULOS = ("app_tiktok.db", "app_tiktok.scraper", "app_tiktok.collector", "app_tiktok.workers",
+           "app_tiktok.analytics")
+PESADOS = ("pandas", "numpy", "pyarrow", "playwright", "requests", "plotly", "streamlit")
+
+_SCRIPT_MODULO = """
+import json, sys, time
+inicio = time.perf_counter()
+import {modulo}
+print(json.dumps([time.perf_counter() - inicio, [m for m in {pesados!r} if m in sys.modules]]))
+"""
+
+# O próprio AppTest já importa o Streamlit e o Plotly: só conta o que o app carregou a mais
+_SCRIPT_APP = """
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+antes = set(sys.modules)
+inicio = time.perf_counter()
+app = AppTest.from_file({app!r}, default_timeout=120)
+app.run()
+assert not app.exception, app.exception
+print(json.dumps([time.perf_counter() - inicio, [m for m in {pesados!r} if m in sys.modules and m not in antes]]))
+"""
+
+
+def _rodar(script, cwd):
+    saida = subprocess.run([sys.executable, "-c", script], cwd=cwd, capture_output=True, text=True,
+                           check=True, env={**os.environ, "PYTHONPATH": os.path.join(RAIZ, "src")})
+    return json.loads(saida.stdout.strip().splitlines()[-1])
+
+
+def medir(script, repeticoes, cwd):
+    tempos, pesados = [], []
+    for _ in range(repeticoes):
+        segundos, pesados = _rodar(script, cwd)
+        tempos.append(segundos * 1000)
+    return {'mediana_ms': statistics.median(tempos), 'min_ms': min(tempos), 'dependencias': pesados}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--sem-app", action="store_true", help="Não mede a primeira execução do app.")
+    parser.add_argument("--json", help="Grava o resultado neste arquivo.")
+    args = parser.parse_args(argv)
+
+    medicoes = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for modulo in MODULOS:
+            medicoes[modulo] = medir(_SCRIPT_MODULO.format(modulo=modulo, pesados=PESADOS), args.repeticoes, tmp)
+        if not args.sem_app:
+            # O app grava influencers.db no diretório atual: roda no temporário
+            script = _SCRIPT_APP.format(app=os.path.join(RAIZ, "app.py"), pesados=PESADOS)
+            medicoes["app.py (login)"] = medir(script, args.repeticoes, tmp)
+
+    for nome, r in medicoes.items():
+        print(f"{nome:>22}: mediana {r['mediana_ms']:.0f} ms, carrega {', '.join(r['dependencias']) or '-'}")
+
+    if args.json:
+        gravar_resultado(args.json, "import", vars(args), medicoes)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Custo de cada interação no painel depois de uma análise gerada.
+
+Usa o ``AppTest`` do Streamlit sobre um banco sintético (``sintetico.py``)
+para medir, por interação, o tempo de parede e a CPU da execução do
+script, o tempo da seção (fragmento) do widget e quantas consultas ao
+banco, transformações do pandas e serializações de gráficos ela disparou
+(contadas no ``metrics.registro``):
+
+- ``gerar_analise``: o clique em "Gerar Análise", que calcula e guarda a
+  análise na sessão. Antes dos fragmentos, qualquer outra interação
+  apagava os gráficos e este era o custo de voltar a vê-los;
+- ``trocar_escala``: só redesenha os gráficos a partir da sessão;
+- ``digitar_produto``: um widget da seção 3.
+
+O ``AppTest`` sempre reexecuta o script inteiro, como o painel fazia antes
+dos fragmentos; no servidor, trocar a escala ou digitar só reexecuta a
+própria seção, cujo tempo é o ``fragmento_ms``.
+
+Uso::
+
+    python benchmarks/bench_interacao.py [--linhas 200000 --influencers 100] [--selecionados 10] [--json saida.json]
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from datetime import timedelta
+
+from streamlit.testing.v1 import AppTest
+
+from comum import RAIZ, gravar_resultado
+from sintetico import USUARIO, gerar_banco
+from app_tiktok import metrics
+
+FASES = ('db_consulta', 'pandas_transformacao', 'grafico_serializacao')
+ESCALAS = ["Unidades", "Milhares (K)"]
+
+
+def _botao(app, rotulo):
+    return next(b for b in app.button if b.label == rotulo)
+
+
+def medir_interacao(app, acao, secao, repeticoes):
+    """Mediana de tempo/CPU por execução, tempo médio da ``secao`` e fases disparadas por ``acao(app, i)``."""
+    tempos, cpus, contagens, secao_s = [], [], {fase: 0 for fase in FASES}, 0.0
+    for i in range(repeticoes):
+        antes = metrics.registro.resumo()
+        inicio, cpu = time.perf_counter(), time.process_time()
+        acao(app, i).run()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+        cpus.append((time.process_time() - cpu) * 1000)
+        assert not app.exception, app.exception
+        depois = metrics.registro.resumo()
+        for fase in FASES:
+            contagens[fase] += depois.get(fase, {}).get('contagem', 0) - antes.get(fase, {}).get('contagem', 0)
+        secao_s += depois[secao]['soma'] - antes.get(secao, {}).get('soma', 0)
+    return {'mediana_ms': statistics.median(tempos), 'cpu_ms': statistics.median(cpus),
+            'fragmento_ms': secao_s * 1000 / repeticoes, **{fase: contagens[fase] / repeticoes for fase in FASES}}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--linhas", type=int, default=200_000)
+    parser.add_argument("--influencers", type=int, default=100)
+    parser.add_argument("--selecionados", type=int, default=10)
+    parser.add_argument("--dias", type=int, default=365, help="Período analisado.")
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--json", help="Grava o resultado neste arquivo.")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # O app abre influencers.db no diretório atual
+        gerar_banco(os.path.join(tmp, "influencers.db"), args.linhas, args.influencers)
+        diretorio = os.getcwd()
+        os.chdir(tmp)
+        try:
+            app = AppTest.from_file(os.path.join(RAIZ, "app.py"), default_timeout=300)
+            app.session_state['logged_in'] = True
+            app.session_state['usuario'] = USUARIO
+            app.run()
+            selecionados = [f"@influencer{i}" for i in range(min(args.selecionados, args.influencers))]
+            app.multiselect[0].set_value(selecionados)
+            app.date_input[0].set_value(app.date_input[1].value - timedelta(days=args.dias))
+            app.run()
+
+            medicoes = {
+                'gerar_analise': medir_interacao(app, lambda a, i: _botao(a, "Gerar Análise").click(),
+                                                 'secao_analise', args.repeticoes),
+                'trocar_escala': medir_interacao(app, lambda a, i: a.selectbox[0].select(ESCALAS[(i + 1) % 2]),
+                                                 'secao_analise', args.repeticoes),
+                'digitar_produto': medir_interacao(
+                    app, lambda a, i: next(t for t in a.text_input if t.label == "Nome do Produto").input(
+                        f"Produto {i}"), 'secao_produtos', args.repeticoes),
+            }
+        finally:
+            os.chdir(diretorio)
+
+    for nome, r in medicoes.items():
+        print(f"{nome:>16}: script {r['mediana_ms']:.0f} ms (CPU {r['cpu_ms']:.0f} ms), "
+              f"fragmento {r['fragmento_ms']:.0f} ms; por interação "
+              + ", ".join(f"{fase} {r[fase]:.1f}" for fase in FASES))
+
+    if args.json:
+        gravar_resultado(args.json, "interacao", vars(args), medicoes)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Compara tempo e tráfego por perfil com e sem o carregamento enxuto.
+
+Uso::
+
+    python benchmarks/bench_lean_loading.py usuario1 usuario2 ... [--repeticoes 1] [--json saida.json]
+
+O caminho rápido por HTTP é desligado para que todos os perfis passem pelo
+navegador nos dois modos.
+Cada modo roda um lote de aquecimento, descartado, antes dos medidos.
+"""
+import argparse
+import statistics
+
+from comum import gravar_resultado, medir
+from app_tiktok.scraper import scrape_profiles
+
+
+def coletar(usernames, lean, concurrency, repeticoes):
+    """Tempo do lote (``comum.medir``) e medianas por perfil das execuções medidas."""
+    lotes = []
+    tempo = medir(lambda: lotes.append(scrape_profiles(usernames, concurrency=concurrency, fast_path=False,
+                                                       lean=lean)), repeticoes)
+    # O primeiro lote é o aquecimento (navegador, DNS) e fica de fora
+    stats = [s for lote in lotes[1:] for s in lote.stats.values()]
+    return {
+        **tempo,
+        'perfis': len(stats),
+        'erros': sum(len(lote.errors) for lote in lotes[1:]),
+        'segundos_mediana': statistics.median(s['segundos'] for s in stats) if stats else None,
+        'bytes_mediana': statistics.median(s['bytes'] for s in stats) if stats else None,
+        'requisicoes_mediana': statistics.median(s['requisicoes'] for s in stats) if stats else None,
+        'bloqueadas_total': sum(s['bloqueadas'] for s in stats),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("usernames", nargs="+")
+    parser.add_argument("--concorrencia", type=int, default=2)
+    parser.add_argument("--repeticoes", type=int, default=1, help="Lotes medidos por modo, além do aquecimento.")
+    parser.add_argument("--json", help="Grava o resultado neste arquivo.")
+    args = parser.parse_args(argv)
+
+    medicoes = {modo: coletar(args.usernames, lean, args.concorrencia, args.repeticoes)
+                for modo, lean in (('completo', False), ('enxuto', True))}
+    for modo, r in medicoes.items():
+        print(f"{modo:>9}: lote {r['mediana_ms'] / 1000:.1f}s, {r['perfis']} perfis, {r['erros']} erros, "
+              f"mediana {r['segundos_mediana']}s / {r['bytes_mediana']} bytes / "
+              f"{r['requisicoes_mediana']} requisições, {r['bloqueadas_total']} bloqueadas")
+
+    if args.json:
+        gravar_resultado(args.json, "lean_loading", vars(args), medicoes)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""Memória retida por uma sessão do painel ao gerar a análise, antes e depois dos tipos compactos.
+
+Para cada escala (banco sintético de ``sintetico.py``), quantidade de
+influencers selecionados e período, reproduz os DataFrames que uma
+execução de "Gerar Análise" mantém vivos até o fim do script:
+
+- ``anterior``: colunas de texto comuns, números em 64 bits, filtros
+  booleanos (cópias) e as colunas de escala (``valor_escala``,
+  ``live_visualizacoes_k``) gravadas no DataFrame;
+- ``compacta``: o caminho atual, com ``category``, inteiros reduzidos,
+  ``tipos.fatia`` (visões) e escala aplicada só na hora do gráfico.
+
+A memória é a alocada pelo Python/NumPy (``tracemalloc``) mais a do
+Arrow (colunas de texto do pandas), medida com os DataFrames ainda
+referenciados. Figuras não entram: são descartadas após a serialização.
+
+Uso::
+
+    python benchmarks/bench_memoria.py --escalas 10000:10 1000000:1000 [--selecionados 5 50] [--json saida.json]
+"""
+import argparse
+import gc
+import os
+import tempfile
+import tracemalloc
+from datetime import date, timedelta
+
+import pyarrow as pa
+
+from comum import gravar_resultado
+from sintetico import USUARIO, gerar_banco
+from app_tiktok import db, rollups
+from app_tiktok.analytics import (engajamento_rollups, lives_rollups, resumo_crescimento_rollups, serie_rollups,
+                                  variacao_rollups)
+from app_tiktok.downsample import reduzir_series
+from app_tiktok.tipos import fatia
+
+ESCALA = 1000
+
+
+def _rollups(conn, selecionados, data_inicio, data_fim, compacto):
+    granularidade = rollups.escolher_granularidade(data_inicio, data_fim)
+    df = rollups.carregar_rollups(conn, USUARIO, selecionados, data_inicio, data_fim, granularidade, compacto)
+    diario = df if granularidade == 'dia' else rollups.carregar_rollups(
+        conn, USUARIO, selecionados, data_inicio, data_fim, 'dia', compacto)
+    return df, diario
+
+
+def sessao_anterior(conn, selecionados, data_inicio, data_fim):
+    df_rollups, df_diario = _rollups(conn, selecionados, data_inicio, data_fim, compacto=False)
+    df = serie_rollups(df_rollups)
+    df['valor_escala'] = df['valor'] / ESCALA
+    metricas = reduzir_series(df[df['tipo'].isin(['seguidores', 'curtidas', 'visualizacoes'])], 'data',
+                              'valor_escala', ['influencer', 'tipo'])
+    ganhos = reduzir_series(df[df['tipo'] == 'ganhos'], 'data', 'valor_escala', ['influencer'])
+    df_lives, por_mes = lives_rollups(df_rollups)
+    if not df_lives.empty:
+        df_lives['live_visualizacoes_k'] = df_lives['live_visualizacoes'] / 1000
+        df_lives = reduzir_series(df_lives, 'data', 'live_visualizacoes_k', ['influencer'])
+    return [df_rollups, df_diario, df, metricas, ganhos, variacao_rollups(df_diario),
+            resumo_crescimento_rollups(df_rollups, selecionados), engajamento_rollups(df_rollups), df_lives, por_mes]
+
+
+def sessao_compacta(conn, selecionados, data_inicio, data_fim):
+    df_rollups, df_diario = _rollups(conn, selecionados, data_inicio, data_fim, compacto=True)
+    df = serie_rollups(df_rollups)
+    # Como em ``analise.gerar_analise``: as séries dos agregados já cabem no gráfico e não são reduzidas
+    metricas = fatia(df, 'tipo', ['seguidores', 'curtidas', 'visualizacoes'])
+    ganhos = fatia(df, 'tipo', ['ganhos'])
+    df_lives, por_mes = lives_rollups(df_rollups)
+    return [df_rollups, df_diario, df, metricas, ganhos, variacao_rollups(df_diario),
+            resumo_crescimento_rollups(df_rollups, selecionados), engajamento_rollups(df_rollups), df_lives, por_mes]
+
+
+def memoria_retida(sessao, *args):
+    """MB retidos pelos DataFrames da sessão e pico durante a execução."""
+    gc.collect()
+    arrow_antes = pa.total_allocated_bytes()
+    tracemalloc.start()
+    try:
+        frames = sessao(*args)
+        gc.collect()
+        atual, pico = tracemalloc.get_traced_memory()
+        arrow = pa.total_allocated_bytes() - arrow_antes
+    finally:
+        tracemalloc.stop()
+    linhas = len(frames[0])
+    del frames
+    return {'retida_mb': (atual + arrow) / 2 ** 20, 'pico_mb': (pico + arrow) / 2 ** 20, 'linhas_rollups': linhas}
+
+
+def medir_banco(caminho, influencers, selecionados, periodos):
+    conn = db.connect(caminho)
+    fim = date.today()
+    medicoes = {}
+    for n in selecionados:
+        escolhidos = [f"@influencer{i}" for i in range(min(n, influencers or n))]
+        for dias in periodos:
+            inicio = fim - timedelta(days=dias)
+            antes = memoria_retida(sessao_anterior, conn, escolhidos, inicio, fim)
+            depois = memoria_retida(sessao_compacta, conn, escolhidos, inicio, fim)
+            medicoes[f"{len(escolhidos)}sel/{dias}d"] = {
+                'anterior_mb': antes['retida_mb'], 'compacta_mb': depois['retida_mb'],
+                'anterior_pico_mb': antes['pico_mb'], 'compacta_pico_mb': depois['pico_mb'],
+                'reducao': 1 - depois['retida_mb'] / antes['retida_mb'] if antes['retida_mb'] else 0.0,
+                'linhas_rollups': antes['linhas_rollups'],
+            }
+    conn.close()
+    return medicoes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--escalas", nargs="+", default=["10000:10", "1000000:1000"],
+                        help="linhas:influencers de cada banco gerado.")
+    parser.add_argument("--banco", help="Usa este banco em vez de gerar um.")
+    parser.add_argument("--selecionados", type=int, nargs="+", default=[5, 50],
+                        help="Influencers escolhidos na análise.")
+    parser.add_argument("--periodo", type=int, nargs="+", default=[30, 365], help="Dias analisados.")
+    parser.add_argument("--json", help="Grava o resultado neste arquivo.")
+    args = parser.parse_args(argv)
+
+    medicoes = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.banco:
+            bancos = [(os.path.basename(args.banco), args.banco, None)]
+        else:
+            bancos = []
+            for escala in args.escalas:
+                linhas, influencers = map(int, escala.split(':'))
+                caminho = os.path.join(tmp, f"bench_{linhas}_{influencers}.db")
+                carga = gerar_banco(caminho, linhas, influencers)
+                print(f"{escala}: banco gerado em {carga['carga_segundos']:.1f}s")
+                bancos.append((escala, caminho, influencers))
+
+        for escala, caminho, influencers in bancos:
+            for nome, r in medir_banco(caminho, influencers, args.selecionados, args.periodo).items():
+                medicoes[f"{escala}/{nome}"] = r
+                print(f"{escala:>14} {nome:>12}: {r['anterior_mb']:8.2f} MB -> {r['compacta_mb']:8.2f} MB "
+                      f"({r['reducao']:.0%} menos; pico {r['anterior_pico_mb']:.2f} -> {r['compacta_pico_mb']:.2f} MB, "
+                      f"{r['linhas_rollups']} linhas de agregados)")
+
+    if args.json:
+        gravar_resultado(args.json, "memoria", vars(args), medicoes)
+
+
+if __name__ == "__main__":
+    main()
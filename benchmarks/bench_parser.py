@@ -0,0 +1,102 @@
+"""Conversão de contadores: função antiga vs. ``convert_to_int`` vs. ``convert_series_to_int``.
+
+Antes de cronometrar, confere propriedades em textos gerados aleatoriamente
+(números formatados em en-US e pt-BR, com e sem sufixo): a versão nova deve
+devolver o valor original, e a vetorizada deve concordar com a escalar. A
+divergência da função antiga é reportada, não tratada como falha.
+
+Uso::
+
+    python benchmarks/bench_parser.py --textos 10000 100000 [--json saida.json]
+"""
+import argparse
+import random
+
+import pandas as pd
+
+from comum import gravar_resultado, medir
+from app_tiktok.parsing import convert_series_to_int, convert_to_int
+
+SUFIXOS = [(10 ** 3, ['K', 'k', ' mil']), (10 ** 6, ['M', 'm', ' mi']), (10 ** 9, ['B', ' bi'])]
+
+
+def convert_to_int_antigo(text):
+    """Cópia da função que o app usava antes."""
+    text = text.replace(',', '').replace('.', '')
+    if 'K' in text:
+        return int(float(text.replace('K', '')) * 1000)
+    elif 'M' in text:
+        return int(float(text.replace('M', '')) * 1000000)
+    elif 'B' in text:
+        return int(float(text.replace('B', '')) * 1000000000)
+    else:
+        try:
+            return int(text)
+        except:
+            return 0
+
+
+def _agrupar(inteiro, separador):
+    return f"{inteiro:,}".replace(',', separador)
+
+
+def gerar(n, semente=42):
+    """Lista de (texto, valor esperado) no estilo do TikTok."""
+    rng = random.Random(semente)
+    casos = []
+    for _ in range(n):
+        pt_br = rng.random() < 0.5
+        decimal, milhar = (',', '.') if pt_br else ('.', ',')
+        if rng.random() < 0.4:
+            valor = rng.randrange(0, 10_000_000)
+            texto = _agrupar(valor, milhar) if rng.random() < 0.7 else str(valor)
+        else:
+            base, sufixos = rng.choice(SUFIXOS)
+            inteiro, decimos = rng.randrange(1, 1000), rng.randrange(0, 10)
+            valor = (inteiro * 10 + decimos) * base // 10
+            numero = f"{inteiro}{decimal}{decimos}" if decimos else str(inteiro)
+            texto = numero + rng.choice(sufixos)
+        casos.append((texto, valor))
+    return casos
+
+
+def verificar(casos):
+    """Confere as propriedades; retorna quantos textos a função antiga erra."""
+    textos = [t for t, _ in casos]
+    vetorizado = convert_series_to_int(pd.Series(textos)).tolist()
+    erros_antigo = 0
+    for (texto, esperado), vet in zip(casos, vetorizado):
+        assert convert_to_int(texto) == esperado, (texto, convert_to_int(texto), esperado)
+        assert vet == esperado, (texto, vet, esperado)
+        erros_antigo += convert_to_int_antigo(texto) != esperado
+    return erros_antigo
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--textos", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--json", help="Grava o resultado neste arquivo.")
+    args = parser.parse_args(argv)
+
+    medicoes = {}
+    for n in args.textos:
+        casos = gerar(n)
+        erros_antigo = verificar(casos)
+        textos = [t for t, _ in casos]
+        serie = pd.Series(textos)
+
+        antigo = medicoes[f"{n}/antigo"] = {
+            **medir(lambda: [convert_to_int_antigo(t) for t in textos], args.repeticoes),
+            'errados': int(erros_antigo)}
+        escalar = medicoes[f"{n}/escalar"] = medir(lambda: [convert_to_int(t) for t in textos], args.repeticoes)
+        vetorizado = medicoes[f"{n}/vetorizado"] = medir(lambda: convert_series_to_int(serie), args.repeticoes)
+        print(f"{n:>8} textos: antigo {antigo['mediana_ms']:.0f} ms ({erros_antigo} errados), "
+              f"escalar {escalar['mediana_ms']:.0f} ms, vetorizado {vetorizado['mediana_ms']:.0f} ms")
+
+    if args.json:
+        gravar_resultado(args.json, "parser", vars(args), medicoes)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Tempo das consultas e transformações de "Gerar Análise" e de ``get_produtos_ganhados``.
+
+Gera um banco sintético (``sintetico.py``) para cada escala pedida e
+chama, fora do Streamlit e sem o cache de consultas, a mesma
+``analise.gerar_analise`` do app (leitura dos agregados, transformações do
+pandas e redução das séries), separando o tempo das fases registradas em
+``metrics``; depois monta e serializa as figuras de evolução e variação a
+partir do resultado. Mede também a consulta de produtos com a formatação
+de datas feita antes de exibi-los.
+
+Uso::
+
+    python benchmarks/bench_pipelines.py --escalas 10000:10 1000000:1000 [--periodo 30 365] [--json saida.json]
+
+Cada escala é ``linhas:influencers``. Com ``--banco`` um banco já gerado é
+reaproveitado em vez de criar um temporário.
+"""
+import argparse
+import os
+import tempfile
+from datetime import date, timedelta
+
+import pandas as pd
+import plotly.express as px
+
+from comum import gravar_resultado, medir
+from sintetico import USUARIO, gerar_banco
+from app_tiktok import db, metrics
+from app_tiktok.analise import gerar_analise
+
+FASES = ('db_consulta', 'pandas_transformacao')
+
+
+def medir_analise(conn, selecionados, data_inicio, data_fim, repeticoes):
+    """Mediana de ``gerar_analise``, média por execução de cada fase de ``FASES`` e das figuras."""
+    estado = {}
+
+    def analise():
+        estado['analise'] = gerar_analise(conn, USUARIO, selecionados, data_inicio, data_fim)
+
+    antes = metrics.registro.resumo()
+    medicoes = {'gerar_analise': medir(analise, repeticoes)}
+    depois = metrics.registro.resumo()
+    for fase in FASES:
+        soma = depois.get(fase, {}).get('soma', 0) - antes.get(fase, {}).get('soma', 0)
+        execucoes = depois.get(fase, {}).get('contagem', 0) - antes.get(fase, {}).get('contagem', 0)
+        # medir() faz uma execução de aquecimento além das repetições
+        medicoes[fase] = {'media_ms': soma * 1000 / (repeticoes + 1), 'execucoes': execucoes / (repeticoes + 1)}
+
+    def graficos():
+        resultado = estado['analise']
+        fig = px.line(resultado['metricas'].assign(valor_escala=lambda d: d['valor'] / 1000), x='data',
+                      y='valor_escala', color='influencer', line_dash='tipo')
+        fig.to_json()
+        fig = px.bar(resultado['variacao'], x='data', y='variacao', color='influencer', barmode='group',
+                     facet_col='metrica')
+        fig.to_json()
+
+    if estado['analise'] is not None:
+        medicoes['graficos_json'] = medir(graficos, repeticoes)
+    return medicoes
+
+
+def pipeline_produtos(conn, selecionados, data_inicio, data_fim):
+    def produtos():
+        df = db.carregar_produtos(conn, selecionados, data_inicio, data_fim).drop(columns='id')
+        df['data'] = pd.to_datetime(df['data']).dt.strftime('%Y-%m-%d %H:%M:%S')
+    return produtos
+
+
+def medir_banco(caminho, selecionados, periodos, repeticoes):
+    conn = db.connect(caminho)
+    fim = date.today()
+    medicoes = {}
+    for dias in periodos:
+        inicio = fim - timedelta(days=dias)
+        for nome, r in medir_analise(conn, selecionados, inicio, fim, repeticoes).items():
+            medicoes[f"{dias}d/{nome}"] = r
+        medicoes[f"{dias}d/get_produtos_ganhados"] = medir(pipeline_produtos(conn, selecionados, inicio, fim),
+                                                           repeticoes)
+    conn.close()
+    return medicoes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--escalas", nargs="+", default=["10000:10", "1000000:1000"],
+                        help="linhas:influencers de cada banco gerado.")
+    parser.add_argument("--banco", help="Usa este banco em vez de gerar um.")
+    parser.add_argument("--selecionados", type=int, default=5, help="Influencers escolhidos na análise.")
+    parser.add_argument("--periodo", type=int, nargs="+", default=[30, 365], help="Dias analisados.")
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--json", help="Grava o resultado neste arquivo.")
+    args = parser.parse_args(argv)
+
+    medicoes = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.banco:
+            bancos = [(os.path.basename(args.banco), args.banco, None)]
+        else:
+            bancos = []
+            for escala in args.escalas:
+                linhas, influencers = map(int, escala.split(':'))
+                caminho = os.path.join(tmp, f"bench_{linhas}_{influencers}.db")
+                carga = gerar_banco(caminho, linhas, influencers)
+                print(f"{escala}: banco gerado em {carga['carga_segundos']:.1f}s")
+                bancos.append((escala, caminho, influencers))
+
+        for escala, caminho, influencers in bancos:
+            n = args.selecionados if influencers is None else min(args.selecionados, influencers)
+            selecionados = [f"@influencer{i}" for i in range(n)]
+            for nome, r in medir_banco(caminho, selecionados, args.periodo, args.repeticoes).items():
+                medicoes[f"{escala}/{nome}"] = r
+                tipo = 'mediana' if 'mediana_ms' in r else 'média'
+                print(f"{escala:>14} {nome:>32}: {tipo} {r.get('mediana_ms', r.get('media_ms')):.2f} ms")
+
+    if args.json:
+        gravar_resultado(args.json, "pipelines", vars(args), medicoes)
+
+
+if __name__ == "__main__":
+    main()
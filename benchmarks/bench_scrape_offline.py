@@ -0,0 +1,143 @@
+"""Vazão do caminho rápido de scraping contra páginas salvas, sem acessar o TikTok.
+
+Sobe um servidor HTTP local que responde ``/@<perfil>`` com uma das páginas
+de ``benchmarks/fixtures`` (escolhida pelo perfil), trocando
+``__USERNAME__`` pelo nome pedido e ``<!--PREENCHIMENTO-->`` por um bloco
+de ``--preenchimento-kb`` para imitar o peso da página real. Para usar uma
+página salva do TikTok, grave-a lá como ``perfil_<algo>.html`` com o nome
+do perfil trocado por ``__USERNAME__``. Perfis inexistentes
+(``PerfilInexistenteError``) são respostas válidas, não erros.
+
+Mede ``parse_profile_html`` isolado e ``fetch_profile_http`` (download +
+parse, sessão compartilhada) em cada nível de concorrência.
+
+Uso::
+
+    python benchmarks/bench_scrape_offline.py --perfis 500 --concorrencia 1 4 16 [--latencia-ms 50] [--json saida.json]
+"""
+import argparse
+import glob
+import os
+import statistics
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from comum import gravar_resultado, medir
+from app_tiktok.http_fetch import fetch_profile_http, get_session, parse_profile_html
+from app_tiktok.resilience import PerfilInexistenteError
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def carregar_fixtures(preenchimento_kb):
+    preenchimento = "<!--" + "x" * (preenchimento_kb * 1024) + "-->"
+    paginas = []
+    for caminho in sorted(glob.glob(os.path.join(FIXTURES, "perfil_*.html"))):
+        with open(caminho, encoding="utf-8") as f:
+            html = f.read().replace("<!--PREENCHIMENTO-->", preenchimento)
+        paginas.append((os.path.basename(caminho), html))
+    return paginas
+
+
+def pagina_do_perfil(paginas, username):
+    nome, html = paginas[zlib.crc32(username.encode()) % len(paginas)]
+    return nome, html.replace("__USERNAME__", username)
+
+
+def servidor(paginas, latencia_ms):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, como no TikTok
+
+        def do_GET(self):
+            if latencia_ms:
+                time.sleep(latencia_ms / 1000)
+            corpo = pagina_do_perfil(paginas, self.path.lstrip('/').lstrip('@'))[1].encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(corpo)))
+            self.end_headers()
+            self.wfile.write(corpo)
+
+        def log_message(self, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    httpd.daemon_threads = True
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    return httpd
+
+
+def buscar_todos(usernames, url_template, concorrencia):
+    """Busca os perfis; retorna (segundos totais, latências em ms, erros inesperados)."""
+    session = get_session()
+    latencias, erros = [], 0
+
+    def um(username):
+        nonlocal erros
+        inicio = time.perf_counter()
+        try:
+            fetch_profile_http(username, session=session, url_template=url_template)
+        except PerfilInexistenteError:
+            pass
+        except Exception:
+            erros += 1
+        latencias.append((time.perf_counter() - inicio) * 1000)
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(concorrencia) as executor:
+        list(executor.map(um, usernames))
+    return time.perf_counter() - inicio, latencias, erros
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--perfis", type=int, default=500)
+    parser.add_argument("--concorrencia", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--latencia-ms", type=int, default=0, help="Atraso simulado por resposta.")
+    parser.add_argument("--preenchimento-kb", type=int, default=250)
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--json", help="Grava o resultado neste arquivo.")
+    args = parser.parse_args(argv)
+
+    paginas = carregar_fixtures(args.preenchimento_kb)
+    usernames = [f"perfil{i}" for i in range(args.perfis)]
+    medicoes = {}
+
+    for nome, modelo in paginas:
+        html = modelo.replace("__USERNAME__", "perfil")
+
+        def parse():
+            try:
+                parse_profile_html(html, "perfil")
+            except PerfilInexistenteError:
+                pass
+
+        r = medicoes[f"parse/{nome}"] = medir(parse, args.repeticoes * 20)
+        print(f"{'parse ' + nome:>40}: mediana {r['mediana_ms']:.3f} ms")
+
+    httpd = servidor(paginas, args.latencia_ms)
+    url_template = f"http://127.0.0.1:{httpd.server_port}/@{{username}}"
+    try:
+        buscar_todos(usernames[:10], url_template, 1)  # aquecimento das conexões
+        for concorrencia in args.concorrencia:
+            segundos, latencias, erros = buscar_todos(usernames, url_template, concorrencia)
+            r = medicoes[f"http/concorrencia_{concorrencia}"] = {
+                'perfis_por_segundo': len(usernames) / segundos,
+                'mediana_ms': statistics.median(latencias),
+                'p95_ms': statistics.quantiles(latencias, n=20)[-1],
+                'erros': erros,
+            }
+            print(f"{'http concorrência ' + str(concorrencia):>40}: {r['perfis_por_segundo']:.1f} perfis/s, "
+                  f"mediana {r['mediana_ms']:.2f} ms, p95 {r['p95_ms']:.2f} ms, {erros} erros")
+    finally:
+        httpd.shutdown()
+
+    if args.json:
+        gravar_resultado(args.json, "scrape_offline", vars(args), medicoes)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Compara dois resultados JSON dos benchmarks e aponta regressões.
+
+Medições em ``*_ms`` são melhores quanto menores; ``perfis_por_segundo``,
+quanto maior. Uma medição piorou quando passou da ``--tolerancia``. Sai
+com código 1 se houver regressão, para uso em CI.
+
+Uso::
+
+    python benchmarks/comparar.py base.json novo.json [--tolerancia 0.15] [--campo mediana_ms]
+"""
+import argparse
+import json
+import sys
+
+MAIOR_MELHOR = ('perfis_por_segundo',)
+
+
+def comparar(base, novo, campos, tolerancia):
+    """Lista de (medição, campo, valor base, valor novo, variação relativa, regrediu)."""
+    linhas = []
+    for nome, medicao in novo['medicoes'].items():
+        anterior = base['medicoes'].get(nome)
+        if anterior is None:
+            continue
+        for campo in campos:
+            if campo not in medicao or not anterior.get(campo):
+                continue
+            variacao = medicao[campo] / anterior[campo] - 1
+            piora = -variacao if campo in MAIOR_MELHOR else variacao
+            linhas.append((nome, campo, anterior[campo], medicao[campo], variacao, piora > tolerancia))
+    return linhas
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("base")
+    parser.add_argument("novo")
+    parser.add_argument("--tolerancia", type=float, default=0.15, help="Piora relativa aceita (0.15 = 15%%).")
+    parser.add_argument("--campo", nargs="+", default=['mediana_ms', 'perfis_por_segundo'])
+    args = parser.parse_args(argv)
+
+    with open(args.base, encoding="utf-8") as f:
+        base = json.load(f)
+    with open(args.novo, encoding="utf-8") as f:
+        novo = json.load(f)
+    if base.get('benchmark') != novo.get('benchmark'):
+        parser.error(f"Benchmarks diferentes: {base.get('benchmark')} e {novo.get('benchmark')}.")
+
+    linhas = comparar(base, novo, args.campo, args.tolerancia)
+    for nome, campo, antes, depois, variacao, regrediu in linhas:
+        marca = "REGRESSÃO" if regrediu else ""
+        print(f"{nome:>48} {campo:>18}: {antes:12.3f} -> {depois:12.3f} ({variacao:+.1%}) {marca}")
+    regressoes = sum(regrediu for *_, regrediu in linhas)
+    print(f"{len(linhas)} medições comparadas, {regressoes} regressões "
+          f"({base['metadados'].get('commit')} -> {novo['metadados'].get('commit')})")
+    sys.exit(1 if regressoes else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""Funções compartilhadas pelos benchmarks: cronometragem e resultado em JSON.
+
+Todo resultado gravado com ``gravar_resultado`` traz os metadados da
+execução (commit, Python, máquina, parâmetros), para que
+``comparar.py`` possa confrontar execuções feitas em momentos diferentes.
+"""
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(RAIZ, "src"))
+
+
+def medir(func, repeticoes=5, aquecimento=1):
+    """Mediana, mínimo e máximo (ms) de ``func()`` após ``aquecimento`` execuções descartadas."""
+    for _ in range(aquecimento):
+        func()
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        func()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return {'mediana_ms': statistics.median(tempos), 'min_ms': min(tempos), 'max_ms': max(tempos)}
+
+
+def _commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=RAIZ, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def metadados(parametros):
+    return {
+        'quando': datetime.now().isoformat(timespec='seconds'),
+        'commit': _commit(),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'cpus': os.cpu_count(),
+        'parametros': parametros,
+    }
+
+
+def gravar_resultado(caminho, benchmark, parametros, medicoes):
+    """Grava {benchmark, metadados, medicoes} em JSON; ``medicoes`` é nome -> dicionário de números."""
+    with open(caminho, "w", encoding="utf-8") as f:
+        json.dump({'benchmark': benchmark, 'metadados': metadados(parametros), 'medicoes': medicoes},
+                  f, indent=2, ensure_ascii=False)
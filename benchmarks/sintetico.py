@@ -0,0 +1,125 @@
+"""Gerador de bancos sintéticos para os benchmarks.
+
+Cria um banco com o esquema do app (``db.criar_tabelas``) e preenche
+``snapshots`` (a tabela que substituiu ``historico``; com ``--historico``
+as mesmas coletas também são gravadas no formato longo antigo) e
+``produtos_live``. As coletas de cada influencer ficam espalhadas
+uniformemente pelos últimos ``dias``, com contadores crescentes e lives
+ocasionais. Os agregados (``rollups``) são recalculados de uma vez no fim,
+em vez de linha a linha pelos gatilhos. A mesma semente gera sempre o
+mesmo banco.
+
+Uso::
+
+    python benchmarks/sintetico.py bench.db --linhas 1000000 --influencers 1000 [--produtos 10000]
+"""
+import argparse
+import os
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+import comum  # noqa: F401  (coloca src/ no sys.path)
+from app_tiktok import db, rollups
+
+USUARIO = "admin"
+LOTE = 100_000
+PRODUTOS = ["Kit de maquiagem", "Fone de ouvido", "Tênis", "Perfume", "Smartwatch", "Camiseta"]
+
+
+def _coletas(linhas, influencers, dias, rng):
+    """Lotes de tuplas de ``snapshots``, na ordem de gravação (por data)."""
+    por_influencer = max(1, linhas // influencers)
+    passo = dias * 86400 / por_influencer
+    inicio = datetime.now().replace(microsecond=0) - timedelta(days=dias)
+    base = rng.integers(1_000, 5_000_000, influencers)
+    crescimento = rng.integers(1, 200, influencers)
+
+    for comeco in range(0, por_influencer * influencers, LOTE):
+        i = np.arange(comeco, min(comeco + LOTE, por_influencer * influencers))
+        n, k = i % influencers, i // influencers
+        seguidores = base[n] + k * crescimento[n] + rng.integers(0, 50, len(i))
+        curtidas = seguidores * rng.integers(5, 20, len(i))
+        em_live = rng.random(len(i)) < 0.05
+        live_visualizacoes = np.where(em_live, rng.integers(10, 50_000, len(i)), 0)
+        live_curtidas = live_visualizacoes * np.where(em_live, rng.integers(1, 30, len(i)), 0)
+        # O deslocamento de n segundos evita datas repetidas quando o passo é menor que 1s
+        segundos = (k * passo).astype(np.int64) + n
+        datas = (np.datetime64(inicio, 's') + segundos.astype('timedelta64[s]')).astype(str)
+        yield [(USUARIO, f"@influencer{a}", d.replace('T', ' '), 'Sintético', int(s), int(c), int(c),
+                float(c) * 0.01, None, int(lc), int(lv))
+               for a, d, s, c, lc, lv in zip(n, datas, seguidores, curtidas, live_curtidas, live_visualizacoes)]
+
+
+def gerar_banco(caminho, linhas, influencers, dias=365, produtos=None, historico=False, semente=42):
+    """Cria ``caminho`` com os dados sintéticos; retorna contagens e tempo de carga."""
+    influencers = max(1, min(influencers, linhas))
+    produtos = linhas // 100 if produtos is None else produtos
+    rng = np.random.default_rng(semente)
+    inicio = time.perf_counter()
+
+    conn = db.connect(caminho)
+    cursor = conn.cursor()
+    db.criar_tabelas(cursor)
+    cursor.execute("DROP TRIGGER IF EXISTS trg_rollups_insert")
+    cursor.execute("DROP TRIGGER IF EXISTS trg_rollups_update")
+    conn.commit()
+
+    total = 0
+    with conn:
+        for lote in _coletas(linhas, influencers, dias, rng):
+            conn.executemany("""
+            INSERT OR IGNORE INTO snapshots (usuario, influencer, data, metodo, seguidores, curtidas,
+                                             visualizacoes, ganhos, videos, live_curtidas, live_visualizacoes)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, lote)
+            if historico:
+                conn.executemany("""
+                INSERT INTO historico (usuario, influencer, tipo, valor, data, metodo, ganhos,
+                                       live_curtidas, live_visualizacoes)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, [(u, i, tipo, valor, d, m, valor * 0.01, lc, lv)
+                      for u, i, d, m, s, c, v, g, _, lc, lv in lote
+                      for tipo, valor in (('seguidores', s), ('curtidas', c), ('visualizacoes', v),
+                                          ('ganhos', g))])
+            total += len(lote)
+
+        agora = datetime.now()
+        datas = [agora - timedelta(seconds=int(s)) for s in rng.integers(0, dias * 86400, produtos)]
+        conn.executemany("""
+        INSERT INTO produtos_live (influencer, nome_produto, valor_estimado, data) VALUES (?, ?, ?, ?)
+        """, [(f"@influencer{n}", PRODUTOS[p], round(float(v), 2), d.strftime(db.DATE_FORMAT))
+              for n, p, v, d in zip(rng.integers(0, influencers, produtos),
+                                    rng.integers(0, len(PRODUTOS), produtos),
+                                    rng.uniform(10, 2000, produtos), datas)])
+
+        rollups.reconstruir_rollups(cursor)
+        rollups.criar_rollups(cursor)
+    conn.execute("PRAGMA optimize")
+    conn.close()
+    return {'snapshots': total, 'influencers': influencers, 'produtos': produtos,
+            'carga_segundos': time.perf_counter() - inicio}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("caminho")
+    parser.add_argument("--linhas", type=int, default=100_000, help="Coletas em snapshots (1k a 10M).")
+    parser.add_argument("--influencers", type=int, default=100, help="10 a 10k.")
+    parser.add_argument("--dias", type=int, default=365)
+    parser.add_argument("--produtos", type=int, help="Padrão: 1%% das coletas.")
+    parser.add_argument("--historico", action="store_true", help="Grava também a tabela legada.")
+    parser.add_argument("--semente", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    if os.path.exists(args.caminho):
+        parser.error(f"{args.caminho} já existe.")
+    r = gerar_banco(args.caminho, args.linhas, args.influencers, args.dias, args.produtos, args.historico,
+                    args.semente)
+    print(f"{r['snapshots']} coletas de {r['influencers']} influencers e {r['produtos']} produtos "
+          f"em {r['carga_segundos']:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
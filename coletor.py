@@ -0,0 +1,10 @@
+"""Ponto de entrada do coletor agendado (ver ``app_tiktok.collector``)."""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "src"))
+
+from app_tiktok.collector import main
+
+if __name__ == "__main__":
+    main()
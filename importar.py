@@ -0,0 +1,10 @@
+"""Ponto de entrada da importação em massa (ver ``app_tiktok.ingest``)."""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "src"))
+
+from app_tiktok.ingest import main
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+"""Núcleo do monitor de influencers do TikTok (scraping, banco e análises)."""
@@ -0,0 +1,58 @@
+"""Dados de "Gerar Análise" do painel, sem o Streamlit.
+
+``gerar_analise`` faz as consultas e transformações e devolve os
+DataFrames de cada gráfico; o app guarda o resultado na sessão e só monta
+as figuras. Os benchmarks chamam a mesma função, sem o cache de consultas.
+"""
+from . import db, metrics, rollups
+from .analytics import (engajamento_rollups, lives_rollups, resumo_crescimento_rollups, serie_rollups,
+                        variacao_rollups)
+from .downsample import reduzir_series
+from .tipos import fatia
+
+
+def gerar_analise(conn, usuario, influencers, data_inicio, data_fim, resolucao_completa=False,
+                  carregar_rollups=rollups.carregar_rollups):
+    """Consultas e transformações da análise; None quando não há dados no período.
+
+    ``carregar_rollups`` tem a assinatura de ``rollups.carregar_rollups``
+    (o painel passa ``cache.carregar_rollups``). A escala dos gráficos não
+    entra aqui, então trocá-la só refaz as figuras. ``resolucao_completa``
+    desliga a redução da série por minuto das lives.
+    """
+    granularidade = rollups.escolher_granularidade(data_inicio, data_fim)
+    df_rollups = carregar_rollups(conn, usuario, influencers, data_inicio, data_fim, granularidade)
+    if df_rollups.empty:
+        return None
+    # A variação é sempre diária, mesmo quando a série usa agregados mensais
+    df_diario = df_rollups if granularidade == 'dia' else carregar_rollups(
+        conn, usuario, influencers, data_inicio, data_fim, 'dia')
+
+    with metrics.medir('pandas_transformacao'):
+        df = serie_rollups(df_rollups)
+        if granularidade == 'dia':
+            # Dia sem coleta gravada repete o último valor, em vez de sumir do gráfico
+            df = db.preencher_dias(df, ['tipo', 'influencer'], data_fim)
+        crescimento_df = resumo_crescimento_rollups(df_rollups, influencers)
+        df_filtrado_metrica = fatia(df, 'tipo', ['seguidores', 'curtidas', 'visualizacoes'])
+        df_filtrado_ganhos = fatia(df, 'tipo', ['ganhos'])
+        df_variacao = variacao_rollups(df_diario)
+        df_pivot = engajamento_rollups(df_rollups)
+        df_lives, lives_por_mes = lives_rollups(df_rollups)
+
+    df_engagement = None
+    if 'curtidas' in df_pivot.columns and 'seguidores' in df_pivot.columns:
+        df_pivot['taxa_engajamento_absoluta'] = (df_pivot['curtidas'] / df_pivot['seguidores']).fillna(0)
+        # Ordena os influencers por engajamento
+        df_engagement = (df_pivot[['influencer', 'taxa_engajamento_absoluta']].round(4)
+                         .sort_values(by='taxa_engajamento_absoluta', ascending=False))
+
+    # Série por minuto gravada pelo monitor de lives (``coletor.py lives``); é a única que pode passar de
+    # ``max_pontos_por_serie``, já que as dos agregados têm no máximo um ponto por dia
+    df_serie_live = db.carregar_serie_live(conn, influencers, data_inicio, data_fim).dropna(subset=['espectadores'])
+    if not df_serie_live.empty and not resolucao_completa:
+        df_serie_live = reduzir_series(df_serie_live, 'data', 'espectadores', ['influencer'])
+
+    return {'crescimento': crescimento_df, 'metricas': df_filtrado_metrica, 'variacao': df_variacao,
+            'ganhos': df_filtrado_ganhos, 'engajamento': df_engagement, 'lives': df_lives,
+            'lives_por_mes': lives_por_mes, 'serie_live': df_serie_live}
@@ -0,0 +1,88 @@
+"""Cálculos do painel de análise sobre os agregados de ``rollups.carregar_rollups``."""
+import numpy as np
+import pandas as pd
+
+from .tipos import fatia
+
+METRICAS_CRESCIMENTO = ['seguidores', 'curtidas', 'visualizacoes', 'ganhos']
+
+
+def _montar_resumo(inicio, fim, influencers, metricas):
+    inicio = inicio.reindex(columns=metricas)
+    fim = fim.reindex(columns=metricas)
+    crescimento = (fim - inicio).fillna(0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        percentual = (crescimento / inicio * 100).where(inicio.fillna(0) != 0, 0)
+
+    resumo = pd.concat([
+        crescimento,
+        percentual.add_suffix('_percentual'),
+        inicio.add_suffix('_inicial'),
+        fim.add_suffix('_final'),
+    ], axis=1)
+
+    if influencers is not None:
+        resumo = resumo.reindex([i for i in influencers if i in resumo.index])
+    return resumo.rename_axis('influencer').reset_index()
+
+
+def resumo_crescimento_rollups(df, influencers=None, metricas=METRICAS_CRESCIMENTO):
+    """Primeiro e último valor, crescimento absoluto e percentual por influencer, a partir dos agregados.
+
+    O valor inicial é o ``primeiro`` do período mais antigo e o final, o
+    ``ultimo`` do mais recente, então o resultado é exato em qualquer
+    granularidade. Tudo sai de um único ``groupby``; o percentual é 0
+    quando o valor inicial é 0. Com ``influencers`` o resultado segue essa
+    ordem (influencers sem dados são omitidos).
+
+    Retorna uma linha por influencer com as colunas ``<metrica>``,
+    ``<metrica>_percentual``, ``<metrica>_inicial`` e ``<metrica>_final``.
+    """
+    df = fatia(df, 'tipo', metricas)
+    if df.empty:
+        return pd.DataFrame(columns=['influencer'])
+
+    agrupado = df.groupby(['influencer', 'tipo'], sort=False, observed=True)
+    inicio = agrupado['primeiro'].first().unstack('tipo')
+    fim = agrupado['ultimo'].last().unstack('tipo')
+    return _montar_resumo(inicio, fim, influencers, metricas)
+
+
+def serie_rollups(df):
+    """Série (formato longo) com o último valor de cada período, para os gráficos de evolução."""
+    return df[['influencer', 'tipo', 'data', 'ultimo']].rename(columns={'ultimo': 'valor'})
+
+
+def variacao_rollups(df, metricas=('seguidores', 'curtidas')):
+    """Variação por período de cada métrica, no formato do gráfico de barras."""
+    variacao = fatia(df, 'tipo', metricas)
+    return pd.DataFrame({
+        'data': variacao['data'],
+        'influencer': variacao['influencer'],
+        'metrica': variacao['tipo'].astype(str) + '_diff',
+        'variacao': variacao['delta'],
+    })
+
+
+def engajamento_rollups(df):
+    """Média de curtidas e seguidores no período (soma/amostras) por influencer."""
+    base = fatia(df, 'tipo', ['seguidores', 'curtidas'])
+    totais = base.groupby(['influencer', 'tipo'], observed=True)[['soma', 'amostras']].sum()
+    return (totais['soma'] / totais['amostras']).unstack('tipo').reset_index()
+
+
+def lives_rollups(df):
+    """Pico de curtidas/espectadores de live por período e quantidade de lives por mês."""
+    lives = fatia(df, 'tipo', ['live_curtidas', 'live_visualizacoes'])
+    if lives.empty:
+        return pd.DataFrame(), pd.DataFrame()
+
+    picos = (lives.pivot_table(index=['influencer', 'data'], columns='tipo', values='maximo', observed=True)
+             .reindex(columns=['live_curtidas', 'live_visualizacoes']).fillna(0).reset_index())
+
+    espectadores = fatia(lives, 'tipo', ['live_visualizacoes'])
+    por_mes = (espectadores.groupby(['influencer', espectadores['data'].dt.to_period('M').rename('mes')],
+                                    observed=True)
+               ['amostras'].sum().reset_index(name='quantidade_lives'))
+    por_mes['mes'] = por_mes['mes'].astype(str)
+    return picos, por_mes
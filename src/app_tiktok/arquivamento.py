@@ -0,0 +1,166 @@
+"""Arquivamento das coletas antigas em Parquet, consultado junto com o SQLite.
+
+``arquivar`` move as linhas de ``snapshots``, ``produtos_live`` e
+``historico`` mais antigas que ``dias`` (meses inteiros) para arquivos
+Parquet ao lado do banco, particionados por mês e influencer::
+
+    influencers_arquivo/snapshots/mes=2024-05/influencer=%40perfil/ids-1-998.parquet
+
+e registra em ``arquivamento`` até que data cada tabela foi arquivada. As
+consultas de ``db`` continuam lendo o período todo no SQLite e só abrem o
+arquivo (``ler``) quando o período começa antes desse limite; então leem
+apenas as partições do mês e dos influencers pedidos, só as colunas
+necessárias, com os filtros de data aplicados às estatísticas de cada
+grupo de linhas e os arquivos mapeados em memória.
+
+Os agregados de ``rollups`` não são afetados (não há gatilho de DELETE),
+mas ``rollups.reconstruir_rollups`` só enxerga as linhas que ficaram no
+banco. Depende do pyarrow, como a exportação em Parquet.
+"""
+import itertools
+import os
+from datetime import datetime, timedelta
+from urllib.parse import quote
+
+TABELAS = ('snapshots', 'produtos_live', 'historico')
+DEFAULT_DIAS = 365
+TIPOS_ARROW = {'INTEGER': 'int64', 'REAL': 'float64', 'TEXT': 'string'}
+
+# diretório da tabela -> ((limite, linhas arquivadas), dataset), refeito a cada novo arquivamento
+_datasets = {}
+
+
+def diretorio_arquivo(conn):
+    """Diretório do arquivo deste banco (``<banco>_arquivo``); None para bancos em memória."""
+    caminho = conn.execute("PRAGMA database_list").fetchone()[2]
+    return os.path.splitext(caminho)[0] + "_arquivo" if caminho else None
+
+
+def _registro(conn, tabela):
+    return conn.execute("SELECT ate, linhas FROM arquivamento WHERE tabela = ?", (tabela,)).fetchone()
+
+
+def limite_arquivado(conn, tabela):
+    """Data (texto) antes da qual as linhas da tabela estão no arquivo, ou None."""
+    row = _registro(conn, tabela)
+    return row[0] if row else None
+
+
+def corte(dias, agora=None):
+    """Início do mês que contém ``agora - dias``: só meses inteiros são arquivados."""
+    limite = (agora or datetime.now()) - timedelta(days=dias)
+    return limite.strftime("%Y-%m-01 00:00:00")
+
+
+def _proximo_mes(mes):
+    ano, m = map(int, mes.split('-'))
+    return f"{ano + m // 12}-{m % 12 + 1:02d}"
+
+
+def _esquema(conn, tabela):
+    import pyarrow as pa
+
+    colunas = [(row[1], row[2].upper()) for row in conn.execute(f"PRAGMA table_info({tabela})")]
+    # O influencer vem do caminho da partição, não do arquivo
+    return pa.schema([(nome, TIPOS_ARROW.get(tipo, 'string')) for nome, tipo in colunas if nome != 'influencer'])
+
+
+def _gravar_particao(diretorio, tabela, mes, influencer, linhas, esquema):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    destino = os.path.join(diretorio, tabela, f"mes={mes}", f"influencer={quote(influencer or '', safe='')}")
+    os.makedirs(destino, exist_ok=True)
+    # Nome determinístico: repetir um arquivamento interrompido sobrescreve em vez de duplicar
+    nome = f"ids-{linhas[0]['id']}-{linhas[-1]['id']}.parquet"
+    # O temporário começa com ponto para a leitura do dataset ignorá-lo
+    temporario = os.path.join(destino, f".{nome}.tmp")
+    pq.write_table(pa.Table.from_pylist(linhas, schema=esquema), temporario, compression='zstd')
+    os.replace(temporario, os.path.join(destino, nome))
+
+
+def arquivar(conn, dias=DEFAULT_DIAS, tabelas=TABELAS, agora=None):
+    """Move para o arquivo as linhas anteriores a ``corte(dias)``; retorna {tabela: linhas movidas}.
+
+    Cada mês é gravado e apagado do banco antes de passar ao próximo, então
+    a memória usada é a de um mês de uma tabela.
+    """
+    diretorio = diretorio_arquivo(conn)
+    if diretorio is None:
+        raise ValueError("O arquivamento precisa de um banco em arquivo, não em memória.")
+    limite = corte(dias, agora)
+    movidas = {}
+
+    for tabela in tabelas:
+        esquema = _esquema(conn, tabela)
+        nomes = ['influencer'] + esquema.names
+        meses = [row[0] for row in conn.execute(
+            f"SELECT DISTINCT substr(data, 1, 7) FROM {tabela} WHERE data < ? ORDER BY 1", (limite,))]
+        movidas[tabela] = 0
+        for mes in meses:
+            faixa = (mes, _proximo_mes(mes))
+            cursor = conn.execute(f"""
+            SELECT {', '.join(nomes)} FROM {tabela} WHERE data >= ? AND data < ? ORDER BY influencer, data, id
+            """, faixa)
+            linhas = [dict(zip(nomes, row)) for row in cursor]
+            for influencer, grupo in itertools.groupby(linhas, key=lambda linha: linha.pop('influencer')):
+                _gravar_particao(diretorio, tabela, mes, influencer, list(grupo), esquema)
+            with conn:
+                conn.execute(f"DELETE FROM {tabela} WHERE data >= ? AND data < ?", faixa)
+            movidas[tabela] += len(linhas)
+
+        with conn:
+            conn.execute("""
+            INSERT INTO arquivamento (tabela, ate, linhas) VALUES (?, ?, ?)
+            ON CONFLICT (tabela) DO UPDATE SET ate = MAX(ate, excluded.ate), linhas = linhas + excluded.linhas
+            """, (tabela, limite, movidas[tabela]))
+    return movidas
+
+
+def _dataset(conn, tabela, registro):
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    from pyarrow import fs
+
+    diretorio = os.path.join(diretorio_arquivo(conn), tabela)
+    if not os.path.isdir(diretorio):
+        return None  # Arquivamento registrado sem nenhuma linha movida
+    guardado = _datasets.get(diretorio)
+    if guardado is None or guardado[0] != registro:
+        particoes = ds.partitioning(pa.schema([('mes', pa.string()), ('influencer', pa.string())]),
+                                    flavor='hive')
+        dataset = ds.dataset(diretorio, format='parquet', partitioning=particoes,
+                             filesystem=fs.LocalFileSystem(use_mmap=True))
+        guardado = _datasets[diretorio] = (registro, dataset)
+    return guardado[1]
+
+
+def ler(conn, tabela, colunas, influencers, inicio=None, fim=None, usuario=None, apos_id=0):
+    """Linhas arquivadas da tabela (DataFrame com ``data`` convertida), ou None se não há nenhuma no período.
+
+    ``inicio`` e ``fim`` são textos no formato de ``data``, inclusivos.
+    """
+    registro = _registro(conn, tabela)
+    if registro is None or (inicio is not None and inicio >= registro[0]) or not influencers:
+        return None
+    import pandas as pd
+    import pyarrow.dataset as ds
+
+    filtro = ds.field('influencer').isin(list(influencers))
+    if inicio is not None:
+        filtro &= (ds.field('mes') >= inicio[:7]) & (ds.field('data') >= inicio)
+    if fim is not None:
+        filtro &= (ds.field('mes') <= fim[:7]) & (ds.field('data') <= fim)
+    if usuario is not None:
+        filtro &= ds.field('usuario') == usuario
+    if apos_id:
+        filtro &= ds.field('id') > apos_id
+
+    dataset = _dataset(conn, tabela, tuple(registro))
+    if dataset is None:
+        return None
+    df = dataset.to_table(columns=list(colunas), filter=filtro).to_pandas()
+    if df.empty:
+        return None
+    df['data'] = pd.to_datetime(df['data'])
+    return df
@@ -0,0 +1,125 @@
+"""Cache das consultas do painel, compartilhado entre as sessões do processo.
+
+As entradas expiram por TTL e as menos usadas saem primeiro quando o cache
+enche. Cada consulta guarda o maior ``id`` visto na tabela de origem, o
+que cobre gravações feitas por outros processos (ex.: o coletor): nos
+produtos só as linhas gravadas depois dele são buscadas e anexadas; nos
+agregados, que mudam no lugar, a consulta é refeita quando surge um
+snapshot novo. As gravações feitas pelo próprio app invalidam as entradas
+afetadas; regravações de snapshots existentes por outro processo (UPSERT
+da importação) só aparecem depois do TTL.
+
+Os DataFrames devolvidos são compartilhados; trate-os como somente leitura.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+
+from . import db, rollups
+
+DEFAULT_TTL = 300
+DEFAULT_MAXSIZE = 128
+
+
+class QueryCache:
+    """Dicionário LRU com expiração por tempo, seguro entre threads."""
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE, ttl=DEFAULT_TTL, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            criado, value = entry
+            if self._clock() - criado > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, renovar=True):
+        with self._lock:
+            criado = self._clock()
+            if not renovar and key in self._entries:
+                criado = self._entries[key][0]
+            self._entries[key] = (criado, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidar(self, predicado=None):
+        """Remove as entradas cuja chave satisfaz ``predicado`` (ou todas)."""
+        with self._lock:
+            if predicado is None:
+                self._entries.clear()
+                return
+            for key in [k for k in self._entries if predicado(k)]:
+                del self._entries[key]
+
+
+_cache = QueryCache()
+
+
+def invalidar_usuario(usuario):
+    _cache.invalidar(lambda key: key[0] in ('influencers', 'rollups') and key[1] == usuario)
+
+
+def invalidar_produtos():
+    _cache.invalidar(lambda key: key[0] == 'produtos')
+
+
+def _incremental(key, carregar, tabela, conn, ordenar, chave_unica):
+    entrada = _cache.get(key)
+    # A marca é lida antes da consulta: uma linha gravada no meio será buscada de novo na próxima vez
+    marca = db.ultimo_id(conn, tabela)
+    if entrada is None:
+        df = carregar(0)
+    else:
+        df, visto = entrada
+        if marca == visto:
+            return df
+        novos = carregar(visto)
+        if not novos.empty:
+            df = (pd.concat([df, novos], ignore_index=True)
+                  .drop_duplicates(subset=chave_unica, keep='last')
+                  .sort_values(ordenar, ignore_index=True))
+    _cache.set(key, (df, marca), renovar=entrada is None)
+    return df
+
+
+def listar_influencers(conn, usuario):
+    key = ('influencers', usuario)
+    influencers = _cache.get(key)
+    if influencers is None:
+        influencers = db.listar_influencers(conn, usuario)
+        _cache.set(key, influencers)
+    return influencers
+
+
+def carregar_rollups(conn, usuario, influencers, data_inicio, data_fim, granularidade):
+    """Versão com cache de ``rollups.carregar_rollups``, refeita quando há snapshots novos."""
+    key = ('rollups', usuario, frozenset(influencers), data_inicio, data_fim, granularidade)
+    entrada = _cache.get(key)
+    # Como em _incremental, a marca é lida antes da consulta
+    marca = db.ultimo_id(conn, 'snapshots')
+    if entrada is not None and entrada[1] == marca:
+        return entrada[0]
+    df = rollups.carregar_rollups(conn, usuario, influencers, data_inicio, data_fim, granularidade)
+    _cache.set(key, (df, marca))
+    return df
+
+
+def carregar_produtos(conn, influencers, data_inicio, data_fim):
+    """Versão com cache de ``db.carregar_produtos``."""
+    key = ('produtos', frozenset(influencers), data_inicio, data_fim)
+    return _incremental(
+        key, lambda apos: db.carregar_produtos(conn, influencers, data_inicio, data_fim, apos),
+        'produtos_live', conn, ['data'], ['id'])
@@ -0,0 +1,91 @@
+"""Detecção de mudanças nas coletas, para não gravar snapshots repetidos.
+
+Perfis pequenos coletados várias vezes ao dia costumam devolver os mesmos
+números. ``IndiceUltimosValores`` guarda em memória a última leitura
+gravada de cada influencer, e uma nova coleta só vira linha em
+``snapshots`` quando algum valor mudou ou quando é a primeira do dia
+(batimento). O batimento diário garante um registro por dia coletado, de
+modo que os agregados diários (``rollups``) continuam completos. Entre
+duas linhas gravadas o valor é considerado constante: dias sem coleta
+gravada recebem o último valor anterior em ``db.preencher_dias``, usado
+nas séries do painel e em ``db.carregar_snapshots(..., degraus=True)``.
+
+O índice é atualizado incrementalmente pelo ``id`` da tabela, então
+também enxerga o que outros processos (ex.: o coletor) gravaram.
+"""
+import threading
+
+CAMPOS = ('seguidores', 'curtidas', 'visualizacoes', 'videos', 'live_curtidas', 'live_visualizacoes')
+# Prefixo de ``data`` que define o período do batimento ('YYYY-MM-DD' = diário)
+TAMANHO_PERIODO_BATIMENTO = 10
+
+
+def valores_da_coleta(dados, live_data=None):
+    live_data = live_data or {}
+    return (dados['seguidores'], dados['curtidas'], dados['visualizacoes'], dados.get('videos'),
+            live_data.get('live_curtidas', 0), live_data.get('live_visualizacoes', 0))
+
+
+class IndiceUltimosValores:
+    """Última leitura gravada por (usuário, influencer), seguro entre threads."""
+
+    def __init__(self):
+        self._ultimos = {}  # (usuario, influencer) -> (data, valores)
+        self._visto = 0
+        self._lock = threading.Lock()
+
+    def _atualizar(self, chave, data, valores):
+        atual = self._ultimos.get(chave)
+        if atual is None or data >= atual[0]:
+            self._ultimos[chave] = (data, valores)
+
+    def sincronizar(self, conn):
+        """Carrega as linhas gravadas desde a última sincronização (na primeira vez, tudo)."""
+        with self._lock:
+            marca = conn.execute("SELECT COALESCE(MAX(id), 0) FROM snapshots").fetchone()[0]
+            if marca == self._visto:
+                return
+            # Com MAX(data), o SQLite devolve as demais colunas da mesma linha
+            linhas = conn.execute(f"""
+            SELECT usuario, influencer, MAX(data), {', '.join(CAMPOS)}
+            FROM snapshots WHERE id > ? AND id <= ?
+            GROUP BY usuario, influencer
+            """, (self._visto, marca)).fetchall()
+            for usuario, influencer, data, *valores in linhas:
+                self._atualizar((usuario, influencer), data, tuple(valores))
+            self._visto = marca
+
+    def deve_gravar(self, conn, usuario, influencer, data, valores):
+        """True se a coleta traz valores novos ou é o batimento do período."""
+        self.sincronizar(conn)
+        with self._lock:
+            atual = self._ultimos.get((usuario, influencer))
+        if atual is None:
+            return True
+        ultima_data, ultimos_valores = atual
+        if data[:TAMANHO_PERIODO_BATIMENTO] != ultima_data[:TAMANHO_PERIODO_BATIMENTO]:
+            return True
+        return tuple(valores) != ultimos_valores
+
+    def registrar(self, usuario, influencer, data, valores):
+        """Anota uma coleta que acabou de ser gravada."""
+        with self._lock:
+            self._atualizar((usuario, influencer), data, tuple(valores))
+
+    def limpar(self):
+        with self._lock:
+            self._ultimos.clear()
+            self._visto = 0
+
+
+_indices = {}
+_indices_lock = threading.Lock()
+
+
+def indice(conn):
+    """Índice compartilhado pelas conexões do mesmo arquivo de banco."""
+    arquivo = conn.execute("PRAGMA database_list").fetchone()[2] or id(conn)
+    with _indices_lock:
+        if arquivo not in _indices:
+            _indices[arquivo] = IndiceUltimosValores()
+        return _indices[arquivo]
@@ -0,0 +1,338 @@
+"""Coletor agendado, executado fora do Streamlit.
+
+Percorre a fila persistida em ``fila_coleta``, busca os perfis vencidos com o
+pool de navegador compartilhado e grava os resultados em ``snapshots``. O
+dashboard só precisa ler o banco. Perfis buscados há pouco (pelo app ou por
+outro coletor) são lidos de ``cache_coletas`` em vez de abrir o navegador, e
+os que estão sendo buscados por outro processo são esperados.
+
+Vários coletores podem dividir a mesma fila: cada um reserva um lote
+(``reservado_por``/``reservado_ate``) antes de buscar, renova a reserva
+enquanto trabalha e a libera ao gravar os resultados. Se um processo
+morrer, seus itens voltam para a fila quando a reserva vence. Com
+``--processos N`` o próprio comando sobe N processos, cada um com seu
+navegador (ver ``app_tiktok.workers``).
+
+Uso::
+
+    python coletor.py adicionar admin @influencer --intervalo 360
+    python coletor.py executar              # roda para sempre
+    python coletor.py executar --uma-vez    # um único ciclo (ex.: cron)
+    python coletor.py executar --processos 4
+    python coletor.py executar --metricas-porta 9100   # histogramas em /metrics
+    python coletor.py lives --usuario admin   # série das lives por minuto (ver ``live_monitor``)
+    python coletor.py arquivar --dias 365 --compactar   # coletas antigas para Parquet (ver ``arquivamento``)
+"""
+import argparse
+import logging
+import os
+import socket
+import threading
+import time
+from datetime import datetime, timedelta
+
+from . import db, metrics
+from .resilience import PERMANENTE, Disjuntor, classificar_erro
+from .scrape_cache import CacheColetas
+from .scraper import DEFAULT_CONCURRENCY, BatchResult, scrape_profiles
+
+DEFAULT_INTERVALO_MINUTOS = 360
+DEFAULT_LOTE = 100
+DEFAULT_ESPERA_SEGUNDOS = 60
+# Prazo da reserva de um lote; renovado a cada terço enquanto o coletor trabalha
+DEFAULT_RESERVA_SEGUNDOS = 300
+# Perfis que falharam de vez (ex.: inexistentes) só são tentados de novo depois disso
+ESPERA_ERRO_PERMANENTE = timedelta(days=7)
+# Falhas transitórias: nova tentativa em 5, 10, 20... minutos, até o intervalo normal
+ESPERA_BASE_FALHA = timedelta(minutes=5)
+
+logger = logging.getLogger(__name__)
+
+
+def agendar_influencer(conn, usuario, influencer, intervalo_minutos=DEFAULT_INTERVALO_MINUTOS,
+                       coletar_agora=True):
+    """Adiciona o influencer à fila (ou atualiza o intervalo).
+
+    Com ``coletar_agora=False`` a primeira coleta fica para daqui a um
+    intervalo, útil quando o perfil acabou de ser buscado manualmente.
+    """
+    influencer = "@" + influencer.strip().lstrip('@')
+    proxima = datetime.now()
+    if not coletar_agora:
+        proxima += timedelta(minutes=intervalo_minutos)
+    with conn:
+        conn.execute("""
+        INSERT INTO fila_coleta (usuario, influencer, intervalo_minutos, proxima_coleta)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT (usuario, influencer) DO UPDATE SET intervalo_minutos = excluded.intervalo_minutos
+        """, (usuario, influencer, intervalo_minutos, db.agora_str(proxima)))
+
+
+def remover_influencer(conn, usuario, influencer):
+    influencer = "@" + influencer.strip().lstrip('@')
+    with conn:
+        conn.execute("DELETE FROM fila_coleta WHERE usuario = ? AND influencer = ?", (usuario, influencer))
+
+
+def nome_trabalhador():
+    """Identificação do processo nas reservas da fila (host:pid)."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def reservar_itens(conn, trabalhador, agora=None, limite=DEFAULT_LOTE,
+                   reserva_segundos=DEFAULT_RESERVA_SEGUNDOS):
+    """Reserva para ``trabalhador`` até ``limite`` itens vencidos e livres.
+
+    A seleção e a reserva acontecem num único UPDATE, então dois coletores
+    nunca recebem o mesmo item. Itens com reserva vencida (dono morto) voltam
+    a ficar disponíveis.
+    """
+    agora = agora or datetime.now()
+    with conn:
+        return conn.execute("""
+        UPDATE fila_coleta SET reservado_por = ?, reservado_ate = ?
+        WHERE id IN (
+            SELECT id FROM fila_coleta
+            WHERE proxima_coleta <= ? AND (reservado_ate IS NULL OR reservado_ate < ?)
+            ORDER BY proxima_coleta LIMIT ?
+        )
+        RETURNING id, usuario, influencer, intervalo_minutos, falhas
+        """, (trabalhador, db.agora_str(agora + timedelta(seconds=reserva_segundos)),
+              db.agora_str(agora), db.agora_str(agora), limite)).fetchall()
+
+
+def renovar_reservas(conn, trabalhador, reserva_segundos=DEFAULT_RESERVA_SEGUNDOS):
+    """Estende o prazo de todas as reservas do trabalhador; retorna quantas eram."""
+    with conn:
+        return conn.execute("""
+        UPDATE fila_coleta SET reservado_ate = ? WHERE reservado_por = ?
+        """, (db.agora_str(datetime.now() + timedelta(seconds=reserva_segundos)), trabalhador)).rowcount
+
+
+def liberar_reservas(conn, trabalhador):
+    """Devolve à fila os itens ainda reservados pelo trabalhador (ex.: ao encerrar)."""
+    with conn:
+        conn.execute("UPDATE fila_coleta SET reservado_por = NULL, reservado_ate = NULL "
+                     "WHERE reservado_por = ?", (trabalhador,))
+
+
+class Batimento:
+    """Renova as reservas do trabalhador numa thread enquanto o bloco ``with`` roda.
+
+    Usa uma conexão própria, para não misturar transações com a thread principal.
+    """
+
+    def __init__(self, conn, trabalhador, reserva_segundos=DEFAULT_RESERVA_SEGUNDOS):
+        self._caminho = conn.execute("PRAGMA database_list").fetchone()[2]
+        self.trabalhador = trabalhador
+        self.reserva_segundos = reserva_segundos
+        self._parar = threading.Event()
+        self._thread = None
+
+    def _rodar(self):
+        conn = db.connect(self._caminho)
+        try:
+            while not self._parar.wait(self.reserva_segundos / 3):
+                renovar_reservas(conn, self.trabalhador, self.reserva_segundos)
+        finally:
+            conn.close()
+
+    def __enter__(self):
+        # Banco em memória não é compartilhado entre processos: nada a renovar
+        if self._caminho:
+            self._thread = threading.Thread(target=self._rodar, name="batimento-fila", daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._parar.set()
+        if self._thread is not None:
+            self._thread.join()
+
+
+def _coletar(usernames, lives, concurrency, cache_coletas, disjuntor, raspar=scrape_profiles):
+    """Busca os perfis, pelo cache de resultados quando houver.
+
+    Com o cache, só são raspados os perfis sem resultado recente que
+    ninguém mais está buscando; os que o painel ou outro coletor já está
+    buscando são esperados (``CacheColetas.obter_varios``).
+    """
+    if cache_coletas is None:
+        return raspar(usernames, concurrency=concurrency, include_live=lives, disjuntor=disjuntor)
+
+    lote = BatchResult()
+
+    def buscar(pendentes):
+        parcial = raspar(pendentes, concurrency=concurrency, include_live=lives & set(pendentes),
+                         disjuntor=disjuntor)
+        lote.errors.update(parcial.errors)
+        lote.live_errors.update(parcial.live_errors)
+        lote.stats.update(parcial.stats)
+        return {username: (dados, parcial.lives.get(username)) for username, dados in parcial.results.items()}
+
+    for username, (dados, live) in cache_coletas.obter_varios(usernames, buscar, lives).items():
+        lote.results[username] = dados
+        if live is not None:
+            lote.lives[username] = live
+    return lote
+
+
+def executar_ciclo(conn, concurrency=DEFAULT_CONCURRENCY, limite=DEFAULT_LOTE, cache_coletas=None,
+                   disjuntor=None, trabalhador=None, raspar=scrape_profiles,
+                   reserva_segundos=DEFAULT_RESERVA_SEGUNDOS):
+    """Reserva e coleta um lote de itens vencidos; retorna (sucessos, falhas).
+
+    Os snapshots e a atualização da fila são gravados em lote, e a
+    atualização só vale para itens cuja reserva ainda é deste trabalhador.
+    """
+    trabalhador = trabalhador or nome_trabalhador()
+    agora = datetime.now()
+    itens = reservar_itens(conn, trabalhador, agora, limite, reserva_segundos)
+    if not itens:
+        return 0, 0
+
+    cursor = conn.cursor()
+    usernames = [influencer.lstrip('@') for _, _, influencer, _, _ in itens]
+    lives = {influencer.lstrip('@') for _, usuario, influencer, _, _ in itens
+             if db.precisa_verificar_live(cursor, influencer, usuario, agora)}
+
+    with Batimento(conn, trabalhador, reserva_segundos):
+        lote = _coletar(usernames, lives, concurrency, cache_coletas, disjuntor, raspar)
+
+    coletas, ok, erros = [], [], []
+    for item_id, usuario, influencer, intervalo, falhas_anteriores in itens:
+        username = influencer.lstrip('@')
+        dados = lote.results.get(username)
+        if dados is None:
+            erro = lote.errors.get(username)
+            logger.warning("Falha ao coletar %s: %s", influencer, erro)
+            if erro is not None and classificar_erro(erro) == PERMANENTE:
+                espera = ESPERA_ERRO_PERMANENTE
+            else:
+                espera = min(timedelta(minutes=intervalo), ESPERA_BASE_FALHA * 2 ** (falhas_anteriores or 0))
+            erros.append((db.agora_str(agora + espera), str(erro), item_id, trabalhador))
+            continue
+        coletas.append((usuario, influencer, dados, lote.lives.get(username)))
+        ok.append((db.agora_str(agora + timedelta(minutes=intervalo)), db.agora_str(agora), item_id,
+                   trabalhador))
+
+    gravados = db.registrar_coletas(conn, coletas, data=db.agora_str(agora))
+    if gravados < len(coletas):
+        logger.debug("%d coletas sem mudanças desde a última; snapshots não gravados",
+                     len(coletas) - gravados)
+    with conn:
+        conn.executemany("""
+        UPDATE fila_coleta SET proxima_coleta = ?, ultima_coleta = ?, ultimo_erro = NULL, falhas = 0,
+            reservado_por = NULL, reservado_ate = NULL
+        WHERE id = ? AND reservado_por = ?
+        """, ok)
+        conn.executemany("""
+        UPDATE fila_coleta SET proxima_coleta = ?, ultimo_erro = ?, falhas = falhas + 1,
+            reservado_por = NULL, reservado_ate = NULL
+        WHERE id = ? AND reservado_por = ?
+        """, erros)
+    return len(ok), len(erros)
+
+
+def executar(conn, concurrency=DEFAULT_CONCURRENCY, limite=DEFAULT_LOTE,
+             espera_segundos=DEFAULT_ESPERA_SEGUNDOS, uma_vez=False, cache_coletas=None,
+             trabalhador=None, raspar=scrape_profiles, parar=None):
+    """Processa a fila até ``parar`` (um ``Event``) ser sinalizado, ou um ciclo com ``uma_vez``."""
+    trabalhador = trabalhador or nome_trabalhador()
+    # O mesmo disjuntor entre ciclos: um bloqueio do TikTok não some de um lote para o outro
+    disjuntor = Disjuntor()
+    try:
+        while parar is None or not parar.is_set():
+            sucessos, falhas = executar_ciclo(conn, concurrency, limite, cache_coletas, disjuntor,
+                                              trabalhador, raspar)
+            if sucessos or falhas:
+                logger.info("Ciclo concluído por %s: %d coletados, %d falhas", trabalhador, sucessos, falhas)
+            if uma_vez:
+                return
+            if sucessos + falhas < limite:
+                # Fila em dia: espera antes de procurar novos itens vencidos
+                if parar is not None:
+                    parar.wait(espera_segundos)
+                else:
+                    time.sleep(espera_segundos)
+    finally:
+        liberar_reservas(conn, trabalhador)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Coletor agendado de perfis do TikTok.")
+    parser.add_argument("--db", default=db.DB_PATH, help="Caminho do banco SQLite.")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    p_add = sub.add_parser("adicionar", help="Adiciona um influencer à fila de coleta.")
+    p_add.add_argument("usuario")
+    p_add.add_argument("influencer")
+    p_add.add_argument("--intervalo", type=int, default=DEFAULT_INTERVALO_MINUTOS,
+                       help="Minutos entre coletas.")
+
+    p_rem = sub.add_parser("remover", help="Remove um influencer da fila de coleta.")
+    p_rem.add_argument("usuario")
+    p_rem.add_argument("influencer")
+
+    p_run = sub.add_parser("executar", help="Processa a fila de coleta.")
+    p_run.add_argument("--concorrencia", type=int, default=DEFAULT_CONCURRENCY)
+    p_run.add_argument("--lote", type=int, default=DEFAULT_LOTE)
+    p_run.add_argument("--espera", type=int, default=DEFAULT_ESPERA_SEGUNDOS,
+                       help="Segundos de espera quando a fila está em dia.")
+    p_run.add_argument("--uma-vez", action="store_true", help="Executa um único ciclo e sai.")
+    p_run.add_argument("--processos", type=int, default=1,
+                       help="Processos coletores, cada um com seu navegador.")
+    p_run.add_argument("--metricas-porta", type=int,
+                       help="Expõe os histogramas de tempo por HTTP; com vários processos, "
+                            "o coletor N usa a porta + N.")
+
+    p_lives = sub.add_parser("lives", help="Acompanha as lives e grava espectadores/curtidas por minuto.")
+    p_lives.add_argument("influencers", nargs="*", help="Perfis a acompanhar.")
+    p_lives.add_argument("--usuario", help="Acompanha também os influencers da fila deste usuário.")
+    p_lives.add_argument("--max-lives", type=int, default=30, help="Lives acompanhadas ao mesmo tempo.")
+    p_lives.add_argument("--verificacao", type=int, default=600,
+                         help="Segundos entre verificações de quem não está ao vivo.")
+
+    p_arq = sub.add_parser("arquivar", help="Move as coletas antigas para arquivos Parquet.")
+    p_arq.add_argument("--dias", type=int, default=365, help="Idade mínima (em dias) das linhas arquivadas.")
+    p_arq.add_argument("--compactar", action="store_true",
+                       help="Roda VACUUM depois, para o arquivo do banco encolher.")
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    conn = db.connect(args.db)
+    db.preparar(conn)
+
+    if args.comando == "adicionar":
+        agendar_influencer(conn, args.usuario, args.influencer, args.intervalo)
+    elif args.comando == "remover":
+        remover_influencer(conn, args.usuario, args.influencer)
+    elif args.comando == "arquivar":
+        from .arquivamento import arquivar
+        for tabela, linhas in arquivar(conn, args.dias).items():
+            logger.info("%s: %d linhas arquivadas", tabela, linhas)
+        if args.compactar:
+            conn.execute("VACUUM")
+    elif args.comando == "lives":
+        from .live_monitor import executar_monitor, influencers_da_fila
+        influencers = list(args.influencers)
+        if args.usuario:
+            influencers += influencers_da_fila(conn, args.usuario)
+        if not influencers:
+            parser.error("Informe os influencers ou --usuario.")
+        executar_monitor(conn, influencers, args.max_lives, args.verificacao)
+    elif args.processos > 1:
+        from .workers import executar_pool
+        conn.close()
+        executar_pool(args.db, args.processos, args.concorrencia, args.lote, args.espera, args.uma_vez,
+                      args.metricas_porta)
+    else:
+        if args.metricas_porta:
+            metrics.servir(args.metricas_porta)
+        executar(conn, args.concorrencia, args.lote, args.espera, args.uma_vez,
+                 cache_coletas=CacheColetas(conectar=lambda: conn))
+
+
+if __name__ == "__main__":
+    main()
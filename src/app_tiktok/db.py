@@ -0,0 +1,552 @@
+"""Acesso ao banco SQLite compartilhado entre o app e o coletor.
+
+Cada coleta vira uma única linha na tabela larga ``snapshots`` (todas as
+métricas e dados de live juntos). A tabela longa ``historico``, com uma linha
+por métrica, é mantida apenas como origem da migração inicial. Coletas sem
+mudança em relação à anterior não são gravadas (``app_tiktok.changes``).
+
+As conexões usam WAL (leitores não bloqueiam o escritor) e cada thread
+recebe a sua própria conexão via ``get_connection``, para que as sessões
+do Streamlit não disputem o mesmo cursor; as de threads encerradas são
+reaproveitadas pelas seguintes. O esquema é criado na primeira
+conexão a cada arquivo (``preparar``), não na importação, e o pandas só é
+carregado pelas funções que devolvem DataFrames. As coletas antigas podem
+ter sido movidas para Parquet (``app_tiktok.arquivamento``); as funções de
+leitura juntam as duas partes sem que o chamador perceba.
+"""
+import os
+import sqlite3
+import threading
+import weakref
+from datetime import date, datetime
+
+from . import arquivamento, changes, metrics, rollups
+from .parsing import estimate_earnings
+
+DB_PATH = "influencers.db"
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+TIPOS = ['seguidores', 'curtidas', 'visualizacoes', 'ganhos']
+# Versão do esquema gravada em PRAGMA user_version
+SCHEMA_VERSION = 3
+
+PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    # Com WAL, NORMAL só perde a última transação numa queda de energia
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA cache_size = -65536",  # 64 MiB
+    "PRAGMA mmap_size = 268435456",  # 256 MiB
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA busy_timeout = 5000",
+)
+
+INDEXES = (
+    "CREATE INDEX IF NOT EXISTS idx_historico_usuario_influencer_data ON historico (usuario, influencer, data)",
+    "CREATE INDEX IF NOT EXISTS idx_produtos_live_influencer_data ON produtos_live (influencer, data)",
+    "CREATE INDEX IF NOT EXISTS idx_fila_coleta_proxima ON fila_coleta (proxima_coleta)",
+)
+
+_local = threading.local()
+# Conexões de threads já encerradas, por (processo, arquivo), à espera da próxima thread
+_livres = {}
+_livres_lock = threading.Lock()
+_preparados = set()
+_preparo_lock = threading.Lock()
+
+
+def connect(path=DB_PATH):
+    """Abre uma nova conexão já configurada com os PRAGMAs de desempenho."""
+    conn = sqlite3.connect(path, check_same_thread=False)
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+def _devolver(pid, conns):
+    with _livres_lock:
+        for path, conn in conns.items():
+            _livres.setdefault((pid, path), []).append(conn)
+
+
+class _Emprestimo:
+    """Conexões da thread; quando a thread termina, o objeto é coletado e elas voltam ao pool."""
+
+    def __init__(self):
+        self.conns = {}
+        weakref.finalize(self, _devolver, os.getpid(), self.conns)
+
+
+def get_connection(path=DB_PATH):
+    """Conexão exclusiva da thread atual, reaproveitada entre chamadas.
+
+    O Streamlit roda cada rerun numa thread nova. Quando uma thread termina,
+    a conexão dela volta a um pool do processo e é entregue à próxima
+    thread que pedir, em vez de abrir e preparar outra a cada rerun.
+    """
+    emprestimo = getattr(_local, "emprestimo", None)
+    if emprestimo is None:
+        emprestimo = _local.emprestimo = _Emprestimo()
+    conn = emprestimo.conns.get(path)
+    if conn is None:
+        with _livres_lock:
+            livres = _livres.get((os.getpid(), path))
+            conn = livres.pop() if livres else None
+        if conn is None:
+            conn = connect(path)
+            preparar(conn)
+        elif conn.in_transaction:
+            conn.rollback()  # Transação que a thread anterior deixou aberta
+        emprestimo.conns[path] = conn
+    return conn
+
+
+def preparar(conn):
+    """Cria/atualiza o esquema uma única vez por arquivo de banco neste processo."""
+    arquivo = conn.execute("PRAGMA database_list").fetchone()[2] or id(conn)
+    with _preparo_lock:
+        if arquivo in _preparados:
+            return
+        criar_tabelas(conn.cursor())
+        conn.commit()
+        _preparados.add(arquivo)
+
+
+def agora_str(agora=None):
+    return (agora or datetime.now()).strftime(DATE_FORMAT)
+
+
+def criar_tabelas(cursor):
+    """Cria (ou atualiza) todas as tabelas usadas pelo app e pelo coletor."""
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS usuarios (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        usuario TEXT UNIQUE,
+        senha TEXT,
+        tipo TEXT
+    )
+    """)
+
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS historico (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        usuario TEXT,
+        influencer TEXT,
+        tipo TEXT,
+        valor INTEGER,
+        data TEXT,
+        metodo TEXT,
+        ganhos REAL,
+        live_curtidas INTEGER,
+        live_visualizacoes INTEGER
+    )
+    """)
+
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS produtos_live (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        influencer TEXT,
+        nome_produto TEXT,
+        valor_estimado REAL,
+        data TEXT
+    )
+    """)
+
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS snapshots (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        usuario TEXT,
+        influencer TEXT,
+        data TEXT,
+        metodo TEXT,
+        seguidores INTEGER,
+        curtidas INTEGER,
+        visualizacoes INTEGER,
+        ganhos REAL,
+        videos INTEGER,
+        live_curtidas INTEGER,
+        live_visualizacoes INTEGER,
+        UNIQUE (usuario, influencer, data)
+    )
+    """)
+
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS fila_coleta (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        usuario TEXT,
+        influencer TEXT,
+        intervalo_minutos INTEGER,
+        proxima_coleta TEXT,
+        ultima_coleta TEXT,
+        ultimo_erro TEXT,
+        falhas INTEGER DEFAULT 0,
+        reservado_por TEXT,
+        reservado_ate TEXT,
+        UNIQUE (usuario, influencer)
+    )
+    """)
+
+    # Resultados recentes de scraping (ver ``scrape_cache``); horários em timestamp Unix
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS cache_coletas (
+        username TEXT PRIMARY KEY,
+        dados TEXT,
+        live TEXT,
+        coletado_em REAL,
+        em_andamento_ate REAL
+    )
+    """)
+
+    # Série por minuto das lives acompanhadas pelo ``live_monitor``; minuto no formato 'YYYY-MM-DD HH:MM'
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS serie_live (
+        influencer TEXT,
+        minuto TEXT,
+        espectadores INTEGER,
+        espectadores_max INTEGER,
+        curtidas INTEGER,
+        amostras INTEGER,
+        PRIMARY KEY (influencer, minuto)
+    ) WITHOUT ROWID
+    """)
+
+    # Até que data cada tabela foi movida para o arquivo em Parquet (``arquivamento``)
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS arquivamento (
+        tabela TEXT PRIMARY KEY,
+        ate TEXT,
+        linhas INTEGER
+    )
+    """)
+
+    # Adiciona colunas se não existirem
+    for tabela, coluna in (("historico", "ganhos REAL"), ("historico", "live_curtidas INTEGER"),
+                           ("historico", "live_visualizacoes INTEGER"),
+                           # Reserva de itens da fila pelos processos coletores (``collector``)
+                           ("fila_coleta", "reservado_por TEXT"), ("fila_coleta", "reservado_ate TEXT")):
+        try:
+            cursor.execute(f"ALTER TABLE {tabela} ADD COLUMN {coluna}")
+        except sqlite3.OperationalError:
+            pass
+
+    # O índice UNIQUE de snapshots (usuario, influencer, data) já atende as consultas do painel
+    for index in INDEXES:
+        cursor.execute(index)
+
+    rollups.criar_rollups(cursor)
+
+    versao = cursor.execute("PRAGMA user_version").fetchone()[0]
+    if versao < 1:
+        migrar_historico_para_snapshots(cursor)
+    if versao < 3:
+        # A versão 3 troca o gatilho de UPDATE, que somava a linha regravada como nova amostra
+        rollups.recriar_gatilhos(cursor)
+        rollups.reconstruir_rollups(cursor)
+    if versao < SCHEMA_VERSION:
+        cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+
+def migrar_historico_para_snapshots(cursor, remover_origem=False):
+    """Converte as linhas de ``historico`` (uma por métrica) em ``snapshots``.
+
+    As quatro métricas de uma coleta compartilham usuário e influencer, mas
+    foram gravadas uma a uma e a ``data`` pode variar nos segundos; por isso
+    ela é truncada no minuto e cada grupo de (usuário, influencer, minuto)
+    vira uma linha. É idempotente: grupos já migrados são ignorados pela
+    restrição UNIQUE. Retorna o número de snapshots criados.
+    """
+    cursor.execute("""
+    INSERT OR IGNORE INTO snapshots (usuario, influencer, data, metodo, seguidores, curtidas,
+                                     visualizacoes, ganhos, live_curtidas, live_visualizacoes)
+    SELECT usuario, influencer, COALESCE(strftime('%Y-%m-%d %H:%M:00', data), data) AS minuto,
+           COALESCE(MAX(CASE WHEN tipo != 'ganhos' THEN metodo END), MAX(metodo)),
+           MAX(CASE WHEN tipo = 'seguidores' THEN valor END),
+           MAX(CASE WHEN tipo = 'curtidas' THEN valor END),
+           MAX(CASE WHEN tipo = 'visualizacoes' THEN valor END),
+           MAX(CASE WHEN tipo = 'ganhos' THEN valor END),
+           MAX(live_curtidas),
+           MAX(live_visualizacoes)
+    FROM historico
+    GROUP BY usuario, influencer, minuto
+    """)
+    criados = cursor.rowcount
+    if remover_origem:
+        cursor.execute("DELETE FROM historico")
+    return criados
+
+
+# Uma coleta regravada no mesmo instante atualiza a linha existente (e o gatilho de UPDATE dos agregados) em
+# vez de apagá-la e inseri-la de novo, o que a contaria como nova amostra; colunas nulas mantêm o valor anterior
+UPSERT_SNAPSHOT = """
+INSERT INTO snapshots (usuario, influencer, data, metodo, seguidores, curtidas, visualizacoes, ganhos,
+                       videos, live_curtidas, live_visualizacoes)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (usuario, influencer, data) DO UPDATE SET
+    seguidores = COALESCE(excluded.seguidores, seguidores),
+    curtidas = COALESCE(excluded.curtidas, curtidas),
+    visualizacoes = COALESCE(excluded.visualizacoes, visualizacoes),
+    ganhos = COALESCE(excluded.ganhos, ganhos),
+    videos = COALESCE(excluded.videos, videos),
+    live_curtidas = COALESCE(excluded.live_curtidas, live_curtidas),
+    live_visualizacoes = COALESCE(excluded.live_visualizacoes, live_visualizacoes)
+"""
+
+
+def inserir_snapshot(cursor, usuario, influencer, dados, live_data=None, metodo='Scraping', data=None):
+    """Insere uma coleta completa em ``snapshots`` sem fazer commit."""
+    live_data = live_data or {'live_curtidas': 0, 'live_visualizacoes': 0}
+    cursor.execute(UPSERT_SNAPSHOT, (usuario, influencer, data or agora_str(), metodo, dados['seguidores'],
+                                     dados['curtidas'], dados['visualizacoes'],
+                                     estimate_earnings(dados['visualizacoes']), dados.get('videos'),
+                                     live_data['live_curtidas'], live_data['live_visualizacoes']))
+
+
+def registrar_coleta(conn, usuario, influencer, dados, live_data=None, data=None, forcar=False):
+    """Grava uma coleta de perfil como um único snapshot, numa transação.
+
+    Coletas idênticas à última gravada no mesmo dia são descartadas (veja
+    ``app_tiktok.changes``), a menos que ``forcar`` seja verdadeiro.
+    Retorna True se a linha foi gravada.
+    """
+    return registrar_coletas(conn, [(usuario, influencer, dados, live_data)], data, forcar) == 1
+
+
+def registrar_coletas(conn, coletas, data=None, forcar=False):
+    """Versão em lote de ``registrar_coleta`` para (usuario, influencer, dados, live_data).
+
+    Todas as coletas gravadas entram numa única transação; retorna quantas foram gravadas.
+    """
+    data = data or agora_str()
+    indice = changes.indice(conn)
+    novas = []
+    for usuario, influencer, dados, live_data in coletas:
+        valores = changes.valores_da_coleta(dados, live_data)
+        if forcar or indice.deve_gravar(conn, usuario, influencer, data, valores):
+            novas.append((usuario, influencer, dados, live_data, valores))
+    if not novas:
+        return 0
+
+    with metrics.medir('db_gravacao'), conn:
+        cursor = conn.cursor()
+        for usuario, influencer, dados, live_data, _ in novas:
+            inserir_snapshot(cursor, usuario, influencer, dados, live_data, data=data)
+    for usuario, influencer, _, _, valores in novas:
+        indice.registrar(usuario, influencer, data, valores)
+    return len(novas)
+
+
+def garantir_usuarios(conn, usuarios):
+    """Cadastra os (usuario, senha, tipo) que ainda não existem."""
+    with conn:
+        conn.executemany("INSERT OR IGNORE INTO usuarios (usuario, senha, tipo) VALUES (?, ?, ?)", usuarios)
+
+
+def verificar_login(conn, usuario, senha):
+    """Linha do usuário em ``usuarios`` se a senha confere, senão None."""
+    return conn.execute("SELECT * FROM usuarios WHERE usuario=? AND senha=?", (usuario, senha)).fetchone()
+
+
+def inserir_produto(conn, influencer, nome_produto, valor_estimado, data=None):
+    with metrics.medir('db_gravacao'), conn:
+        conn.execute("""
+        INSERT INTO produtos_live (influencer, nome_produto, valor_estimado, data)
+        VALUES (?, ?, ?, ?)
+        """, (influencer, nome_produto, valor_estimado, data or agora_str()))
+
+
+def listar_influencers(conn, usuario):
+    return [row[0] for row in conn.execute(
+        "SELECT DISTINCT influencer FROM snapshots WHERE usuario = ?", (usuario,))]
+
+
+def ultimo_id(conn, tabela):
+    """Maior ``id`` atual da tabela; linhas gravadas depois terão ids maiores."""
+    return conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {tabela}").fetchone()[0]
+
+
+COLUNAS_SNAPSHOTS = ['id', 'influencer', 'data', 'seguidores', 'curtidas', 'visualizacoes', 'ganhos',
+                     'live_curtidas', 'live_visualizacoes']
+COLUNAS_PRODUTOS = ['id', 'influencer', 'nome_produto', 'valor_estimado', 'data']
+
+
+def _lotes_do_arquivo(frio, tamanho_lote):
+    for comeco in range(0, len(frio), tamanho_lote):
+        yield frio.iloc[comeco:comeco + tamanho_lote].reset_index(drop=True)
+
+
+def carregar_snapshots(conn, usuario, influencers, data_inicio, data_fim, apos_id=0, tamanho_lote=None,
+                       degraus=False):
+    """Snapshots (formato largo) do usuário para os influencers e o período.
+
+    Com ``apos_id`` só retorna as linhas gravadas depois daquele ``id``. As
+    datas já vêm convertidas e o resultado, ordenado por influencer e data.
+    Com ``tamanho_lote`` retorna um iterador de DataFrames com até esse
+    número de linhas cada, para percorrer períodos grandes sem carregá-los
+    inteiros; os lotes do arquivo vêm antes dos do banco.
+
+    Com ``degraus`` o resultado tem uma linha por influencer e dia do
+    período (``preencher_dias``), partindo do último snapshot gravado antes
+    dele; não combina com ``apos_id`` nem com ``tamanho_lote``.
+    """
+    import itertools
+
+    import pandas as pd
+
+    if degraus and (apos_id or tamanho_lote):
+        raise ValueError("degraus não combina com apos_id nem com tamanho_lote.")
+
+    query = """
+    SELECT {}
+    FROM snapshots
+    WHERE usuario = ? AND data >= ? AND data <= ? AND influencer IN ({}) AND id > ?
+    ORDER BY influencer, data
+    """.format(', '.join(COLUNAS_SNAPSHOTS), ','.join(['?'] * len(influencers)))
+
+    inicio, fim = data_inicio.strftime("%Y-%m-%d 00:00:00"), data_fim.strftime("%Y-%m-%d 23:59:59")
+    params = [usuario, inicio, fim] + list(influencers) + [apos_id]
+    # Uma medição para a carga inteira (arquivo, banco e, com degraus, os valores vigentes no início)
+    with metrics.medir('db_consulta'):
+        frio = arquivamento.ler(conn, 'snapshots', COLUNAS_SNAPSHOTS, influencers, inicio, fim, usuario, apos_id)
+        if tamanho_lote:
+            lotes = pd.read_sql_query(query, conn, params=params, parse_dates=['data'], chunksize=tamanho_lote)
+        else:
+            df = pd.read_sql_query(query, conn, params=params, parse_dates=['data'])
+            anteriores = _vigentes_no_inicio(conn, usuario, influencers, inicio) if degraus else None
+    if tamanho_lote:
+        if frio is None:
+            return lotes
+        return itertools.chain(_lotes_do_arquivo(frio.sort_values(['influencer', 'data']), tamanho_lote), lotes)
+    if frio is not None:
+        # Uma coleta que exista nas duas partes (gravada antes da importação recusar meses arquivados) conta uma
+        # vez, com a versão do banco
+        df = (pd.concat([frio, df], ignore_index=True).drop_duplicates(['influencer', 'data'], keep='last')
+              .sort_values(['influencer', 'data'], ignore_index=True))
+    if not degraus:
+        return df
+    if not anteriores.empty:
+        # Vêm antes das coletas do primeiro dia, que prevalecem sobre elas
+        df = pd.concat([anteriores, df], ignore_index=True).sort_values(['influencer', 'data'], kind='stable')
+    return preencher_dias(df, ['influencer'], data_fim)
+
+
+def _vigentes_no_inicio(conn, usuario, influencers, inicio):
+    """Último snapshot de cada influencer antes de ``inicio``, com ``data`` igual a ``inicio``."""
+    import pandas as pd
+
+    # Com MAX, o SQLite devolve as demais colunas da linha que tem o máximo
+    anteriores = pd.read_sql_query("""
+    SELECT {}, MAX(data) AS data
+    FROM snapshots
+    WHERE usuario = ? AND data < ? AND influencer IN ({})
+    GROUP BY influencer
+    """.format(', '.join(c for c in COLUNAS_SNAPSHOTS if c != 'data'), ','.join(['?'] * len(influencers))),
+        conn, params=[usuario, inicio] + list(influencers))
+    # Quem não tem coleta anterior no banco pode tê-la no arquivo, que é sempre mais antigo
+    faltando = sorted(set(influencers) - set(anteriores['influencer']))
+    frio = arquivamento.ler(conn, 'snapshots', COLUNAS_SNAPSHOTS, faltando, fim=inicio, usuario=usuario)
+    if frio is not None:
+        frio = frio[frio['data'] < pd.Timestamp(inicio)].sort_values('data').groupby('influencer').tail(1)
+        anteriores = frio if anteriores.empty else pd.concat([anteriores, frio], ignore_index=True)
+    return anteriores.assign(data=pd.Timestamp(inicio))[COLUNAS_SNAPSHOTS]
+
+
+def preencher_dias(df, chaves, data_fim):
+    """Uma linha por dia para cada grupo de ``chaves``, do primeiro registro dele até ``data_fim``.
+
+    Como só as mudanças são gravadas, um dia sem registro vale o que valia
+    no anterior: cada dia recebe, coluna a coluna, o último valor não nulo
+    até o fim dele (série em degraus). ``data`` passa a ser o início do dia;
+    dias depois de hoje ficam de fora.
+    """
+    import numpy as np
+    import pandas as pd
+
+    if df.empty:
+        return df
+    chaves = list(chaves)
+    diario = df.assign(data=df['data'].dt.normalize()).groupby(chaves + ['data'], observed=True).last()
+    grade = pd.date_range(diario.index.get_level_values('data').min(), min(data_fim, date.today()), freq='D')
+    grupos = diario.index.droplevel('data').unique().to_frame(index=False)
+    pontos = grupos.loc[grupos.index.repeat(len(grade))].assign(data=np.tile(grade.to_numpy(), len(grupos)))
+    completo = diario.reindex(pd.MultiIndex.from_frame(pontos)).groupby(level=chaves, observed=True).ffill()
+    return completo.dropna(how='all').reset_index()[list(df.columns)]
+
+
+def carregar_produtos(conn, influencers, data_inicio, data_fim, apos_id=0):
+    """Produtos ganhos em live pelos influencers no período."""
+    import pandas as pd
+
+    query = """
+    SELECT {}
+    FROM produtos_live
+    WHERE influencer IN ({}) AND data >= ? AND data <= ? AND id > ?
+    """.format(', '.join(COLUNAS_PRODUTOS), ','.join(['?'] * len(influencers)))
+
+    inicio, fim = data_inicio.strftime("%Y-%m-%d 00:00:00"), data_fim.strftime("%Y-%m-%d 23:59:59")
+    params = list(influencers) + [inicio, fim, apos_id]
+    with metrics.medir('db_consulta'):
+        df = pd.read_sql_query(query, conn, params=params, parse_dates=['data'])
+        frio = arquivamento.ler(conn, 'produtos_live', COLUNAS_PRODUTOS, influencers, inicio, fim, apos_id=apos_id)
+    return df if frio is None else pd.concat([frio, df], ignore_index=True)
+
+
+def snapshots_para_longo(df):
+    """Converte snapshots para o formato longo (uma linha por métrica) dos gráficos."""
+    longo = df.melt(id_vars=['influencer', 'data', 'live_curtidas', 'live_visualizacoes'],
+                    value_vars=TIPOS, var_name='tipo', value_name='valor').dropna(subset=['valor'])
+    longo['ganhos'] = estimate_earnings(longo['valor'])
+    return longo[['influencer', 'tipo', 'valor', 'data', 'ganhos', 'live_curtidas', 'live_visualizacoes']]
+
+
+def gravar_serie_live(conn, linhas):
+    """Grava (influencer, minuto, espectadores, espectadores_max, curtidas, amostras) em lote.
+
+    Um minuto já gravado é combinado com o novo: o último valor de
+    espectadores prevalece, o máximo e as curtidas (total acumulado da live)
+    ficam com o maior e as amostras se somam.
+    """
+    with metrics.medir('db_gravacao'), conn:
+        conn.executemany("""
+        INSERT INTO serie_live (influencer, minuto, espectadores, espectadores_max, curtidas, amostras)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT (influencer, minuto) DO UPDATE SET
+            espectadores = COALESCE(excluded.espectadores, espectadores),
+            espectadores_max = COALESCE(MAX(espectadores_max, excluded.espectadores_max), espectadores_max,
+                                        excluded.espectadores_max),
+            curtidas = COALESCE(MAX(curtidas, excluded.curtidas), curtidas, excluded.curtidas),
+            amostras = amostras + excluded.amostras
+        """, linhas)
+
+
+def carregar_serie_live(conn, influencers, data_inicio, data_fim):
+    """Série por minuto das lives dos influencers no período, com ``data`` já convertida."""
+    import pandas as pd
+
+    from .tipos import compactar
+
+    query = """
+    SELECT influencer, minuto AS data, espectadores, espectadores_max, curtidas, amostras
+    FROM serie_live
+    WHERE influencer IN ({}) AND minuto >= ? AND minuto <= ?
+    ORDER BY influencer, minuto
+    """.format(','.join(['?'] * len(influencers)))
+
+    params = list(influencers) + [data_inicio.strftime("%Y-%m-%d 00:00"), data_fim.strftime("%Y-%m-%d 23:59")]
+    with metrics.medir('db_consulta'):
+        df = pd.read_sql_query(query, conn, params=params, parse_dates=['data'])
+    return compactar(df, ['influencer'])
+
+
+def precisa_verificar_live(cursor, influencer, usuario, agora=None):
+    """Indica se a live do influencer ainda não foi verificada no mês corrente."""
+    cursor.execute("""
+    SELECT data FROM snapshots
+    WHERE influencer = ? AND usuario = ? AND live_visualizacoes > 0
+    ORDER BY data DESC LIMIT 1
+    """, (influencer, usuario))
+    last_scrape = cursor.fetchone()
+
+    if last_scrape:
+        agora = agora or datetime.now()
+        last_date = datetime.strptime(last_scrape[0], DATE_FORMAT)
+        if last_date.month == agora.month and last_date.year == agora.year:
+            return False
+    return True
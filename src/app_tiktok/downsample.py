@@ -0,0 +1,80 @@
+"""Redução de pontos das séries antes de montar os gráficos Plotly.
+
+Usa LTTB (Largest-Triangle-Three-Buckets), que mantém picos e vales da
+série, então a forma da curva não muda visualmente mesmo com bem menos
+pontos no JSON enviado ao navegador.
+"""
+import numpy as np
+
+# Largura típica do gráfico no layout "wide"; ~1 ponto a cada 2 px já é indistinguível
+LARGURA_GRAFICO_PX = 1200
+PIXELS_POR_PONTO = 2
+
+
+def max_pontos_por_serie(largura_px=LARGURA_GRAFICO_PX):
+    return max(3, largura_px // PIXELS_POR_PONTO)
+
+
+def lttb(x, y, n_saida):
+    """Índices dos ``n_saida`` pontos escolhidos pelo LTTB (sempre inclui o primeiro e o último).
+
+    Variante vetorizada: o triângulo de cada balde usa a média do balde
+    anterior, e não o ponto escolhido nele, então todos os baldes são
+    resolvidos de uma vez pelo numpy, sem laço em Python.
+    """
+    n = len(x)
+    if n_saida >= n or n_saida < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    # n_saida - 2 baldes cobrindo os pontos entre o primeiro e o último
+    limites = np.linspace(1, n - 1, n_saida - 1).astype(np.int64)
+    inicios = limites[:-1]
+    tamanhos = np.diff(limites)
+    medias_x = np.add.reduceat(x, inicios) / tamanhos
+    medias_y = np.add.reduceat(y, inicios) / tamanhos
+    # Vizinhos de cada balde: o primeiro ponto antes do primeiro balde e o último depois do último
+    ant_x, ant_y = np.r_[x[0], medias_x[:-1]], np.r_[y[0], medias_y[:-1]]
+    prox_x, prox_y = np.r_[medias_x[1:], x[-1]], np.r_[medias_y[1:], y[-1]]
+
+    balde = np.repeat(np.arange(len(inicios)), tamanhos)
+    meio = slice(1, n - 1)
+    area = np.abs((ant_x[balde] - prox_x[balde]) * (y[meio] - ant_y[balde])
+                  - (ant_x[balde] - x[meio]) * (prox_y[balde] - ant_y[balde]))
+    area = np.where(np.isnan(area), -np.inf, area)
+    # Primeira posição de cada balde com a maior área dele (o início, se forem todas NaN)
+    maiores = np.maximum.reduceat(area, inicios - 1)
+    candidatos = np.flatnonzero(area == maiores[balde])
+    _, primeiros = np.unique(balde[candidatos], return_index=True)
+
+    escolhidos = np.empty(n_saida, dtype=np.int64)
+    escolhidos[0] = 0
+    escolhidos[-1] = n - 1
+    escolhidos[1:-1] = candidatos[primeiros] + 1
+    return escolhidos
+
+
+def reduzir_series(df, x, y, grupos, max_pontos=None):
+    """Aplica ``lttb`` a cada série (combinação de ``grupos``) com mais de ``max_pontos`` pontos.
+
+    ``df`` deve estar ordenado por ``x`` dentro de cada série. Retorna o
+    DataFrame reduzido, preservando a ordem original das linhas.
+    """
+    max_pontos = max_pontos or max_pontos_por_serie()
+    if df.empty or df.groupby(grupos, observed=True).size().max() <= max_pontos:
+        return df
+
+    valores_x = df[x]
+    if np.issubdtype(valores_x.dtype, np.datetime64):
+        valores_x = valores_x.astype('int64')
+    valores_x = valores_x.to_numpy(dtype=float)
+    valores_y = df[y].to_numpy(dtype=float)
+
+    manter = []
+    for posicoes in df.groupby(grupos, sort=False, observed=True).indices.values():
+        if len(posicoes) <= max_pontos:
+            manter.append(posicoes)
+        else:
+            manter.append(posicoes[lttb(valores_x[posicoes], valores_y[posicoes], max_pontos)])
+    return df.iloc[np.sort(np.concatenate(manter))]
@@ -0,0 +1,107 @@
+"""Exportação de relatórios para CSV, Parquet e Excel, gerada em memória.
+
+Os dados chegam como um DataFrame, uma sequência de DataFrames (lotes) ou
+uma função que devolve um dos dois. A função só é chamada na hora da
+serialização, o que permite ao painel adiar a consulta até alguém escolher
+o formato. Cada formato escreve lote a lote num ``io.BytesIO``: o CSV e o
+Parquet não acumulam cópias intermediárias, e o Excel usa o modo
+*write-only* do openpyxl, com memória constante por linha.
+"""
+import importlib.util
+import io
+import math
+
+import pandas as pd
+
+# formato -> (extensão, tipo MIME)
+FORMATOS = {
+    'xlsx': ('.xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+    'csv': ('.csv', 'text/csv'),
+    'parquet': ('.parquet', 'application/vnd.apache.parquet'),
+}
+TAMANHO_LOTE = 50_000
+
+
+def _lotes(dados):
+    if callable(dados):
+        dados = dados()
+    if isinstance(dados, pd.DataFrame):
+        yield dados
+        return
+    vazio = True
+    for lote in dados:
+        vazio = False
+        yield lote
+    if vazio:
+        # Sem nenhum lote, um lote vazio: cada formato ainda gera um arquivo válido
+        yield pd.DataFrame()
+
+
+def para_csv(dados):
+    buffer = io.BytesIO()
+    for n, lote in enumerate(_lotes(dados)):
+        lote.to_csv(buffer, index=False, header=n == 0, encoding='utf-8')
+    return buffer.getvalue()
+
+
+def para_parquet(dados):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    buffer = io.BytesIO()
+    writer = None
+    try:
+        for lote in _lotes(dados):
+            if writer is None:
+                tabela = pa.Table.from_pandas(lote, preserve_index=False)
+                writer = pq.ParquetWriter(buffer, tabela.schema)
+            else:
+                tabela = pa.Table.from_pandas(lote, schema=writer.schema, preserve_index=False)
+            writer.write_table(tabela)
+    finally:
+        if writer is not None:
+            writer.close()
+    return buffer.getvalue()
+
+
+def _celula(valor):
+    # O xlsx não tem NaN/NaT; célula vazia
+    if valor is pd.NaT or (isinstance(valor, float) and math.isnan(valor)):
+        return None
+    return valor
+
+
+def para_xlsx(dados):
+    from openpyxl import Workbook
+
+    livro = Workbook(write_only=True)
+    planilha = livro.create_sheet()
+    cabecalho = False
+    for lote in _lotes(dados):
+        if not cabecalho:
+            planilha.append(list(lote.columns))
+            cabecalho = True
+        for linha in lote.itertuples(index=False, name=None):
+            planilha.append([_celula(v) for v in linha])
+
+    buffer = io.BytesIO()
+    livro.save(buffer)
+    return buffer.getvalue()
+
+
+_SERIALIZADORES = {'xlsx': para_xlsx, 'csv': para_csv, 'parquet': para_parquet}
+
+
+def formatos_disponiveis():
+    """Formatos que podem ser gerados neste ambiente (Parquet depende do pyarrow)."""
+    formatos = ['xlsx', 'csv']
+    if importlib.util.find_spec('pyarrow') is not None:
+        formatos.append('parquet')
+    return formatos
+
+
+def serializar(dados, formato):
+    """Bytes do arquivo ``formato`` (uma das chaves de ``FORMATOS``) com os dados."""
+    if formato not in _SERIALIZADORES:
+        raise ValueError(f"Formato não suportado: {formato!r} (use {', '.join(FORMATOS)}).")
+    return _SERIALIZADORES[formato](dados)
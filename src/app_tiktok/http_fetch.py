@@ -0,0 +1,118 @@
+"""Caminho rápido: lê os contadores do perfil direto do HTML, sem navegador.
+
+A página de perfil do TikTok já vem com o estado da aplicação embutido num
+``<script>`` JSON (``__UNIVERSAL_DATA_FOR_REHYDRATION__`` ou, em versões
+antigas, ``SIGI_STATE``). Quando esse JSON está presente basta uma requisição
+HTTP; caso contrário o chamador cai para o Playwright.
+"""
+import json
+import re
+import threading
+
+from . import metrics
+from .resilience import PerfilInexistenteError
+
+PROFILE_URL = "https://www.tiktok.com/@{username}"
+DEFAULT_TIMEOUT = 15
+POOL_SIZE = 16
+
+HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Chrome/90.0.4430.212 Safari/537.36"
+    ),
+    "Accept": "text/html,application/xhtml+xml",
+    "Accept-Language": "pt-BR,pt;q=0.9,en;q=0.8",
+}
+
+_SCRIPT_RE = re.compile(
+    r'<script[^>]+id="(__UNIVERSAL_DATA_FOR_REHYDRATION__|SIGI_STATE)"[^>]*>(.*?)</script>',
+    re.DOTALL,
+)
+
+# statusCode de ``webapp.user-detail`` para conta inexistente ou banida
+NOT_FOUND_STATUS_CODES = frozenset({10202, 10221})
+
+_session = None
+_session_lock = threading.Lock()
+
+
+class ProfileParseError(Exception):
+    """O HTML não trouxe os contadores do perfil."""
+
+
+def get_session():
+    """Sessão HTTP compartilhada, com pool de conexões keep-alive."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers.update(HEADERS)
+            _session = session
+        return _session
+
+
+def _stats_from_universal(data, username):
+    detail = data.get("__DEFAULT_SCOPE__", {}).get("webapp.user-detail", {})
+    if detail.get("statusCode") in NOT_FOUND_STATUS_CODES:
+        raise PerfilInexistenteError(f"O perfil @{username} não existe.")
+    return detail.get("userInfo", {}).get("stats")
+
+
+def _stats_from_sigi(data, username):
+    stats = data.get("UserModule", {}).get("stats", {})
+    if username in stats:
+        return stats[username]
+    # O SIGI_STATE indexa pelo uniqueId, que pode diferir só em maiúsculas
+    for key, value in stats.items():
+        if key.lower() == username.lower():
+            return value
+    return None
+
+
+def parse_profile_html(html, username):
+    """Extrai seguidores, curtidas e vídeos do JSON de hidratação da página."""
+    match = _SCRIPT_RE.search(html)
+    if not match:
+        raise ProfileParseError("JSON de hidratação não encontrado na página.")
+
+    try:
+        data = json.loads(match.group(2))
+    except ValueError as e:
+        raise ProfileParseError(f"JSON de hidratação inválido: {e}") from e
+
+    if match.group(1) == "SIGI_STATE":
+        stats = _stats_from_sigi(data, username)
+    else:
+        stats = _stats_from_universal(data, username)
+
+    if not stats or "followerCount" not in stats:
+        raise ProfileParseError("Contadores do perfil ausentes no JSON de hidratação.")
+
+    likes = int(stats.get("heartCount", stats.get("heart", 0)))
+    return {
+        'seguidores': int(stats["followerCount"]),
+        'curtidas': likes,
+        'visualizacoes': likes,
+        'videos': int(stats.get("videoCount", 0)),
+    }
+
+
+def fetch_profile_http(username, session=None, timeout=DEFAULT_TIMEOUT, url_template=PROFILE_URL):
+    """Baixa o HTML do perfil e devolve os contadores.
+
+    Levanta ``ProfileParseError`` se a página não trouxer os contadores e
+    ``PerfilInexistenteError`` se o TikTok disser que a conta não existe.
+    """
+    session = session or get_session()
+    with metrics.medir('scrape_http'):
+        response = session.get(url_template.format(username=username), timeout=timeout)
+        response.raise_for_status()
+        with metrics.medir('scrape_parse'):
+            return parse_profile_html(response.text, username)
@@ -0,0 +1,207 @@
+"""Importação em massa de métricas e produtos a partir de CSV, XLSX ou Parquet.
+
+As métricas podem vir no formato longo do antigo ``historico`` (colunas
+``influencer``, ``tipo``, ``valor``, ``data``) ou já no formato largo de
+``snapshots`` (uma coluna por métrica). Tudo é gravado com ``executemany``
+em lotes dentro de uma única transação. Nas métricas, os gatilhos dos
+agregados ficam suspensos e os meses tocados são recalculados no fim
+(``rollups.reconstruir_rollups``), em vez de um UPSERT em ``rollups`` por
+snapshot gravado. Métricas de meses já movidos para o arquivo em Parquet
+(``app_tiktok.arquivamento``) são recusadas: o arquivo não é reescrito e a
+linha duplicaria a que já está lá.
+
+Uso::
+
+    python importar.py metricas planilha.xlsx --usuario admin
+    python importar.py produtos produtos.csv
+"""
+import argparse
+import os
+import sys
+
+import pandas as pd
+
+from . import arquivamento, db, rollups
+from .parsing import convert_series_to_int, estimate_earnings
+
+DEFAULT_LOTE = 50000
+COLUNAS_METRICAS = ['seguidores', 'curtidas', 'visualizacoes', 'ganhos', 'videos',
+                    'live_curtidas', 'live_visualizacoes']
+# Colunas inteiras que podem vir como texto do TikTok ("1,2 mi", "12.345")
+COLUNAS_CONTADORES = [c for c in COLUNAS_METRICAS if c != 'ganhos']
+
+INSERT_PRODUTO = """
+INSERT INTO produtos_live (influencer, nome_produto, valor_estimado, data)
+SELECT ?, ?, ?, ?
+WHERE NOT EXISTS (
+    SELECT 1 FROM produtos_live WHERE influencer = ? AND data = ? AND nome_produto = ?
+)
+"""
+
+
+def ler_arquivo(caminho, formato=None):
+    """Lê CSV, XLSX ou Parquet (pelo ``formato`` ou pela extensão do arquivo)."""
+    formato = (formato or os.path.splitext(str(caminho))[1].lstrip('.')).lower()
+    if formato == 'csv':
+        # Lidos como texto para que "12.345" (pt-BR) não vire 12,345; ``valor`` é a coluna do formato longo
+        return pd.read_csv(caminho, dtype={c: str for c in COLUNAS_CONTADORES + ['valor']})
+    if formato in ('xlsx', 'xls'):
+        return pd.read_excel(caminho)
+    if formato == 'parquet':
+        return pd.read_parquet(caminho)
+    raise ValueError(f"Formato não suportado: {formato!r} (use csv, xlsx ou parquet).")
+
+
+def _normalizar_influencer(serie):
+    serie = serie.astype(str).str.strip()
+    return serie.where(serie.str.startswith('@'), '@' + serie)
+
+
+def _normalizar_data(serie):
+    return pd.to_datetime(serie).dt.strftime(db.DATE_FORMAT)
+
+
+def preparar_metricas(df, usuario=None, metodo='Importação'):
+    """Converte a planilha de métricas para linhas de ``snapshots``.
+
+    No formato longo, duplicatas de (influencer, tipo, data) mantêm o último
+    valor e cada (influencer, data) vira uma linha.
+    """
+    df = df.rename(columns=str.lower)
+    if 'usuario' not in df.columns:
+        if usuario is None:
+            raise ValueError("Informe o usuário dono dos dados ou inclua a coluna 'usuario'.")
+        df = df.assign(usuario=usuario)
+    if 'metodo' not in df.columns:
+        df = df.assign(metodo=metodo)
+
+    df = df.assign(influencer=_normalizar_influencer(df['influencer']), data=_normalizar_data(df['data']))
+
+    if 'tipo' in df.columns:
+        df = df.assign(tipo=df['tipo'].astype(str).str.strip().str.lower())
+        df = df.drop_duplicates(subset=['usuario', 'influencer', 'tipo', 'data'], keep='last')
+        chaves = ['usuario', 'influencer', 'data']
+        largo = df.pivot(index=chaves, columns='tipo', values='valor')
+        extras = [c for c in ('metodo', 'live_curtidas', 'live_visualizacoes') if c in df.columns]
+        if extras:
+            largo = largo.join(df.groupby(chaves)[extras].first())
+        df = largo.reset_index()
+    else:
+        df = df.drop_duplicates(subset=['usuario', 'influencer', 'data'], keep='last')
+
+    for coluna in COLUNAS_METRICAS:
+        if coluna not in df.columns:
+            df[coluna] = None
+        elif not pd.api.types.is_numeric_dtype(df[coluna]):
+            # No formato longo os valores chegam aqui como texto, depois do pivot
+            df[coluna] = (convert_series_to_int(df[coluna]) if coluna in COLUNAS_CONTADORES
+                          else pd.to_numeric(df[coluna]))
+    if 'metodo' not in df.columns:
+        df['metodo'] = metodo
+
+    df['ganhos'] = df['ganhos'].fillna(estimate_earnings(df['visualizacoes'].astype(float)))
+    colunas = ['usuario', 'influencer', 'data', 'metodo'] + COLUNAS_METRICAS
+    df = df[colunas].astype(object)
+    return df.where(df.notna(), None)
+
+
+def preparar_produtos(df):
+    """Normaliza a planilha de produtos e remove duplicatas de (influencer, produto, data)."""
+    df = df.rename(columns=str.lower)
+    df = df.assign(influencer=_normalizar_influencer(df['influencer']), data=_normalizar_data(df['data']),
+                   nome_produto=df['nome_produto'].astype(str).str.strip())
+    df = df.drop_duplicates(subset=['influencer', 'nome_produto', 'data'], keep='last')
+    df = df[['influencer', 'nome_produto', 'valor_estimado', 'data']].astype(object)
+    return df.where(df.notna(), None)
+
+
+def _gravar_em_lotes(conn, sql, linhas, lote, progresso, feitos=0, total=None):
+    """Executa ``sql`` para as linhas, na transação corrente; retorna as linhas gravadas.
+
+    A contagem vem do ``rowcount`` de cada lote, que não inclui as linhas
+    escritas por gatilhos.
+    """
+    total = len(linhas) if total is None else total
+    gravadas = 0
+    for inicio in range(0, len(linhas), lote):
+        gravadas += conn.executemany(sql, linhas[inicio:inicio + lote]).rowcount
+        if progresso:
+            progresso(feitos + min(inicio + lote, len(linhas)), total)
+    return gravadas
+
+
+def importar_metricas(conn, df, usuario=None, lote=DEFAULT_LOTE, progresso=None, ignorar_arquivadas=False):
+    """Importa métricas para ``snapshots``; retorna o número de snapshots gravados.
+
+    ``progresso(feitos, total)`` é chamado após cada lote. As linhas são
+    gravadas com os gatilhos suspensos e os agregados dos meses delas são
+    refeitos depois. Linhas de meses já arquivados levantam ValueError antes
+    de qualquer gravação, ou são descartadas com ``ignorar_arquivadas``.
+    """
+    linhas = list(preparar_metricas(df, usuario).itertuples(index=False, name=None))
+    limite = arquivamento.limite_arquivado(conn, 'snapshots')
+    if limite:
+        # (usuario, influencer, data, ...): data é o terceiro campo
+        recentes = [linha for linha in linhas if (linha[2] or '') >= limite]
+        if len(recentes) < len(linhas) and not ignorar_arquivadas:
+            raise ValueError(f"{len(linhas) - len(recentes)} linha(s) de meses já arquivados (antes de "
+                             f"{limite[:10]}); remova-as da planilha ou descarte-as com ignorar_arquivadas.")
+        linhas = recentes
+
+    # BEGIN IMMEDIATE não pode abrir dentro de outra transação; o "with conn" já as confirmava
+    conn.commit()
+    with conn:
+        # IMMEDIATE: ninguém grava snapshots entre remover e recriar os gatilhos
+        conn.execute("BEGIN IMMEDIATE")
+        cursor = conn.cursor()
+        with rollups.gatilhos_suspensos(cursor):
+            gravadas = _gravar_em_lotes(conn, db.UPSERT_SNAPSHOT, linhas, lote, progresso)
+        rollups.reconstruir_rollups(cursor, {(u, i, d[:7]) for u, i, d, *_ in linhas if d})
+    return gravadas
+
+
+def importar_produtos(conn, df, lote=DEFAULT_LOTE, progresso=None):
+    """Importa produtos para ``produtos_live``, ignorando os que já existem; retorna os inseridos."""
+    linhas = [(i, n, v, d, i, d, n) for i, n, v, d in preparar_produtos(df).itertuples(index=False, name=None)]
+    with conn:
+        return _gravar_em_lotes(conn, INSERT_PRODUTO, linhas, lote, progresso)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Importação em massa de métricas e produtos.")
+    parser.add_argument("--db", default=db.DB_PATH, help="Caminho do banco SQLite.")
+    parser.add_argument("--lote", type=int, default=DEFAULT_LOTE)
+    parser.add_argument("--formato", choices=["csv", "xlsx", "parquet"],
+                        help="Força o formato em vez de deduzir pela extensão.")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    p_met = sub.add_parser("metricas", help="Importa métricas de influencers.")
+    p_met.add_argument("arquivo")
+    p_met.add_argument("--usuario", help="Usuário dono dos dados, se o arquivo não tiver a coluna.")
+    p_met.add_argument("--ignorar-arquivadas", action="store_true",
+                       help="Descarta as linhas de meses já movidos para o arquivo em Parquet.")
+
+    p_prod = sub.add_parser("produtos", help="Importa produtos ganhos em live.")
+    p_prod.add_argument("arquivo")
+
+    args = parser.parse_args(argv)
+
+    def progresso(feitos, total):
+        print(f"\r{feitos}/{total} linhas", end="", file=sys.stderr, flush=True)
+
+    conn = db.connect(args.db)
+    db.preparar(conn)
+
+    df = ler_arquivo(args.arquivo, args.formato)
+    if args.comando == "metricas":
+        try:
+            total = importar_metricas(conn, df, args.usuario, args.lote, progresso, args.ignorar_arquivadas)
+        except ValueError as erro:
+            parser.error(str(erro))
+    else:
+        total = importar_produtos(conn, df, args.lote, progresso)
+    print(f"\n{total} linhas gravadas.", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,322 @@
+"""Monitor de lives: série de espectadores e curtidas por minuto.
+
+Em vez de recarregar a página e ler o DOM, cada live acompanhada fica numa
+página do ``BrowserPool`` (com vídeo e imagens bloqueados) e os números são
+lidos das mensagens que a própria página recebe do TikTok: os frames do
+WebSocket do webcast e as respostas de ``/webcast/im/fetch`` (protobuf) e
+``/webcast/room/...`` (JSON). Como nada é renderizado de novo, um único
+processo acompanha dezenas de lives com pouca CPU.
+
+As leituras são agregadas por minuto (``SerieMinuto``) e gravadas em lote
+na tabela ``serie_live`` a cada ``intervalo_gravacao`` segundos. Perfis
+que não estão ao vivo são verificados de novo a cada
+``intervalo_verificacao``.
+
+O protobuf do webcast não é público; os números de campo usados aqui
+(``CAMPO_*``) seguem os clientes abertos do TikTok Live e podem precisar de
+ajuste se o TikTok mudar o formato.
+
+Uso::
+
+    python coletor.py lives @influencer1 @influencer2
+    python coletor.py lives --usuario admin        # influencers da fila de coleta
+"""
+import asyncio
+import gzip
+import logging
+import re
+import time
+from datetime import datetime
+
+from . import db
+from .scraper import LIVE_URL, BrowserPool
+
+DEFAULT_MAX_LIVES = 30
+DEFAULT_INTERVALO_GRAVACAO = 15
+DEFAULT_INTERVALO_VERIFICACAO = 600
+# Sem nenhuma mensagem nesse tempo, o perfil não está ao vivo (ou a live acabou)
+ESPERA_INICIO = 45
+SILENCIO_MAXIMO = 300
+INTERVALO_CHECAGEM = 5
+
+# WebcastPushFrame: payload_encoding (6) e payload (8); WebcastResponse: messages (1);
+# Message: method (1) e payload (2)
+CAMPO_FRAME_CODIFICACAO, CAMPO_FRAME_PAYLOAD = 6, 8
+CAMPO_RESPOSTA_MENSAGENS = 1
+CAMPO_MENSAGEM_METODO, CAMPO_MENSAGEM_PAYLOAD = 1, 2
+# WebcastRoomUserSeqMessage.total, WebcastLikeMessage.total, WebcastControlMessage.action
+CAMPO_ESPECTADORES = 3
+CAMPO_TOTAL_CURTIDAS = 3
+CAMPO_ACAO_CONTROLE = 2
+ACAO_LIVE_ENCERRADA = 3
+
+# O vídeo da live vem por fetch/XHR (FLV/HLS), que o modo enxuto não bloqueia sozinho
+_VIDEO_RE = re.compile(r"\.(flv|m3u8|ts)(\?|$)|/stage/|pull-(flv|hls)")
+
+logger = logging.getLogger(__name__)
+
+
+def _varint(buf, pos):
+    resultado = deslocamento = 0
+    while True:
+        byte = buf[pos]
+        pos += 1
+        resultado |= (byte & 0x7F) << deslocamento
+        if not byte & 0x80:
+            return resultado, pos
+        deslocamento += 7
+
+
+def campos_protobuf(buf):
+    """Decodifica uma mensagem protobuf sem esquema: número do campo -> lista de valores.
+
+    Varints e fixos viram ``int``; campos de tamanho variável ficam como
+    ``bytes`` (string, mensagem aninhada ou repetidos compactados).
+    """
+    campos = {}
+    pos = 0
+    while pos < len(buf):
+        chave, pos = _varint(buf, pos)
+        numero, tipo = chave >> 3, chave & 7
+        if tipo == 0:
+            valor, pos = _varint(buf, pos)
+        elif tipo == 1:
+            valor, pos = int.from_bytes(buf[pos:pos + 8], 'little'), pos + 8
+        elif tipo == 2:
+            tamanho, pos = _varint(buf, pos)
+            valor, pos = bytes(buf[pos:pos + tamanho]), pos + tamanho
+        elif tipo == 5:
+            valor, pos = int.from_bytes(buf[pos:pos + 4], 'little'), pos + 4
+        else:
+            raise ValueError(f"Tipo de campo protobuf não suportado: {tipo}")
+        if pos > len(buf):
+            raise ValueError("Mensagem protobuf truncada.")
+        campos.setdefault(numero, []).append(valor)
+    return campos
+
+
+def mensagens_do_webcast(dados, frame=True):
+    """(método, payload) de cada mensagem de um frame do WebSocket ou de uma resposta do ``im/fetch``."""
+    if frame:
+        campos = campos_protobuf(dados)
+        dados = campos.get(CAMPO_FRAME_PAYLOAD, [b''])[0]
+        if campos.get(CAMPO_FRAME_CODIFICACAO, [b''])[0] == b'gzip':
+            dados = gzip.decompress(dados)
+    for mensagem in campos_protobuf(dados).get(CAMPO_RESPOSTA_MENSAGENS, []):
+        campos = campos_protobuf(mensagem)
+        metodo = campos.get(CAMPO_MENSAGEM_METODO, [b''])[0]
+        yield metodo.decode('utf-8', 'replace'), campos.get(CAMPO_MENSAGEM_PAYLOAD, [b''])[0]
+
+
+def leitura_das_mensagens(mensagens):
+    """Resume as mensagens em {'espectadores', 'curtidas', 'encerrada'} (só as chaves vistas)."""
+    leitura = {}
+    for metodo, payload in mensagens:
+        if metodo == 'WebcastRoomUserSeqMessage':
+            valores = campos_protobuf(payload).get(CAMPO_ESPECTADORES)
+            if valores:
+                leitura['espectadores'] = valores[-1]
+        elif metodo == 'WebcastLikeMessage':
+            valores = campos_protobuf(payload).get(CAMPO_TOTAL_CURTIDAS)
+            if valores:
+                leitura['curtidas'] = max(leitura.get('curtidas', 0), valores[-1])
+        elif metodo == 'WebcastControlMessage':
+            if ACAO_LIVE_ENCERRADA in campos_protobuf(payload).get(CAMPO_ACAO_CONTROLE, []):
+                leitura['encerrada'] = True
+    return leitura
+
+
+def leitura_do_json(dados):
+    """Procura ``user_count`` e ``like_count`` nas respostas JSON da sala (``/webcast/room/...``)."""
+    leitura = {}
+    pilha = [dados]
+    while pilha:
+        atual = pilha.pop()
+        if isinstance(atual, dict):
+            if isinstance(atual.get('user_count'), int):
+                leitura['espectadores'] = atual['user_count']
+            if isinstance(atual.get('like_count'), int):
+                leitura['curtidas'] = atual['like_count']
+            pilha.extend(atual.values())
+        elif isinstance(atual, list):
+            pilha.extend(atual)
+    return leitura
+
+
+class SerieMinuto:
+    """Agrega leituras por (influencer, minuto) até serem drenadas para o banco."""
+
+    def __init__(self, clock=time.time):
+        self._clock = clock
+        self._minutos = {}  # (influencer, minuto) -> [espectadores, espectadores_max, curtidas, amostras]
+
+    def registrar(self, influencer, espectadores=None, curtidas=None):
+        minuto = datetime.fromtimestamp(self._clock()).strftime("%Y-%m-%d %H:%M")
+        atual = self._minutos.setdefault((influencer, minuto), [None, None, None, 0])
+        if espectadores is not None:
+            atual[0] = espectadores
+            atual[1] = espectadores if atual[1] is None else max(atual[1], espectadores)
+        if curtidas is not None:
+            atual[2] = curtidas if atual[2] is None else max(atual[2], curtidas)
+        atual[3] += 1
+
+    def drenar(self, tudo=False):
+        """Linhas para ``db.gravar_serie_live``: os minutos já fechados (ou todos, com ``tudo``)."""
+        agora = datetime.fromtimestamp(self._clock()).strftime("%Y-%m-%d %H:%M")
+        prontos = [chave for chave in self._minutos if tudo or chave[1] < agora]
+        return [(*chave, *self._minutos.pop(chave)) for chave in sorted(prontos, key=lambda c: c[1])]
+
+
+class MonitorLives:
+    """Acompanha várias lives num só navegador e grava a série por minuto."""
+
+    def __init__(self, conn, max_lives=DEFAULT_MAX_LIVES, intervalo_gravacao=DEFAULT_INTERVALO_GRAVACAO,
+                 intervalo_verificacao=DEFAULT_INTERVALO_VERIFICACAO, clock=time.time):
+        self.conn = conn
+        self.max_lives = max_lives
+        self.intervalo_gravacao = intervalo_gravacao
+        self.intervalo_verificacao = intervalo_verificacao
+        self.serie = SerieMinuto(clock)
+        self._clock = clock
+        self._ultima_leitura = {}
+        self._encerradas = set()
+
+    def _registrar(self, influencer, leitura):
+        if leitura.get('encerrada'):
+            self._encerradas.add(influencer)
+        if 'espectadores' in leitura or 'curtidas' in leitura:
+            self.serie.registrar(influencer, leitura.get('espectadores'), leitura.get('curtidas'))
+            self._ultima_leitura[influencer] = self._clock()
+
+    def _processar_frame(self, influencer, payload):
+        if isinstance(payload, str):
+            return  # Frames de texto são só heartbeat/controle da conexão
+        try:
+            self._registrar(influencer, leitura_das_mensagens(mensagens_do_webcast(payload)))
+        except (ValueError, IndexError, OSError, EOFError) as e:
+            logger.debug("Frame do webcast ignorado (%s): %s", influencer, e)
+
+    async def _processar_resposta(self, influencer, resposta):
+        url = resposta.url
+        try:
+            if "/webcast/im/fetch" in url:
+                corpo = await resposta.body()
+                self._registrar(influencer, leitura_das_mensagens(mensagens_do_webcast(corpo, frame=False)))
+            elif "/webcast/room/" in url and "json" in (resposta.headers.get("content-type") or ""):
+                self._registrar(influencer, leitura_do_json(await resposta.json()))
+        except Exception as e:
+            logger.debug("Resposta do webcast ignorada (%s): %s", influencer, e)
+
+    async def assistir(self, pool, username, parar):
+        """Acompanha a live até ela acabar; retorna False se o perfil não estava ao vivo."""
+        from playwright.async_api import Error as PlaywrightError
+
+        influencer = "@" + username
+        self._encerradas.discard(influencer)
+        self._ultima_leitura.pop(influencer, None)
+        tarefas = set()
+
+        def ao_websocket(ws):
+            ws.on("framereceived", lambda payload: self._processar_frame(influencer, payload))
+
+        def ao_responder(resposta):
+            if "/webcast/" in resposta.url:
+                tarefa = asyncio.ensure_future(self._processar_resposta(influencer, resposta))
+                tarefas.add(tarefa)
+                tarefa.add_done_callback(tarefas.discard)
+
+        async def abortar(route):
+            await route.abort()
+
+        async with pool.page() as page:
+            page.on("websocket", ao_websocket)
+            page.on("response", ao_responder)
+            await page.route(_VIDEO_RE, abortar)
+            inicio = self._clock()
+            try:
+                await page.goto(LIVE_URL.format(username=username), wait_until="domcontentloaded")
+                while not parar.is_set() and influencer not in self._encerradas:
+                    ultima = self._ultima_leitura.get(influencer)
+                    if ultima is None and self._clock() - inicio > ESPERA_INICIO:
+                        return False
+                    if ultima is not None and self._clock() - ultima > SILENCIO_MAXIMO:
+                        break
+                    await asyncio.sleep(INTERVALO_CHECAGEM)
+                return True
+            finally:
+                page.remove_listener("websocket", ao_websocket)
+                page.remove_listener("response", ao_responder)
+                try:
+                    if not page.is_closed():
+                        await page.unroute(_VIDEO_RE, abortar)
+                        # Sai da live para fechar o WebSocket antes de devolver a página ao pool
+                        await page.goto("about:blank")
+                except PlaywrightError as e:
+                    # Página travada: fechada, o pool repõe outra em vez de reaproveitá-la.
+                    # O erro original (se houver) continua subindo.
+                    logger.warning("Falha ao liberar a página da live de %s: %s", influencer, e)
+                    try:
+                        await page.close()
+                    except PlaywrightError:
+                        pass
+                finally:
+                    await asyncio.gather(*tarefas, return_exceptions=True)
+
+    async def _vigiar(self, pool, username, parar):
+        while not parar.is_set():
+            try:
+                if await self.assistir(pool, username, parar):
+                    logger.info("Live de @%s encerrada", username)
+            except Exception as e:
+                logger.warning("Falha ao acompanhar a live de @%s: %s", username, e)
+            try:
+                await asyncio.wait_for(parar.wait(), self.intervalo_verificacao)
+            except asyncio.TimeoutError:
+                pass
+
+    def gravar(self, tudo=False):
+        linhas = self.serie.drenar(tudo)
+        if linhas:
+            db.gravar_serie_live(self.conn, linhas)
+        return len(linhas)
+
+    async def _gravar_periodicamente(self, parar):
+        while not parar.is_set():
+            try:
+                await asyncio.wait_for(parar.wait(), self.intervalo_gravacao)
+            except asyncio.TimeoutError:
+                pass
+            try:
+                self.gravar()
+            except Exception as e:
+                logger.warning("Falha ao gravar a série das lives: %s", e)
+
+    async def executar(self, usernames, parar=None):
+        """Vigia os perfis até ``parar`` (``asyncio.Event``) ser sinalizado.
+
+        No máximo ``max_lives`` páginas ficam abertas; os demais perfis
+        esperam uma página livre para serem verificados.
+        """
+        parar = parar or asyncio.Event()
+        usernames = list(dict.fromkeys(u.strip().lstrip('@') for u in usernames if u.strip()))
+        async with BrowserPool(size=max(1, min(self.max_lives, len(usernames)))) as pool:
+            try:
+                await asyncio.gather(self._gravar_periodicamente(parar),
+                                     *(self._vigiar(pool, u, parar) for u in usernames))
+            finally:
+                self.gravar(tudo=True)
+
+
+def influencers_da_fila(conn, usuario):
+    return [row[0] for row in conn.execute(
+        "SELECT influencer FROM fila_coleta WHERE usuario = ? ORDER BY influencer", (usuario,))]
+
+
+def executar_monitor(conn, usernames, max_lives=DEFAULT_MAX_LIVES,
+                     intervalo_verificacao=DEFAULT_INTERVALO_VERIFICACAO):
+    """Versão síncrona de ``MonitorLives.executar``; Ctrl+C encerra gravando o que faltar."""
+    monitor = MonitorLives(conn, max_lives, intervalo_verificacao=intervalo_verificacao)
+    try:
+        asyncio.run(monitor.executar(usernames))
+    except KeyboardInterrupt:
+        monitor.gravar(tudo=True)
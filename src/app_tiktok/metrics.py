@@ -0,0 +1,165 @@
+"""Histogramas de tempo das fases do scraping e do painel.
+
+Cada trecho medido com ``medir('fase')`` soma uma observação ao histograma
+da fase no registro do processo. As fases usadas no projeto:
+
+* scraping: ``scrape_navegador`` (abrir o Chromium), ``scrape_goto``,
+  ``scrape_seletor`` (espera dos contadores), ``scrape_parse`` e
+  ``scrape_http`` (caminho rápido, download + parse);
+* painel: ``db_gravacao`` (insert + commit), ``db_consulta``,
+  ``pandas_transformacao`` e ``grafico_serializacao``.
+
+Os dados saem no formato texto do Prometheus (``para_prometheus``), em
+JSON (``para_json``/``gravar_json``) ou por HTTP com ``servir(porta)``
+(``/metrics`` e ``/metrics.json``). O registro é por processo: cada coletor
+do pool expõe o seu.
+"""
+import bisect
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Limites superiores dos buckets, em segundos (o último, +Inf, é implícito)
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+NOME_METRICA = "app_tiktok_fase_segundos"
+
+
+class Histograma:
+    """Contagem por bucket, soma e total de observações."""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = tuple(buckets)
+        self.contagens = [0] * (len(self.buckets) + 1)
+        self.soma = 0.0
+        self.total = 0
+
+    def observar(self, valor):
+        self.contagens[bisect.bisect_left(self.buckets, valor)] += 1
+        self.soma += valor
+        self.total += 1
+
+    def quantil(self, q):
+        """Estimativa do quantil ``q`` por interpolação dentro do bucket (como o Prometheus)."""
+        if not self.total:
+            return None
+        alvo = q * self.total
+        acumulado = 0
+        for i, contagem in enumerate(self.contagens):
+            if acumulado + contagem >= alvo and contagem:
+                inicio = self.buckets[i - 1] if i > 0 else 0.0
+                if i == len(self.buckets):
+                    return inicio  # Acima do último limite não há como interpolar
+                return inicio + (self.buckets[i] - inicio) * (alvo - acumulado) / contagem
+            acumulado += contagem
+        return self.buckets[-1]
+
+
+class Registro:
+    """Histogramas por fase, seguro entre threads."""
+
+    def __init__(self, buckets=BUCKETS, clock=time.perf_counter):
+        self.buckets = buckets
+        self._clock = clock
+        self._histogramas = {}
+        self._lock = threading.Lock()
+
+    def observar(self, fase, segundos):
+        with self._lock:
+            histograma = self._histogramas.get(fase)
+            if histograma is None:
+                histograma = self._histogramas[fase] = Histograma(self.buckets)
+            histograma.observar(segundos)
+
+    @contextmanager
+    def medir(self, fase):
+        """Mede o bloco ``with`` (inclusive quando ele levanta exceção)."""
+        inicio = self._clock()
+        try:
+            yield
+        finally:
+            self.observar(fase, self._clock() - inicio)
+
+    def limpar(self):
+        with self._lock:
+            self._histogramas.clear()
+
+    def resumo(self):
+        """Dicionário fase -> contagem, soma, média, p50/p95/p99 e buckets acumulados."""
+        with self._lock:
+            resumo = {}
+            for fase, h in sorted(self._histogramas.items()):
+                acumulados, total = {}, 0
+                for limite, contagem in zip([*map(str, h.buckets), '+Inf'], h.contagens):
+                    total += contagem
+                    acumulados[limite] = total
+                resumo[fase] = {'contagem': h.total, 'soma': h.soma, 'media': h.soma / h.total,
+                                'p50': h.quantil(0.5), 'p95': h.quantil(0.95), 'p99': h.quantil(0.99),
+                                'buckets': acumulados}
+            return resumo
+
+    def para_prometheus(self):
+        """Texto no formato de exposição do Prometheus (versão 0.0.4)."""
+        linhas = [f"# HELP {NOME_METRICA} Duração das fases do scraping e do painel.",
+                  f"# TYPE {NOME_METRICA} histogram"]
+        for fase, dados in self.resumo().items():
+            for limite, acumulado in dados['buckets'].items():
+                linhas.append(f'{NOME_METRICA}_bucket{{fase="{fase}",le="{limite}"}} {acumulado}')
+            linhas.append(f'{NOME_METRICA}_sum{{fase="{fase}"}} {dados["soma"]}')
+            linhas.append(f'{NOME_METRICA}_count{{fase="{fase}"}} {dados["contagem"]}')
+        return "\n".join(linhas) + "\n"
+
+    def para_json(self):
+        return json.dumps(self.resumo(), indent=2)
+
+
+registro = Registro()
+medir = registro.medir
+observar = registro.observar
+
+
+def gravar_json(caminho, registro=registro):
+    """Grava o resumo em ``caminho`` (substituindo o arquivo de uma vez)."""
+    temporario = f"{caminho}.tmp"
+    with open(temporario, "w", encoding="utf-8") as f:
+        f.write(registro.para_json())
+    os.replace(temporario, caminho)
+
+
+def _handler(registro):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == "/metrics":
+                corpo, tipo = registro.para_prometheus(), "text/plain; version=0.0.4; charset=utf-8"
+            elif self.path == "/metrics.json":
+                corpo, tipo = registro.para_json(), "application/json"
+            else:
+                self.send_error(404)
+                return
+            corpo = corpo.encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", tipo)
+            self.send_header("Content-Length", str(len(corpo)))
+            self.end_headers()
+            self.wfile.write(corpo)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+_servidores = {}
+_servidores_lock = threading.Lock()
+
+
+def servir(porta, endereco="0.0.0.0", registro=registro):
+    """Expõe o registro por HTTP numa thread; chamadas repetidas na mesma porta não fazem nada."""
+    with _servidores_lock:
+        if porta not in _servidores:
+            servidor = ThreadingHTTPServer((endereco, porta), _handler(registro))
+            threading.Thread(target=servidor.serve_forever, name=f"metricas-{porta}", daemon=True).start()
+            _servidores[porta] = servidor
+        return _servidores[porta]
@@ -0,0 +1,157 @@
+"""Conversão dos contadores exibidos pelo TikTok.
+
+Aceita os formatos das duas localidades que aparecem no app: separador
+decimal ``.`` (en-US, "1.2M", "12,345") ou ``,`` (pt-BR, "1,2 mi",
+"12.345"), com os sufixos K/M/B e "mil"/"mi"/"bi". Quando há um único
+separador seguido de exatamente três dígitos e nenhum sufixo, ele é lido
+como separador de milhar ("1.234" e "1,234" valem 1234).
+
+Os formatos comuns (só dígitos, ou dígitos com ``.``/``,`` e um sufixo) são
+lidos com operações de string, sem expressão regular; a regex fica para
+os casos raros, como espaços entre os dígitos.
+"""
+import re
+
+MULTIPLICADORES = {
+    '': 1,
+    'k': 10 ** 3, 'mil': 10 ** 3,
+    'm': 10 ** 6, 'mi': 10 ** 6, 'mln': 10 ** 6,
+    'b': 10 ** 9, 'bi': 10 ** 9,
+}
+
+# Espaços usados como separador de milhar (inclusive os não separáveis)
+_ESPACOS = " \u00a0\u202f"
+# Número com separadores ("1.234.567", "1,2") e sufixo opcional; "mil" antes de "mi".
+# Só usa sintaxe aceita também pelo RE2, usado pelo pandas nas strings do Arrow.
+_CONTADOR_RE = re.compile(
+    rf"^\s*(?P<numero>\d+(?:[.,{_ESPACOS}]\d+)*)\s*(?P<sufixo>mil|mln|mi|bi|[kmb])?\.?\s*$",
+    re.IGNORECASE,
+)
+_SEM_ESPACOS = str.maketrans('', '', _ESPACOS)
+# A mesma regex para o RE2 do Arrow, onde ``\s`` não inclui os espaços não separáveis
+_CONTADOR_RE2 = _CONTADOR_RE.pattern.replace(r"\s", rf"[\s{_ESPACOS}]")
+
+
+def _separar(numero, tem_sufixo):
+    """Divide o número em (parte inteira, parte decimal), só com dígitos."""
+    numero = numero.translate(_SEM_ESPACOS)
+    ponto, virgula = numero.rfind('.'), numero.rfind(',')
+    if ponto >= 0 and virgula >= 0:
+        decimal = max(ponto, virgula)
+    elif ponto >= 0 or virgula >= 0:
+        posicao = max(ponto, virgula)
+        separador = numero[posicao]
+        unico = numero.count(separador) == 1
+        decimal = posicao if unico and (tem_sufixo or len(numero) - posicao - 1 != 3) else -1
+    else:
+        decimal = -1
+
+    if decimal < 0:
+        return numero.replace('.', '').replace(',', ''), ''
+    inteiro = numero[:decimal].replace('.', '').replace(',', '')
+    return inteiro, numero[decimal + 1:]
+
+
+def convert_to_int(text):
+    """Converte texto do TikTok (ex: '1.2M', '1,2 mi', '12.345') para inteiro.
+
+    Levanta ``ValueError`` se o texto não for um contador.
+    """
+    text = text if type(text) is str else str(text)
+    if text.isdigit() and text.isascii():
+        return int(text)
+    numero = text.strip().lower()
+    if numero[-1:] == '.':
+        numero = numero[:-1]
+    sufixo = ''
+    # O ponto final vem colado ao sufixo; depois de espaços, só quando não há sufixo
+    if not numero[-1:].isdecimal() and not numero[-1:].isspace():
+        sufixo = (numero[-3:] if numero[-3:] in ('mil', 'mln') else
+                  numero[-2:] if numero[-2:] in ('mi', 'bi') else numero[-1:])
+        numero = numero[:-len(sufixo)]
+    numero = numero.rstrip()
+    partes = numero.replace(',', '.').split('.')
+    digitos = ''.join(partes)
+    if sufixo not in MULTIPLICADORES or not digitos.isdecimal() or '' in partes:
+        return _convert_com_regex(text)
+    # Mesmas regras de ``_separar``: o decimal, quando existe, é sempre o último separador
+    if len(partes) > 1 and (('.' in numero and ',' in numero)
+                            or (len(partes) == 2 and (sufixo or len(partes[1]) != 3))):
+        return int(digitos) * MULTIPLICADORES[sufixo] // 10 ** len(partes[-1])
+    return int(digitos) * MULTIPLICADORES[sufixo]
+
+
+def _convert_com_regex(text):
+    """``convert_to_int`` para o que o caminho rápido não cobre (espaços entre os dígitos, textos inválidos)."""
+    match = _CONTADOR_RE.match(text)
+    if match is None:
+        raise ValueError(f"Contador inválido: {text!r}")
+    sufixo = (match.group('sufixo') or '').lower()
+    inteiro, fracao = _separar(match.group('numero'), bool(sufixo))
+    # Aritmética inteira: '1.2M' é 12 * 10**6 // 10, sem arredondamento de float
+    return int(inteiro + fracao) * MULTIPLICADORES[sufixo] // 10 ** len(fracao)
+
+
+def convert_series_to_int(serie, errors='raise'):
+    """Versão vetorizada de ``convert_to_int`` para uma Series inteira.
+
+    Valores numéricos passam direto. Com ``errors='coerce'`` os textos
+    inválidos viram ``<NA>``; com ``'raise'`` (padrão) levantam
+    ``ValueError`` citando alguns deles. Retorna uma Series ``Int64``.
+    """
+    # Importados aqui: o scraper usa só ``convert_to_int`` e não precisa carregar o pandas
+    import numpy as np
+    import pandas as pd
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    if pd.api.types.is_numeric_dtype(serie):
+        return serie.round().astype('Int64')
+
+    def inteiros(textos):
+        return pd.Series(pc.cast(textos, pa.int64()), index=serie.index, dtype=pd.ArrowDtype(pa.int64())).astype(
+            'Int64')
+
+    def numpy(array, vazio):
+        return pc.fill_null(array, vazio).to_numpy(zero_copy_only=False)
+
+    # Tudo roda em funções do Arrow sobre a coluna inteira, sem Python por elemento
+    texto = pa.array(serie.astype(pd.ArrowDtype(pa.string())))
+    if pc.all(pc.ascii_is_decimal(texto)).as_py() is not False:
+        return inteiros(texto)
+
+    texto = pc.utf8_lower(texto)
+    validos = pc.match_substring_regex(texto, _CONTADOR_RE2)
+    if errors == 'raise' and not pc.all(pc.or_kleene(validos, pc.is_null(texto))).as_py():
+        invalidos = ~numpy(validos, True)
+        raise ValueError(f"Contadores inválidos: {serie[invalidos].head(5).tolist()!r}")
+
+    texto = pc.if_else(validos, pc.utf8_trim_whitespace(texto), None)
+    texto = pc.if_else(pc.ends_with(texto, '.'), pc.utf8_slice_codeunits(texto, 0, -1), texto)
+    # Já validado: o sufixo, se houver, é o fim do texto e "mil"/"mi"/"m" não se confundem
+    sufixos = {10 ** 3: ('k', 'mil'), 10 ** 6: ('m', 'mi', 'mln'), 10 ** 9: ('b', 'bi')}
+    termina = [np.logical_or.reduce([numpy(pc.ends_with(texto, sufixo), False) for sufixo in grupo])
+               for grupo in sufixos.values()]
+    multiplicador = np.select(termina, list(sufixos), default=1)
+
+    numero = pc.utf8_rtrim_whitespace(pc.utf8_rtrim(texto, 'kmbiln'))
+    for espaco in _ESPACOS:
+        numero = pc.replace_substring(numero, espaco, '')
+    digitos = pc.replace_substring(pc.replace_substring(numero, '.', ''), ',', '')
+
+    # Mesmas regras de ``_separar``: o decimal, quando existe, é sempre o último separador
+    separadores = numpy(pc.subtract(pc.binary_length(numero), pc.binary_length(digitos)), 0)
+    invertido = pc.utf8_reverse(numero)
+    ponto, virgula = numpy(pc.find_substring(invertido, '.'), -1), numpy(pc.find_substring(invertido, ','), -1)
+    ambos = (ponto >= 0) & (virgula >= 0)
+    casas = np.where(ambos, np.minimum(ponto, virgula), np.maximum(ponto, virgula))
+    decimal = ambos | ((separadores == 1) & ((multiplicador != 1) | (casas != 3)))
+
+    # Aritmética inteira, como na versão escalar: uma multiplicação e uma divisão por elemento
+    return inteiros(digitos) * multiplicador // 10 ** np.where(decimal, casas, 0)
+
+
+def estimate_earnings(views):
+    """Estimativa simples de ganhos baseada em visualizações."""
+    # Ajuste conforme sua lógica
+    return views * 0.01
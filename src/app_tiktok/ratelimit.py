@@ -0,0 +1,67 @@
+"""Limitação de taxa (token bucket) por host para o scraping assíncrono.
+
+Um mesmo limitador atende todo o processo: cada chamada de
+``scrape_profiles`` roda no seu próprio event loop (e, no painel, na sua
+própria thread), então o estado do balde fica sob um ``threading.Lock``
+e a espera é só um ``asyncio.sleep`` no loop de quem pediu.
+"""
+import asyncio
+import threading
+import time
+from urllib.parse import urlsplit
+
+DEFAULT_RATE = 2.0
+DEFAULT_BURST = 4
+
+
+class TokenBucket:
+    """Libera até ``rate`` requisições por segundo, com rajadas de até ``capacity``."""
+
+    def __init__(self, rate=DEFAULT_RATE, capacity=DEFAULT_BURST):
+        if rate <= 0:
+            raise ValueError("A taxa precisa ser positiva.")
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self):
+        # A ficha é reservada na hora (o saldo pode ficar negativo) e quem pediu espera a vez dela
+        with self._lock:
+            self._refill()
+            self._tokens -= 1
+            espera = -self._tokens / self.rate
+        if espera > 0:
+            await asyncio.sleep(espera)
+
+
+class HostRateLimiter:
+    """Mantém um ``TokenBucket`` independente para cada host acessado."""
+
+    def __init__(self, rate=DEFAULT_RATE, capacity=DEFAULT_BURST):
+        self.rate = rate
+        self.capacity = capacity
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    async def acquire(self, url):
+        host = urlsplit(url).netloc
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = self._buckets[host] = TokenBucket(self.rate, self.capacity)
+        await bucket.acquire()
+
+
+_limitador = HostRateLimiter()
+
+
+def limitador_padrao():
+    """``HostRateLimiter`` compartilhado por todas as buscas do processo."""
+    return _limitador
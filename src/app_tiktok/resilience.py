@@ -0,0 +1,147 @@
+"""Retentativas com backoff exponencial e disjuntor para o scraping.
+
+Cada falha é classificada antes de decidir o que fazer:
+
+* permanente (perfil inexistente, HTTP 404, erro de parsing): não adianta
+  tentar de novo;
+* bloqueio (captcha, HTTP 403/429): o TikTok está recusando o tráfego;
+* transitória (timeouts, rede, erros do navegador): vale outra tentativa.
+
+Bloqueios e falhas transitórias consecutivas abrem o ``Disjuntor``, que
+pausa todas as buscas do lote por um tempo e depois libera uma única
+sondagem antes de voltar ao normal.
+"""
+import asyncio
+import random
+import sys
+import time
+from dataclasses import dataclass
+
+PERMANENTE = 'permanente'
+BLOQUEIO = 'bloqueio'
+TRANSITORIA = 'transitoria'
+
+
+class PerfilInexistenteError(Exception):
+    """O perfil não existe (ou foi banido)."""
+
+
+class BloqueioError(Exception):
+    """O TikTok respondeu com captcha ou recusou a requisição."""
+
+
+def classificar_erro(erro):
+    """``PERMANENTE``, ``BLOQUEIO`` ou ``TRANSITORIA``."""
+    if isinstance(erro, PerfilInexistenteError):
+        return PERMANENTE
+    if isinstance(erro, BloqueioError):
+        return BLOQUEIO
+    # Se o requests nem foi importado, o erro não pode ser um HTTPError dele
+    requests = sys.modules.get('requests')
+    if requests is not None and isinstance(erro, requests.HTTPError) and erro.response is not None:
+        status = erro.response.status_code
+        if status in (403, 429):
+            return BLOQUEIO
+        if status >= 500:
+            return TRANSITORIA
+        return PERMANENTE
+    if isinstance(erro, (ValueError, KeyError, TypeError)):
+        return PERMANENTE
+    return TRANSITORIA
+
+
+@dataclass
+class PoliticaRetentativa:
+    """Número de tentativas e backoff exponencial com jitter ("full jitter")."""
+    tentativas: int = 3
+    base_segundos: float = 1.0
+    maximo_segundos: float = 20.0
+
+    def atraso(self, tentativa, aleatorio=random.random):
+        """Espera antes da tentativa ``tentativa + 1`` (a primeira é a 0)."""
+        return aleatorio() * min(self.maximo_segundos, self.base_segundos * 2 ** tentativa)
+
+
+class Disjuntor:
+    """Abre após ``limite_falhas`` falhas seguidas e pausa as buscas por ``pausa_segundos``.
+
+    Passada a pausa, só uma busca (a sondagem) é liberada; se ela der certo o
+    disjuntor fecha, se falhar ele abre de novo. Falhas permanentes não
+    contam. Pode ser reaproveitado entre lotes.
+    """
+
+    def __init__(self, limite_falhas=5, pausa_segundos=120, clock=time.monotonic):
+        self.limite_falhas = limite_falhas
+        self.pausa_segundos = pausa_segundos
+        self._clock = clock
+        self._falhas = 0
+        self._aberto_ate = None
+        self._sondando = False
+        self.aberturas = 0
+
+    @property
+    def estado(self):
+        if self._aberto_ate is None:
+            return 'fechado'
+        return 'aberto' if self._clock() < self._aberto_ate else 'meio_aberto'
+
+    async def aguardar(self):
+        """Espera até o disjuntor permitir uma nova busca."""
+        while True:
+            estado = self.estado
+            if estado == 'fechado':
+                return
+            if estado == 'aberto':
+                await asyncio.sleep(self._aberto_ate - self._clock())
+            elif self._sondando:
+                await asyncio.sleep(1)
+            else:
+                self._sondando = True
+                return
+
+    def registrar(self, erro=None):
+        """Anota o resultado de uma busca (``erro`` None para sucesso)."""
+        if erro is None:
+            self._falhas = 0
+            self._aberto_ate = None
+            self._sondando = False
+            return
+        if classificar_erro(erro) == PERMANENTE:
+            if self._sondando:
+                # A sondagem chegou ao TikTok, então ele não está bloqueando
+                self.registrar()
+            return
+        self._falhas += 1
+        if self._sondando or self._falhas >= self.limite_falhas:
+            self._sondando = False
+            self._aberto_ate = self._clock() + self.pausa_segundos
+            self.aberturas += 1
+
+
+async def executar_com_retentativas(funcao, politica=None, disjuntor=None, dormir=asyncio.sleep):
+    """Chama ``await funcao()`` até dar certo, esgotar as tentativas ou falhar de vez.
+
+    Retorna (resultado, erro, tentativas); ``erro`` é None em caso de
+    sucesso e, caso contrário, a última exceção.
+    """
+    politica = politica or PoliticaRetentativa()
+    erro = None
+    for tentativa in range(politica.tentativas):
+        if disjuntor is not None:
+            await disjuntor.aguardar()
+        try:
+            resultado = await funcao()
+        except Exception as e:
+            erro = e
+        else:
+            if disjuntor is not None:
+                disjuntor.registrar()
+            return resultado, None, tentativa + 1
+
+        if disjuntor is not None:
+            disjuntor.registrar(erro)
+        if classificar_erro(erro) == PERMANENTE:
+            return None, erro, tentativa + 1
+        if tentativa + 1 < politica.tentativas:
+            await dormir(politica.atraso(tentativa))
+    return None, erro, politica.tentativas
@@ -0,0 +1,284 @@
+"""Agregados diários e mensais dos snapshots, mantidos pelo próprio SQLite.
+
+Para cada influencer, métrica e período a tabela ``rollups`` guarda o
+primeiro e o último valor, mínimo, máximo, soma e número de amostras.
+Gatilhos em ``snapshots`` atualizam os agregados a cada INSERT/UPDATE, de
+modo que o coletor, a importação e o app mantêm tudo em dia sem esforço
+extra. Os gráficos do painel consultam esses agregados em vez das linhas
+brutas. A importação em massa suspende os gatilhos (``gatilhos_suspensos``)
+e recalcula de uma vez só os meses que tocou (``reconstruir_rollups``).
+
+Um INSERT só acrescenta a amostra aos agregados do período. Um UPDATE
+pode trocar ou remover um valor já contado, então os agregados do dia e do
+mês da linha (antes e depois da alteração) são recalculados a partir dos
+snapshots daquele período.
+"""
+import contextlib
+import itertools
+from datetime import timedelta
+
+from . import metrics
+
+# Tamanho do prefixo de ``data`` ('YYYY-MM-DD HH:MM:SS') que identifica o período
+GRANULARIDADES = {'dia': 10, 'mes': 7}
+METRICAS = ('seguidores', 'curtidas', 'visualizacoes', 'ganhos', 'live_curtidas', 'live_visualizacoes')
+# Acima deste intervalo o painel passa dos agregados diários para os mensais
+MAX_DIAS_GRANULARIDADE_DIARIA = 180
+
+
+def _conta(metrica, linha):
+    """Expressão SQL que diz se o valor da métrica conta como amostra."""
+    # Lives zeradas significam "sem live", não uma leitura de zero espectadores
+    if metrica.startswith('live_'):
+        return f"COALESCE({linha}.{metrica}, 0) > 0"
+    return f"{linha}.{metrica} IS NOT NULL"
+
+
+def _sql_granularidades():
+    return " UNION ALL ".join(
+        f"SELECT '{nome}' AS granularidade, {tamanho} AS tamanho" for nome, tamanho in GRANULARIDADES.items())
+
+
+def _sql_gatilho_insert():
+    valores = " UNION ALL ".join(
+        f"SELECT '{metrica}' AS metrica, NEW.{metrica} AS valor, {_conta(metrica, 'NEW')} AS conta"
+        for metrica in METRICAS)
+
+    return f"""
+    CREATE TRIGGER IF NOT EXISTS trg_rollups_insert AFTER INSERT ON snapshots
+    BEGIN
+        INSERT INTO rollups (usuario, influencer, granularidade, periodo, metrica, primeiro, ultimo,
+                             minimo, maximo, soma, amostras, data_primeiro, data_ultimo)
+        SELECT NEW.usuario, NEW.influencer, g.granularidade, substr(NEW.data, 1, g.tamanho), m.metrica,
+               m.valor, m.valor, m.valor, m.valor, m.valor, 1, NEW.data, NEW.data
+        FROM ({_sql_granularidades()}) AS g, ({valores}) AS m
+        WHERE m.conta
+        ON CONFLICT (usuario, influencer, granularidade, periodo, metrica) DO UPDATE SET
+            primeiro = CASE WHEN excluded.data_primeiro <= data_primeiro THEN excluded.primeiro ELSE primeiro END,
+            data_primeiro = MIN(data_primeiro, excluded.data_primeiro),
+            ultimo = CASE WHEN excluded.data_ultimo >= data_ultimo THEN excluded.ultimo ELSE ultimo END,
+            data_ultimo = MAX(data_ultimo, excluded.data_ultimo),
+            minimo = MIN(minimo, excluded.minimo),
+            maximo = MAX(maximo, excluded.maximo),
+            soma = soma + excluded.soma,
+            amostras = amostras + excluded.amostras;
+    END
+    """
+
+
+def _sql_recalculo(linha, condicao):
+    """Comandos que refazem os agregados do dia e do mês de ``linha`` (OLD ou NEW) quando ``condicao``."""
+    periodo = f"substr({linha}.data, 1, g.tamanho)"
+    comandos = [f"""
+        DELETE FROM rollups
+        WHERE {condicao} AND usuario = {linha}.usuario AND influencer = {linha}.influencer
+          AND (granularidade, periodo) IN (SELECT g.granularidade, {periodo} FROM ({_sql_granularidades()}) AS g);
+    """]
+    for metrica in METRICAS:
+        # O primeiro e o último valor vêm das linhas com a menor e a maior data (únicas por influencer)
+        comandos.append(f"""
+        INSERT INTO rollups (usuario, influencer, granularidade, periodo, metrica, primeiro, ultimo,
+                             minimo, maximo, soma, amostras, data_primeiro, data_ultimo)
+        SELECT {linha}.usuario, {linha}.influencer, a.granularidade, a.periodo, '{metrica}',
+               p.{metrica}, u.{metrica}, a.minimo, a.maximo, a.soma, a.amostras, a.data_primeiro, a.data_ultimo
+        FROM (
+            SELECT g.granularidade, {periodo} AS periodo, MIN(s.{metrica}) AS minimo, MAX(s.{metrica}) AS maximo,
+                   SUM(s.{metrica}) AS soma, COUNT(*) AS amostras, MIN(s.data) AS data_primeiro,
+                   MAX(s.data) AS data_ultimo
+            FROM ({_sql_granularidades()}) AS g JOIN snapshots AS s
+              ON s.usuario = {linha}.usuario AND s.influencer = {linha}.influencer
+             AND s.data >= {periodo} AND s.data < {periodo} || '~'
+            WHERE {condicao} AND {_conta(metrica, 's')}
+            GROUP BY g.granularidade
+        ) AS a
+        JOIN snapshots AS p ON p.usuario = {linha}.usuario AND p.influencer = {linha}.influencer
+                           AND p.data = a.data_primeiro
+        JOIN snapshots AS u ON u.usuario = {linha}.usuario AND u.influencer = {linha}.influencer
+                           AND u.data = a.data_ultimo;
+        """)
+    return "".join(comandos)
+
+
+def _sql_gatilho_update():
+    # Os períodos de OLD só mudam se a chave mudou; os de NEW são refeitos depois, então prevalecem
+    chave_mudou = "NOT (OLD.usuario IS NEW.usuario AND OLD.influencer IS NEW.influencer AND OLD.data IS NEW.data)"
+    return f"""
+    CREATE TRIGGER IF NOT EXISTS trg_rollups_update AFTER UPDATE ON snapshots
+    BEGIN
+        {_sql_recalculo('OLD', chave_mudou)}
+        {_sql_recalculo('NEW', '1')}
+    END
+    """
+
+
+def _criar_gatilhos(cursor):
+    cursor.execute(_sql_gatilho_insert())
+    cursor.execute(_sql_gatilho_update())
+
+
+def criar_rollups(cursor):
+    """Cria a tabela ``rollups`` e os gatilhos que a mantêm."""
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS rollups (
+        usuario TEXT,
+        influencer TEXT,
+        granularidade TEXT,
+        periodo TEXT,
+        metrica TEXT,
+        primeiro REAL,
+        ultimo REAL,
+        minimo REAL,
+        maximo REAL,
+        soma REAL,
+        amostras INTEGER,
+        data_primeiro TEXT,
+        data_ultimo TEXT,
+        PRIMARY KEY (usuario, influencer, granularidade, periodo, metrica)
+    ) WITHOUT ROWID
+    """)
+    _criar_gatilhos(cursor)
+
+
+def recriar_gatilhos(cursor):
+    """Troca os gatilhos existentes pelos da versão atual (migração do esquema)."""
+    cursor.execute("DROP TRIGGER IF EXISTS trg_rollups_insert")
+    cursor.execute("DROP TRIGGER IF EXISTS trg_rollups_update")
+    _criar_gatilhos(cursor)
+
+
+@contextlib.contextmanager
+def gatilhos_suspensos(cursor):
+    """Remove os gatilhos de ``snapshots`` durante o bloco e os recria no fim.
+
+    Deve rodar dentro de uma transação já aberta (``BEGIN IMMEDIATE``), para
+    que nenhuma outra conexão grave snapshots sem os gatilhos.
+    """
+    cursor.execute("DROP TRIGGER IF EXISTS trg_rollups_insert")
+    cursor.execute("DROP TRIGGER IF EXISTS trg_rollups_update")
+    try:
+        yield
+    finally:
+        _criar_gatilhos(cursor)
+
+
+def _agregados(colunas, metrica):
+    """Linhas de ``rollups`` de uma métrica, nas duas granularidades, a partir de snapshots.
+
+    ``colunas`` mapeia usuario, influencer, data e as métricas para arrays
+    ordenados por usuario, influencer e data: cada período é um trecho
+    contíguo, agregado com ``reduceat``, e o primeiro/último valor são os
+    das pontas do trecho.
+    """
+    import numpy as np
+
+    valor = np.array(colunas[metrica], dtype=float)
+    # Mesmo critério de amostra de _conta (None vira NaN)
+    conta = valor > 0 if metrica.startswith('live_') else ~np.isnan(valor)
+    valor = valor[conta]
+    if not len(valor):
+        return []
+    usuario, influencer, data = (np.asarray(colunas[nome], dtype=object)[conta]
+                                 for nome in ('usuario', 'influencer', 'data'))
+    linhas = []
+    for granularidade, tamanho in GRANULARIDADES.items():
+        periodo = np.array([d[:tamanho] for d in data], dtype=object)
+        novo = np.ones(len(valor), dtype=bool)
+        novo[1:] = ((usuario[1:] != usuario[:-1]) | (influencer[1:] != influencer[:-1])
+                    | (periodo[1:] != periodo[:-1]))
+        inicio = np.flatnonzero(novo)
+        fim = np.append(inicio[1:], len(valor)) - 1
+        linhas += zip(usuario[inicio], influencer[inicio], itertools.repeat(granularidade), periodo[inicio],
+                      itertools.repeat(metrica), valor[inicio].tolist(), valor[fim].tolist(),
+                      np.minimum.reduceat(valor, inicio).tolist(), np.maximum.reduceat(valor, inicio).tolist(),
+                      np.add.reduceat(valor, inicio).tolist(), (fim - inicio + 1).tolist(),
+                      data[inicio], data[fim])
+    return linhas
+
+
+def reconstruir_rollups(cursor, meses=None):
+    """Recalcula os agregados a partir dos snapshots existentes.
+
+    Sem ``meses`` recalcula tudo; com ``meses``, uma sequência de
+    (usuario, influencer, 'YYYY-MM'), só os agregados diários e mensais
+    desses meses. Os snapshots são lidos e agregados um mês por vez.
+    """
+    cursor.execute("""
+    CREATE TEMP TABLE IF NOT EXISTS meses_rollups (
+        usuario TEXT, influencer TEXT, mes TEXT, PRIMARY KEY (mes, usuario, influencer)
+    ) WITHOUT ROWID
+    """)
+    cursor.execute("DELETE FROM meses_rollups")
+    if meses is None:
+        cursor.execute("DELETE FROM rollups")
+        cursor.execute("""
+        INSERT INTO meses_rollups SELECT DISTINCT usuario, influencer, substr(data, 1, 7) FROM snapshots
+        """)
+    else:
+        cursor.executemany("INSERT OR IGNORE INTO meses_rollups VALUES (?, ?, ?)", meses)
+        # Os períodos do mês ('YYYY-MM' e 'YYYY-MM-DD') e as datas dele ficam entre mes e mes || '-99'
+        cursor.executemany("""
+        DELETE FROM rollups
+        WHERE usuario = ? AND influencer = ? AND granularidade IN ('dia', 'mes')
+          AND periodo >= ?3 AND periodo < ?3 || '-99'
+        """, cursor.execute("SELECT usuario, influencer, mes FROM meses_rollups").fetchall())
+
+    nomes = ('usuario', 'influencer', 'data') + METRICAS
+    for (mes,) in cursor.execute("SELECT DISTINCT mes FROM meses_rollups ORDER BY mes").fetchall():
+        cursor.execute(f"""
+        SELECT {', '.join('s.' + nome for nome in nomes)}
+        FROM meses_rollups AS t JOIN snapshots AS s
+          ON s.usuario = t.usuario AND s.influencer = t.influencer AND s.data >= t.mes AND s.data < t.mes || '-99'
+        WHERE t.mes = ?
+        ORDER BY s.usuario, s.influencer, s.data
+        """, (mes,))
+        colunas = dict(zip(nomes, zip(*cursor.fetchall())))
+        if not colunas:
+            continue
+        linhas = [linha for metrica in METRICAS for linha in _agregados(colunas, metrica)]
+        # Na ordem da chave primária, cada mês percorre o índice de rollups uma vez só
+        linhas.sort(key=lambda linha: linha[:5])
+        cursor.executemany("INSERT INTO rollups VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", linhas)
+
+
+def escolher_granularidade(data_inicio, data_fim):
+    """Diária para intervalos de até ``MAX_DIAS_GRANULARIDADE_DIARIA`` dias, mensal acima disso."""
+    if data_fim - data_inicio <= timedelta(days=MAX_DIAS_GRANULARIDADE_DIARIA):
+        return 'dia'
+    return 'mes'
+
+
+def carregar_rollups(conn, usuario, influencers, data_inicio, data_fim, granularidade, compacto=True):
+    """Agregados do período em formato longo (uma linha por influencer, métrica e período).
+
+    ``data`` é o início de cada período e ``delta`` a variação do último
+    valor em relação ao período anterior (no primeiro período, em relação
+    ao primeiro valor dele mesmo).
+
+    As linhas vêm agrupadas por métrica, na ordem de ``METRICAS``, e depois
+    por influencer e data. Com ``compacto`` (padrão) ``influencer`` e
+    ``tipo`` são categóricos e os números usam o menor tipo exato
+    (``tipos.compactar``), o que permite a ``tipos.fatia`` devolver visões.
+    """
+    import pandas as pd
+
+    from .tipos import compactar
+
+    tamanho = GRANULARIDADES[granularidade]
+    ordem_metricas = " ".join(f"WHEN '{metrica}' THEN {n}" for n, metrica in enumerate(METRICAS))
+    query = """
+    SELECT influencer, metrica AS tipo, periodo AS data, primeiro, ultimo, minimo, maximo, soma, amostras
+    FROM rollups
+    WHERE usuario = ? AND influencer IN ({}) AND granularidade = ? AND periodo >= ? AND periodo <= ?
+    ORDER BY CASE metrica {} END, influencer, periodo
+    """.format(','.join(['?'] * len(influencers)), ordem_metricas)
+
+    params = [usuario] + list(influencers) + [granularidade, data_inicio.strftime("%Y-%m-%d")[:tamanho],
+                                                data_fim.strftime("%Y-%m-%d")[:tamanho]]
+    formato = "%Y-%m-%d" if granularidade == 'dia' else "%Y-%m"
+    with metrics.medir('db_consulta'):
+        df = pd.read_sql_query(query, conn, params=params, parse_dates={'data': {'format': formato}})
+    df['delta'] = (df.groupby(['influencer', 'tipo'], sort=False)['ultimo'].diff()
+                   .fillna(df['ultimo'] - df['primeiro']))
+    if compacto:
+        compactar(df, ['influencer', 'tipo'], {'tipo': list(METRICAS)})
+    return df
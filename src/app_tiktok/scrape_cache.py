@@ -0,0 +1,203 @@
+"""Cache dos resultados de scraping por perfil, compartilhado via SQLite.
+
+Cada perfil buscado fica em ``cache_coletas`` por ``ttl`` segundos, então
+várias sessões do Streamlit e o coletor reaproveitam a mesma busca em vez
+de abrir o navegador de novo. Buscas simultâneas do mesmo perfil também
+são unificadas: dentro do processo, quem chega depois espera a busca em
+andamento; entre processos, uma reserva com prazo (``em_andamento_ate``)
+indica que alguém já está buscando, e os demais aguardam o resultado ou o
+fim do prazo. Falhas não são guardadas. O painel usa ``obter`` (um perfil)
+e o coletor ``obter_varios`` (um lote), pelo mesmo caminho de reserva.
+"""
+import json
+import threading
+import time
+from concurrent.futures import Future
+
+from . import db
+
+DEFAULT_TTL = 600
+# Prazo da reserva entre processos; se o dono morrer, outro assume depois disso
+DEFAULT_RESERVA_SEGUNDOS = 180
+INTERVALO_ESPERA = 0.5
+
+
+def _normalizar(username):
+    return username.strip().lstrip('@')
+
+
+class CacheColetas:
+    """Resultados (dados, live) por username com TTL e unificação de buscas.
+
+    Os horários são timestamps Unix (``clock``), o que simplifica o TTL.
+    ``conectar`` devolve a conexão a usar na thread atual.
+    """
+
+    def __init__(self, ttl=DEFAULT_TTL, reserva_segundos=DEFAULT_RESERVA_SEGUNDOS,
+                 conectar=db.get_connection, clock=time.time):
+        self.ttl = ttl
+        self.reserva_segundos = reserva_segundos
+        self._conectar = conectar
+        self._clock = clock
+        self._em_andamento = {}
+        self._lock = threading.Lock()
+
+    def ler(self, username, incluir_live=False):
+        """(dados, live) ainda válidos para o perfil, ou None."""
+        return self.ler_varios([username], incluir_live).get(_normalizar(username))
+
+    def ler_varios(self, usernames, incluir_live=False):
+        """Dicionário username -> (dados, live) só com os perfis em cache válidos.
+
+        ``live`` é None quando a live não foi verificada naquela busca; com
+        ``incluir_live`` essas entradas não contam como válidas.
+        """
+        usernames = [_normalizar(u) for u in usernames]
+        if not usernames:
+            return {}
+        linhas = self._conectar().execute("""
+        SELECT username, dados, live FROM cache_coletas
+        WHERE username IN ({}) AND dados IS NOT NULL AND coletado_em >= ?
+        """.format(','.join(['?'] * len(usernames))), usernames + [self._clock() - self.ttl]).fetchall()
+        return {username: (json.loads(dados), json.loads(live) if live else None)
+                for username, dados, live in linhas if live or not incluir_live}
+
+    def gravar(self, username, dados, live=None):
+        """Guarda o resultado de uma busca e libera a reserva do perfil."""
+        conn = self._conectar()
+        with conn:
+            conn.execute("""
+            INSERT INTO cache_coletas (username, dados, live, coletado_em, em_andamento_ate)
+            VALUES (?, ?, ?, ?, NULL)
+            ON CONFLICT (username) DO UPDATE SET dados = excluded.dados, live = excluded.live,
+                coletado_em = excluded.coletado_em, em_andamento_ate = NULL
+            """, (_normalizar(username), json.dumps(dados), json.dumps(live) if live is not None else None,
+                  self._clock()))
+
+    def _reservar(self, username):
+        conn = self._conectar()
+        agora = self._clock()
+        with conn:
+            cursor = conn.execute("""
+            INSERT INTO cache_coletas (username, em_andamento_ate) VALUES (?, ?)
+            ON CONFLICT (username) DO UPDATE SET em_andamento_ate = excluded.em_andamento_ate
+            WHERE em_andamento_ate IS NULL OR em_andamento_ate < ?
+            """, (username, agora + self.reserva_segundos, agora))
+        return cursor.rowcount == 1
+
+    def _liberar(self, username):
+        conn = self._conectar()
+        with conn:
+            conn.execute("UPDATE cache_coletas SET em_andamento_ate = NULL WHERE username = ?", (username,))
+
+    def _buscar_reservados(self, pendentes, coletar, incluir_live, futuros, resultados):
+        """Busca os perfis de ``pendentes`` que conseguir reservar; devolve os que outro processo está buscando.
+
+        Os buscados (ou lidos no cache enquanto outro processo os buscava)
+        vão para ``resultados`` e resolvem seus ``futuros``.
+        """
+        minhas = [u for u in pendentes if self._reservar(u)]
+        if minhas:
+            try:
+                obtidos = coletar(minhas)
+            except BaseException:
+                for username in minhas:
+                    self._liberar(username)
+                raise
+            for username in minhas:
+                if username in obtidos:
+                    dados, live = obtidos[username]
+                    self.gravar(username, dados, live)
+                    resultados[username] = (dados, live)
+                    futuros[username].set_result((dados, live))
+                else:
+                    self._liberar(username)
+                    futuros[username].set_exception(LookupError(f"A busca de {username} falhou."))
+
+        outros = [u for u in pendentes if u not in minhas]
+        if outros:
+            # Outro processo já está buscando: espera o resultado dele ou o fim da reserva
+            time.sleep(INTERVALO_ESPERA)
+            for username, (dados, live) in self.ler_varios(outros).items():
+                if live is not None or username not in incluir_live:
+                    resultados[username] = (dados, live)
+                    futuros[username].set_result((dados, live))
+        return [u for u in outros if u not in resultados]
+
+    def obter_varios(self, usernames, coletar, incluir_live=()):
+        """Versão em lote de ``obter``: dicionário username -> (dados, live).
+
+        ``coletar(pendentes)`` recebe a lista de perfis que cabe a esta
+        chamada buscar e devolve username -> (dados, live) dos que deram
+        certo; os que faltarem ficam fora do resultado. Perfis que outra
+        thread ou processo está buscando são esperados, não buscados de novo.
+        ``incluir_live`` são os perfis que precisam da live verificada.
+        """
+        usernames = list(dict.fromkeys(_normalizar(u) for u in usernames))
+        incluir_live = {_normalizar(u) for u in incluir_live}
+        resultados = {}
+        faltam = usernames
+        while faltam:
+            for username, (dados, live) in self.ler_varios(faltam).items():
+                if live is not None or username not in incluir_live:
+                    resultados[username] = (dados, live)
+            faltam = [u for u in faltam if u not in resultados]
+            if not faltam:
+                break
+
+            futuros, esperas = {}, {}
+            with self._lock:
+                for username in faltam:
+                    futuro = self._em_andamento.get(username)
+                    if futuro is None:
+                        futuros[username] = self._em_andamento[username] = Future()
+                    else:
+                        esperas[username] = futuro
+
+            try:
+                pendentes = list(futuros)
+                while pendentes:
+                    pendentes = self._buscar_reservados(pendentes, coletar, incluir_live, futuros, resultados)
+            except BaseException as e:
+                for futuro in futuros.values():
+                    if not futuro.done():
+                        futuro.set_exception(e)
+                raise
+            finally:
+                with self._lock:
+                    for username in futuros:
+                        self._em_andamento.pop(username, None)
+
+            faltam = []
+            for username, futuro in esperas.items():
+                try:
+                    dados, live = futuro.result()
+                except LookupError:
+                    continue  # A busca de outra chamada falhou para este perfil
+                if live is None and username in incluir_live:
+                    faltam.append(username)  # A busca em andamento não verificou a live
+                else:
+                    resultados[username] = (dados, live)
+        return resultados
+
+    def obter(self, username, coletar, incluir_live=False):
+        """(dados, live) do perfil, do cache ou de ``coletar()``.
+
+        ``coletar`` é chamada sem argumentos, deve devolver (dados, live) e
+        só roda se não houver resultado válido nem outra busca em andamento.
+        Se ela falhar, a exceção chega a todos que esperavam essa busca.
+        """
+        username = _normalizar(username)
+        resultados = self.obter_varios([username], lambda pendentes: {username: coletar()},
+                                       [username] if incluir_live else ())
+        if username not in resultados:
+            raise LookupError(f"A busca de {username} falhou.")
+        return resultados[username]
+
+
+_cache = CacheColetas()
+
+
+def obter(username, coletar, incluir_live=False):
+    """``CacheColetas.obter`` no cache padrão do processo (conexões de ``db.get_connection``)."""
+    return _cache.obter(username, coletar, incluir_live)
@@ -0,0 +1,370 @@
+"""Scraping de perfis do TikTok com um único Chromium compartilhado.
+
+Em vez de abrir um navegador novo para cada perfil, o ``BrowserPool`` mantém
+um Chromium aberto e um conjunto limitado de páginas (cada uma em seu próprio
+contexto) que são reaproveitadas entre os perfis de um lote. As buscas de
+perfil e de live rodam em paralelo sob um semáforo, e cada navegação passa
+antes por um limitador de taxa por host. Perfis cujos contadores podem ser
+lidos direto do HTML (``http_fetch``) nem chegam a abrir uma página.
+
+No modo enxuto (padrão) as páginas abortam imagens, vídeos, fontes e
+scripts de analytics, que nunca são lidos, e cada página mede bytes e
+requisições para comparar os dois modos.
+"""
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+
+from . import metrics
+from .http_fetch import ProfileParseError, fetch_profile_http
+from .parsing import convert_to_int
+from .ratelimit import limitador_padrao
+from .resilience import (PERMANENTE, BloqueioError, PerfilInexistenteError, classificar_erro,
+                         executar_com_retentativas)
+
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/90.0.4430.212 Safari/537.36"
+)
+PROFILE_URL = "https://www.tiktok.com/@{username}"
+LIVE_URL = "https://www.tiktok.com/@{username}/live"
+DEFAULT_CONCURRENCY = 4
+# Por tentativa; falhas transitórias são repetidas (ver ``resilience``)
+DEFAULT_TIMEOUT_MS = 20000
+
+FOLLOWERS_SELECTOR = "strong[data-e2e='followers-count']"
+LIKES_SELECTOR = "strong[data-e2e='likes-count']"
+COUNTERS_POLLING_MS = 250
+CAPTCHA_SELECTOR = "#captcha-verify-image, #captcha_container, .captcha-verify-container"
+NOT_FOUND_TEXTS = ("Couldn't find this account", "Não foi possível encontrar esta conta")
+# Lê os dois contadores numa única avaliação; devolve null enquanto não renderizaram.
+# Captcha e perfil inexistente também encerram a espera, em vez de esgotar o timeout.
+COUNTERS_JS = f"""() => {{
+    if (document.querySelector("{CAPTCHA_SELECTOR}")) return ["bloqueio"];
+    const text = document.body ? document.body.innerText : "";
+    if ({" || ".join(f"text.includes({t!r})" for t in NOT_FOUND_TEXTS)}) return ["inexistente"];
+    const followers = document.querySelector("{FOLLOWERS_SELECTOR}");
+    const likes = document.querySelector("{LIKES_SELECTOR}");
+    if (!followers || !likes || !followers.innerText || !likes.innerText) return null;
+    return ["ok", followers.innerText, likes.innerText];
+}}"""
+LIVE_VIEWERS_SELECTOR = "[data-e2e='live-people-count']"
+LIVE_LIKES_SELECTOR = "[data-e2e='live-like-count']"
+# Tempo máximo esperando o contador da live; se não aparecer, o perfil não está ao vivo
+LIVE_WAIT_MS = 15000
+
+EMPTY_LIVE = {'live_curtidas': 0, 'live_visualizacoes': 0}
+
+BLOCKED_RESOURCE_TYPES = frozenset({"image", "media", "font"})
+BLOCKED_HOSTS = (
+    "google-analytics.com",
+    "googletagmanager.com",
+    "doubleclick.net",
+    "facebook.net",
+    "analytics.tiktok.com",
+    "mon.tiktokv.com",
+    "mon-va.byteoversea.com",
+    "mcs-va.tiktokv.com",
+)
+
+
+@dataclass
+class BatchResult:
+    """Resultado de um lote: dados, lives e erros por usuário."""
+    results: dict = field(default_factory=dict)
+    errors: dict = field(default_factory=dict)
+    lives: dict = field(default_factory=dict)
+    live_errors: dict = field(default_factory=dict)
+    stats: dict = field(default_factory=dict)
+
+
+class PageMeter:
+    """Conta requisições, bytes recebidos e requisições bloqueadas de uma página."""
+
+    def __init__(self, page):
+        self._pending = []
+        self.reset()
+        page.on("requestfinished", self._on_finished)
+
+    def reset(self):
+        self.requests = 0
+        self.bytes = 0
+        self.blocked = 0
+        self._pending.clear()
+
+    def _on_finished(self, request):
+        self.requests += 1
+        self._pending.append(asyncio.ensure_future(self._add_sizes(request)))
+
+    async def _add_sizes(self, request):
+        try:
+            sizes = await request.sizes()
+        except Exception:
+            return
+        self.bytes += sizes["responseBodySize"] + sizes["responseHeadersSize"]
+
+    async def snapshot(self):
+        await asyncio.gather(*self._pending)
+        self._pending.clear()
+        return {'requisicoes': self.requests, 'bytes': self.bytes, 'bloqueadas': self.blocked}
+
+
+def _should_block(request):
+    if request.resource_type in BLOCKED_RESOURCE_TYPES:
+        return True
+    url = request.url
+    return any(host in url for host in BLOCKED_HOSTS)
+
+
+class BrowserPool:
+    """Um Chromium de longa duração com um pool limitado de páginas."""
+
+    def __init__(self, size=DEFAULT_CONCURRENCY, headless=True, user_agent=USER_AGENT, lean=True):
+        if size < 1:
+            raise ValueError("O pool precisa de pelo menos uma página.")
+        self.size = size
+        self.headless = headless
+        self.user_agent = user_agent
+        self.lean = lean
+        self._playwright = None
+        self._browser = None
+        self._pages = None
+        self._meters = {}
+        self._starting = None
+
+    async def start(self):
+        # O Playwright só é carregado quando um navegador é de fato aberto
+        from playwright.async_api import async_playwright
+
+        with metrics.medir('scrape_navegador'):
+            self._playwright = await async_playwright().start()
+            self._browser = await self._playwright.chromium.launch(headless=self.headless)
+            self._pages = asyncio.Queue()
+            for _ in range(self.size):
+                await self._pages.put(await self._new_page())
+        return self
+
+    async def close(self):
+        if self._browser is not None:
+            await self._browser.close()
+            self._browser = None
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+        self._pages = None
+        self._starting = None
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def _new_page(self):
+        context = await self._browser.new_context(user_agent=self.user_agent)
+        page = await context.new_page()
+        meter = self._meters[page] = PageMeter(page)
+
+        if self.lean:
+            async def route(route):
+                if _should_block(route.request):
+                    meter.blocked += 1
+                    await route.abort()
+                else:
+                    await route.continue_()
+
+            await page.route("**/*", route)
+        return page
+
+    def meter(self, page):
+        return self._meters[page]
+
+    async def ensure_started(self):
+        """Abre o navegador se ainda não estiver aberto (uma única vez entre tarefas)."""
+        if self._starting is None:
+            self._starting = asyncio.ensure_future(self.start())
+        await asyncio.shield(self._starting)
+
+    @asynccontextmanager
+    async def page(self):
+        """Empresta uma página do pool, esperando se todas estiverem em uso.
+
+        Um pool ainda não iniciado é aberto aqui, na primeira página pedida.
+        """
+        if self._pages is None:
+            await self.ensure_started()
+        page = await self._pages.get()
+        try:
+            yield page
+        finally:
+            if page.is_closed():
+                # A página (ou seu contexto) caiu; repõe uma nova para não encolher o pool
+                self._meters.pop(page, None)
+                await page.context.close()
+                page = await self._new_page()
+            self._pages.put_nowait(page)
+
+
+def _normalize_username(username):
+    return username.strip().lstrip('@')
+
+
+async def _goto(page, url, timeout_ms, rate_limiter=None):
+    if rate_limiter is not None:
+        await rate_limiter.acquire(url)
+    # Os contadores são esperados explicitamente, então não há motivo para aguardar o "load"
+    with metrics.medir('scrape_goto'):
+        await page.goto(url, timeout=timeout_ms, wait_until="domcontentloaded")
+
+
+async def scrape_profile(page, username, timeout_ms=DEFAULT_TIMEOUT_MS, rate_limiter=None):
+    """Lê seguidores e curtidas de um perfil usando uma página já aberta."""
+    await _goto(page, PROFILE_URL.format(username=username), timeout_ms, rate_limiter)
+
+    with metrics.medir('scrape_seletor'):
+        counters = await page.wait_for_function(COUNTERS_JS, timeout=timeout_ms, polling=COUNTERS_POLLING_MS)
+        estado, *textos = await counters.json_value()
+    if estado == "bloqueio":
+        raise BloqueioError(f"Captcha ao abrir o perfil @{username}.")
+    if estado == "inexistente":
+        raise PerfilInexistenteError(f"O perfil @{username} não existe.")
+    followers_text, likes_text = textos
+
+    with metrics.medir('scrape_parse'):
+        followers_num = convert_to_int(followers_text)
+        likes_num = convert_to_int(likes_text)
+
+    return {
+        'seguidores': followers_num,
+        'curtidas': likes_num,
+        'visualizacoes': likes_num
+    }
+
+
+async def scrape_live(page, username, timeout_ms=DEFAULT_TIMEOUT_MS, rate_limiter=None):
+    """Lê curtidas e espectadores da live atual; zeros se o perfil não estiver ao vivo."""
+    from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+    await _goto(page, LIVE_URL.format(username=username), timeout_ms, rate_limiter)
+
+    viewers_elem = page.locator(LIVE_VIEWERS_SELECTOR)
+    try:
+        with metrics.medir('scrape_seletor'):
+            await viewers_elem.wait_for(state="visible", timeout=min(timeout_ms, LIVE_WAIT_MS))
+    except PlaywrightTimeoutError:
+        return dict(EMPTY_LIVE)
+
+    likes_elem = page.locator(LIVE_LIKES_SELECTOR)
+    likes_text = await likes_elem.inner_text() if await likes_elem.count() else '0'
+
+    return {
+        'live_curtidas': convert_to_int(likes_text),
+        'live_visualizacoes': convert_to_int(await viewers_elem.inner_text())
+    }
+
+
+async def scrape_profiles_async(usernames, concurrency=DEFAULT_CONCURRENCY,
+                                timeout_ms=DEFAULT_TIMEOUT_MS, pool=None,
+                                include_live=False, rate_limiter=None, fast_path=True, lean=True,
+                                politica=None, disjuntor=None):
+    """Busca vários perfis (e, opcionalmente, suas lives) em paralelo.
+
+    ``include_live`` pode ser ``True`` (todas as lives) ou uma coleção com
+    os usuários cujas lives devem ser verificadas.
+
+    No máximo ``concurrency`` navegações ficam ativas ao mesmo tempo, e cada
+    uma respeita ``rate_limiter`` (por padrão o limitador do processo,
+    ``ratelimit.limitador_padrao()``, compartilhado entre lotes e threads).
+    Com ``fast_path`` cada perfil é tentado primeiro por HTTP simples; só os
+    que falharem vão para o navegador. Se ``pool`` não for informado, um
+    ``BrowserPool`` temporário é aberto (apenas se necessário, no modo
+    ``lean``) e fechado ao fim do lote. O tempo e o tráfego de cada perfil
+    buscado pelo navegador ficam em ``BatchResult.stats``.
+
+    Cada busca no navegador segue ``politica`` (``PoliticaRetentativa``):
+    falhas transitórias são repetidas com backoff, permanentes (ex.: perfil
+    inexistente) não. Com ``disjuntor`` (``Disjuntor``) o lote inteiro pausa
+    quando o TikTok começa a bloquear; passe o mesmo objeto entre lotes
+    para manter o estado.
+    """
+    usernames = list(dict.fromkeys(_normalize_username(u) for u in usernames if u.strip()))
+    batch = BatchResult()
+    if not usernames:
+        return batch
+
+    if rate_limiter is None:
+        rate_limiter = limitador_padrao()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    if include_live is True:
+        live_usernames = usernames
+    else:
+        wanted = {_normalize_username(u) for u in include_live or ()}
+        live_usernames = [u for u in usernames if u in wanted]
+
+    if fast_path:
+        async def fetch_http(username):
+            url = PROFILE_URL.format(username=username)
+            async with semaphore:
+                await rate_limiter.acquire(url)
+                try:
+                    batch.results[username] = await asyncio.to_thread(
+                        fetch_profile_http, username, timeout=timeout_ms / 1000)
+                except Exception as e:
+                    # Perfil inexistente não vale o navegador; o resto cai para o Playwright abaixo
+                    if classificar_erro(e) == PERMANENTE and not isinstance(e, ProfileParseError):
+                        batch.errors[username] = e
+
+        await asyncio.gather(*(fetch_http(u) for u in usernames))
+
+    jobs = [(scrape_profile, batch.results, batch.errors, u) for u in usernames
+            if u not in batch.results and u not in batch.errors]
+    jobs += [(scrape_live, batch.lives, batch.live_errors, u) for u in live_usernames]
+    if not jobs:
+        return batch
+
+    async def run(active_pool):
+        async def one(job):
+            scrape, results, errors, username = job
+            start = time.perf_counter()
+            metricas = dict.fromkeys(('requisicoes', 'bytes', 'bloqueadas'), 0)
+
+            async def attempt():
+                # A página é devolvida ao pool antes do backoff, liberando a vaga para outro perfil
+                async with semaphore, active_pool.page() as page:
+                    meter = active_pool.meter(page)
+                    meter.reset()
+                    try:
+                        return await scrape(page, username, timeout_ms, rate_limiter)
+                    finally:
+                        for chave, valor in (await meter.snapshot()).items():
+                            metricas[chave] = metricas.get(chave, 0) + valor
+
+            result, error, attempts = await executar_com_retentativas(attempt, politica, disjuntor)
+            if error is None:
+                results[username] = result
+            else:
+                errors[username] = error
+            if scrape is scrape_profile:
+                batch.stats[username] = {'segundos': time.perf_counter() - start, 'tentativas': attempts,
+                                         **metricas}
+
+        await asyncio.gather(*(one(job) for job in jobs))
+
+    if pool is not None:
+        await run(pool)
+    else:
+        async with BrowserPool(size=min(concurrency, len(jobs)), lean=lean) as own_pool:
+            await run(own_pool)
+    return batch
+
+
+def scrape_profiles(usernames, concurrency=DEFAULT_CONCURRENCY, timeout_ms=DEFAULT_TIMEOUT_MS,
+                    include_live=False, rate_limiter=None, fast_path=True, lean=True,
+                    politica=None, disjuntor=None):
+    """Versão síncrona de ``scrape_profiles_async`` para scripts e para o app."""
+    return asyncio.run(scrape_profiles_async(usernames, concurrency, timeout_ms,
+                                             include_live=include_live, rate_limiter=rate_limiter,
+                                             fast_path=fast_path, lean=lean,
+                                             politica=politica, disjuntor=disjuntor))
@@ -0,0 +1,45 @@
+"""Representação compacta dos DataFrames do painel.
+
+Texto repetido (influencer, métrica) vira ``category`` e contadores vão
+para o menor inteiro que os representa sem perda; valores fracionários
+continuam ``float64``, porque ``float32`` já erra contagens acima de 16,7
+milhões. ``fatia`` seleciona métricas sem copiar quando as linhas estão
+agrupadas por categoria, como as de ``rollups.carregar_rollups``.
+"""
+import numpy as np
+import pandas as pd
+
+
+def compactar(df, categorias=(), ordens=None):
+    """Converte ``categorias`` em ``category`` e reduz as colunas numéricas; altera e devolve ``df``.
+
+    ``ordens`` pode fixar a ordem das categorias de uma coluna
+    ({coluna: [valores]}); as demais ficam em ordem alfabética.
+    """
+    ordens = ordens or {}
+    for coluna in categorias:
+        df[coluna] = df[coluna].astype(pd.CategoricalDtype(ordens.get(coluna)))
+    for coluna in df.select_dtypes('number').columns:
+        valores = df[coluna].to_numpy()
+        if valores.dtype.kind == 'f' and not (np.isfinite(valores).all() and (valores == np.trunc(valores)).all()):
+            continue
+        df[coluna] = pd.to_numeric(df[coluna], downcast='integer')
+    return df
+
+
+def fatia(df, coluna, valores):
+    """Linhas em que ``coluna`` está em ``valores``, sem cópia quando possível.
+
+    Se ``coluna`` é categórica, as linhas estão ordenadas pelos códigos e
+    ``valores`` são categorias consecutivas, as linhas escolhidas são
+    contíguas e ``iloc`` devolve uma visão; senão usa o filtro booleano.
+    """
+    serie = df[coluna]
+    if isinstance(serie.dtype, pd.CategoricalDtype) and len(df):
+        codigos = serie.cat.codes.to_numpy()
+        alvo = np.unique(serie.cat.categories.get_indexer(list(valores)))
+        if len(alvo) and (alvo >= 0).all() and (np.diff(alvo) == 1).all() and (np.diff(codigos) >= 0).all():
+            inicio = np.searchsorted(codigos, alvo[0], side='left')
+            fim = np.searchsorted(codigos, alvo[-1], side='right')
+            return df.iloc[inicio:fim]
+    return df[serie.isin(valores)]
@@ -0,0 +1,130 @@
+"""Pool de processos coletores, cada um com seu próprio navegador.
+
+Um único processo fica limitado por um Chromium e um loop de eventos. Aqui
+``executar_pool`` sobe N processos (``spawn``, seguro com o Playwright) que
+dividem a fila ``fila_coleta`` pelas reservas do ``collector``. Cada
+processo mantém o navegador aberto entre os ciclos (``RaspadorPersistente``)
+e o recria de tempos em tempos ou quando ele cai. Processos que morrem são
+substituídos; os itens que eles tinham reservado voltam à fila quando a
+reserva vence.
+"""
+import asyncio
+import logging
+import multiprocessing
+import signal
+
+from . import collector, db, metrics
+from .scrape_cache import CacheColetas
+from .scraper import DEFAULT_CONCURRENCY, BrowserPool, scrape_profiles_async
+
+# Lotes até recriar o navegador, para conter vazamentos de memória do Chromium
+DEFAULT_LOTES_POR_NAVEGADOR = 50
+INTERVALO_SUPERVISAO = 5
+
+logger = logging.getLogger(__name__)
+
+
+class RaspadorPersistente:
+    """Substituto de ``scrape_profiles`` que reaproveita o navegador entre lotes.
+
+    O ``BrowserPool`` só é aberto quando algum lote precisa dele e vive num
+    loop de eventos próprio deste objeto.
+    """
+
+    def __init__(self, lotes_por_navegador=DEFAULT_LOTES_POR_NAVEGADOR):
+        self.lotes_por_navegador = lotes_por_navegador
+        self._loop = asyncio.new_event_loop()
+        self._pool = None
+        self._lotes = 0
+
+    async def _obter_pool(self, concurrency):
+        if self._pool is not None and self._lotes >= self.lotes_por_navegador:
+            await self._fechar_pool()
+        if self._pool is None:
+            # Só abre o Chromium quando algum perfil não sai pelo HTTP simples
+            self._pool = BrowserPool(size=concurrency)
+            self._lotes = 0
+        self._lotes += 1
+        return self._pool
+
+    async def _fechar_pool(self):
+        pool, self._pool = self._pool, None
+        if pool is not None:
+            await pool.close()
+
+    async def _raspar(self, usernames, concurrency, include_live, disjuntor):
+        pool = await self._obter_pool(concurrency)
+        try:
+            return await scrape_profiles_async(usernames, concurrency, pool=pool,
+                                               include_live=include_live, disjuntor=disjuntor)
+        except Exception:
+            # Navegador possivelmente quebrado: o próximo lote abre outro
+            await self._fechar_pool()
+            raise
+
+    def __call__(self, usernames, concurrency=DEFAULT_CONCURRENCY, include_live=False, disjuntor=None):
+        return self._loop.run_until_complete(self._raspar(usernames, concurrency, include_live, disjuntor))
+
+    def fechar(self):
+        self._loop.run_until_complete(self._fechar_pool())
+        self._loop.close()
+
+
+def _trabalhar(caminho, nome, parar, concurrency, limite, espera_segundos, uma_vez, metricas_porta=None):
+    """Corpo de cada processo coletor."""
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(processName)s %(levelname)s %(message)s")
+    # Ctrl+C chega a todos os processos; quem decide parar é o supervisor
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if metricas_porta:
+        metrics.servir(metricas_porta)
+    conn = db.connect(caminho)
+    raspador = RaspadorPersistente()
+    try:
+        collector.executar(conn, concurrency, limite, espera_segundos, uma_vez,
+                           cache_coletas=CacheColetas(conectar=lambda: conn),
+                           trabalhador=f"{collector.nome_trabalhador()}/{nome}",
+                           raspar=raspador, parar=parar)
+    finally:
+        raspador.fechar()
+        conn.close()
+
+
+def executar_pool(caminho=db.DB_PATH, processos=2, concurrency=DEFAULT_CONCURRENCY,
+                  limite=collector.DEFAULT_LOTE, espera_segundos=collector.DEFAULT_ESPERA_SEGUNDOS,
+                  uma_vez=False, metricas_porta=None):
+    """Roda ``processos`` coletores sobre a mesma fila até SIGINT/SIGTERM.
+
+    Com ``uma_vez`` cada processo faz um ciclo e a função retorna quando
+    todos terminarem. Com ``metricas_porta`` o coletor N expõe suas
+    métricas na porta ``metricas_porta + N``.
+    """
+    contexto = multiprocessing.get_context("spawn")
+    parar = contexto.Event()
+    signal.signal(signal.SIGTERM, lambda *_: parar.set())
+
+    def iniciar(indice):
+        processo = contexto.Process(target=_trabalhar, name=f"coletor-{indice}",
+                                    args=(caminho, f"coletor-{indice}", parar, concurrency, limite,
+                                          espera_segundos, uma_vez,
+                                          metricas_porta + indice if metricas_porta else None))
+        processo.start()
+        return processo
+
+    ativos = {i: iniciar(i) for i in range(processos)}
+    try:
+        while ativos and not parar.is_set():
+            for indice, processo in list(ativos.items()):
+                processo.join(INTERVALO_SUPERVISAO / len(ativos))
+                if processo.is_alive():
+                    continue
+                if uma_vez:
+                    del ativos[indice]
+                elif not parar.is_set():
+                    logger.warning("%s saiu com código %s; reiniciando", processo.name, processo.exitcode)
+                    ativos[indice] = iniciar(indice)
+    except KeyboardInterrupt:
+        logger.info("Encerrando coletores...")
+    finally:
+        parar.set()
+        for processo in ativos.values():
+            processo.join()
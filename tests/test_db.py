@@ -0,0 +1,163 @@
+import threading
+from datetime import date, datetime
+
+import pytest
+
+from app_tiktok import analise, arquivamento, db, rollups
+
+USUARIO = 'admin'
+
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = db.connect(str(tmp_path / "influencers.db"))
+    db.criar_tabelas(conn.cursor())
+    conn.commit()
+    yield conn
+    conn.close()
+
+
+def _coletar(conn, influencer, data, seguidores, curtidas=10):
+    db.registrar_coleta(conn, USUARIO, influencer, {'seguidores': seguidores, 'curtidas': curtidas,
+                                                    'visualizacoes': 10}, data=data)
+
+
+def test_degraus_repete_ultimo_valor_nos_dias_sem_coleta(conn):
+    _coletar(conn, '@a', '2024-03-05 09:00:00', 250)
+    _coletar(conn, '@a', '2024-03-10 09:00:00', 300)
+    _coletar(conn, '@a', '2024-03-10 18:00:00', 310)
+    _coletar(conn, '@a', '2024-03-12 09:00:00', 320)
+    _coletar(conn, '@b', '2024-03-11 09:00:00', 5)
+
+    df = db.carregar_snapshots(conn, USUARIO, ['@a', '@b'], date(2024, 3, 8), date(2024, 3, 13), degraus=True)
+
+    a = df[df['influencer'] == '@a']
+    assert a['data'].dt.day.tolist() == [8, 9, 10, 11, 12, 13]
+    assert a['seguidores'].tolist() == [250, 250, 310, 310, 320, 320]
+    # Antes da primeira coleta não há valor a repetir
+    b = df[df['influencer'] == '@b']
+    assert b['data'].dt.day.tolist() == [11, 12, 13]
+    assert b['seguidores'].tolist() == [5, 5, 5]
+
+    longo = db.snapshots_para_longo(df)
+    assert len(longo[(longo['influencer'] == '@a') & (longo['tipo'] == 'curtidas')]) == 6
+
+
+def test_degraus_parte_do_arquivo(conn):
+    _coletar(conn, '@a', '2024-01-10 12:00:00', 100)
+    _coletar(conn, '@a', '2024-03-10 12:00:00', 300)
+    arquivamento.arquivar(conn, dias=30, agora=datetime(2024, 3, 2))
+
+    df = db.carregar_snapshots(conn, USUARIO, ['@a'], date(2024, 3, 8), date(2024, 3, 11), degraus=True)
+
+    assert df['seguidores'].tolist() == [100, 100, 300, 300]
+
+
+def test_degraus_por_metrica(conn):
+    import pandas as pd
+
+    serie = pd.DataFrame({'tipo': ['seguidores', 'curtidas', 'seguidores'], 'influencer': ['@a'] * 3,
+                          'data': pd.to_datetime(['2024-03-01 10:00', '2024-03-02 10:00', '2024-03-03 10:00']),
+                          'valor': [1.0, 7.0, 2.0]})
+
+    df = db.preencher_dias(serie, ['tipo', 'influencer'], date(2024, 3, 3))
+
+    assert df.groupby('tipo')['valor'].apply(list).to_dict() == {'curtidas': [7.0, 7.0],
+                                                                 'seguidores': [1.0, 1.0, 2.0]}
+
+
+def test_grafico_da_analise_sem_buracos(conn):
+    _coletar(conn, '@a', '2024-03-01 09:00:00', 100)
+    _coletar(conn, '@a', '2024-03-04 09:00:00', 130)
+
+    resultado = analise.gerar_analise(conn, USUARIO, ['@a'], date(2024, 3, 1), date(2024, 3, 5),
+                                      resolucao_completa=True)
+
+    seguidores = resultado['metricas'][resultado['metricas']['tipo'] == 'seguidores']
+    assert seguidores['valor'].tolist() == [100, 100, 100, 130, 130]
+
+
+def test_degraus_nao_combina_com_lotes(conn):
+    with pytest.raises(ValueError):
+        db.carregar_snapshots(conn, USUARIO, ['@a'], date(2024, 3, 1), date(2024, 3, 2), tamanho_lote=10,
+                              degraus=True)
+
+
+def test_migracao_junta_metricas_gravadas_em_segundos_diferentes(conn):
+    conn.executemany("INSERT INTO historico (usuario, influencer, tipo, valor, data, metodo) "
+                     "VALUES (?, ?, ?, ?, ?, ?)",
+                     [(USUARIO, '@a', 'seguidores', 100, '2024-03-01 10:00:01', 'Scraping'),
+                      (USUARIO, '@a', 'curtidas', 20, '2024-03-01 10:00:02', 'Scraping'),
+                      (USUARIO, '@a', 'visualizacoes', 30, '2024-03-01 10:00:02.512345', 'Scraping'),
+                      (USUARIO, '@a', 'seguidores', 110, '2024-03-01 10:05:00', 'Scraping')])
+
+    assert db.migrar_historico_para_snapshots(conn.cursor()) == 2
+    assert conn.execute("SELECT data, seguidores, curtidas, visualizacoes FROM snapshots ORDER BY data").fetchall() \
+        == [('2024-03-01 10:00:00', 100, 20, 30), ('2024-03-01 10:05:00', 110, None, None)]
+
+
+def _rollups(conn):
+    return conn.execute("SELECT * FROM rollups ORDER BY usuario, influencer, granularidade, periodo, metrica") \
+        .fetchall()
+
+
+def test_update_refaz_os_agregados_do_periodo(conn):
+    _coletar(conn, '@a', '2024-03-01 09:00:00', 100)
+    _coletar(conn, '@a', '2024-03-01 18:00:00', 500)
+    _coletar(conn, '@a', '2024-03-02 09:00:00', 200)
+
+    # Reduz o máximo, remove uma amostra e move uma linha de dia
+    conn.execute("UPDATE snapshots SET seguidores = 150 WHERE data = '2024-03-01 18:00:00'")
+    conn.execute("UPDATE snapshots SET curtidas = NULL WHERE data = '2024-03-01 09:00:00'")
+    conn.execute("UPDATE snapshots SET data = '2024-03-03 09:00:00' WHERE data = '2024-03-02 09:00:00'")
+    gatilhos = _rollups(conn)
+    rollups.reconstruir_rollups(conn.cursor())
+
+    assert gatilhos == _rollups(conn)
+    mes = conn.execute("SELECT minimo, maximo, soma, amostras FROM rollups WHERE granularidade = 'mes' "
+                       "AND metrica = 'seguidores'").fetchone()
+    assert mes == (100, 200, 450, 3)
+
+
+def test_coleta_regravada_no_mesmo_instante_conta_uma_vez(conn):
+    _coletar(conn, '@a', '2024-03-01 09:00:00', 100)
+    db.registrar_coleta(conn, USUARIO, '@a', {'seguidores': 120, 'curtidas': 10, 'visualizacoes': 10},
+                        data='2024-03-01 09:00:00', forcar=True)
+
+    assert conn.execute("SELECT COUNT(*), MAX(seguidores) FROM snapshots").fetchone() == (1, 120)
+    assert conn.execute("SELECT primeiro, ultimo, soma, amostras FROM rollups WHERE granularidade = 'dia' "
+                        "AND metrica = 'seguidores'").fetchone() == (120, 120, 120, 1)
+
+
+def _conexao_em_thread(caminho):
+    conexoes = []
+    thread = threading.Thread(target=lambda: conexoes.append(db.get_connection(caminho)))
+    thread.start()
+    thread.join()
+    return conexoes[0]
+
+
+def test_conexao_de_thread_encerrada_e_reaproveitada(tmp_path):
+    caminho = str(tmp_path / "pool.db")
+    primeira = _conexao_em_thread(caminho)
+
+    assert _conexao_em_thread(caminho) is primeira
+
+
+def test_threads_simultaneas_tem_conexoes_proprias(tmp_path):
+    caminho = str(tmp_path / "pool.db")
+    pronta, liberar = threading.Event(), threading.Event()
+    conexoes = []
+
+    def segurar():
+        conexoes.append(db.get_connection(caminho))
+        pronta.set()
+        liberar.wait(5)
+    thread = threading.Thread(target=segurar)
+    thread.start()
+    pronta.wait(5)
+    try:
+        assert db.get_connection(caminho) is not conexoes[0]
+    finally:
+        liberar.set()
+        thread.join()
@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+
+from app_tiktok.downsample import lttb, reduzir_series
+
+
+def test_lttb_mantem_extremos_e_picos():
+    y = np.random.default_rng(0).normal(size=10_000).cumsum()
+    y[4321], y[7000] = 1e6, -1e6
+
+    escolhidos = lttb(np.arange(len(y)), y, 600)
+
+    assert len(escolhidos) == 600
+    assert (np.diff(escolhidos) > 0).all()
+    assert escolhidos[0] == 0 and escolhidos[-1] == len(y) - 1
+    assert {4321, 7000} <= set(escolhidos)
+
+
+def test_lttb_balde_so_com_nan_fica_com_o_inicio():
+    y = np.arange(100, dtype=float)
+    y[10:90] = np.nan
+
+    escolhidos = lttb(np.arange(100), y, 10)
+
+    assert len(escolhidos) == 10 and (np.diff(escolhidos) > 0).all()
+
+
+def test_reduzir_series_so_reduz_series_longas():
+    df = pd.DataFrame({'influencer': ['@a'] * 1000 + ['@b'] * 10,
+                       'data': list(pd.date_range('2024-01-01', periods=1000, freq='min'))
+                       + list(pd.date_range('2024-01-01', periods=10, freq='min')),
+                       'espectadores': np.arange(1010)})
+
+    reduzido = reduzir_series(df, 'data', 'espectadores', ['influencer'], max_pontos=100)
+
+    assert reduzido.groupby('influencer').size().to_dict() == {'@a': 100, '@b': 10}
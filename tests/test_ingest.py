@@ -0,0 +1,91 @@
+from datetime import date, datetime
+
+import pandas as pd
+import pytest
+
+from app_tiktok import arquivamento, db, ingest, metrics
+
+USUARIO = 'admin'
+
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = db.connect(str(tmp_path / "influencers.db"))
+    db.criar_tabelas(conn.cursor())
+    conn.commit()
+    for data, seguidores in (('2024-01-10 12:00:00', 100), ('2024-03-10 12:00:00', 300)):
+        db.registrar_coleta(conn, USUARIO, '@a', {'seguidores': seguidores, 'curtidas': 10, 'visualizacoes': 10},
+                            data=data)
+    # Corte em 2024-02-01: janeiro vai para o Parquet
+    arquivamento.arquivar(conn, dias=30, agora=datetime(2024, 3, 2))
+    yield conn
+    conn.close()
+
+
+def _planilha(*linhas):
+    return pd.DataFrame([{'influencer': '@a', 'data': data, 'seguidores': seguidores, 'curtidas': 10,
+                          'visualizacoes': 10} for data, seguidores in linhas])
+
+
+def _snapshots(conn):
+    return db.carregar_snapshots(conn, USUARIO, ['@a'], date(2024, 1, 1), date(2024, 3, 31))
+
+
+def _rollup(conn, periodo):
+    return conn.execute("""
+    SELECT primeiro, ultimo, amostras FROM rollups
+    WHERE usuario = ? AND influencer = '@a' AND granularidade = 'mes' AND periodo = ? AND metrica = 'seguidores'
+    """, (USUARIO, periodo)).fetchone()
+
+
+def test_importar_mes_arquivado_e_recusado(conn):
+    with pytest.raises(ValueError, match="arquivados"):
+        ingest.importar_metricas(conn, _planilha(('2024-01-10 12:00:00', 150), ('2024-03-20 12:00:00', 350)),
+                                 USUARIO)
+
+    assert len(_snapshots(conn)) == 2
+    assert _rollup(conn, '2024-01') == (100, 100, 1)
+    assert _rollup(conn, '2024-03') == (300, 300, 1)
+
+
+def test_importar_ignorando_arquivadas(conn):
+    gravadas = ingest.importar_metricas(
+        conn, _planilha(('2024-01-10 12:00:00', 150), ('2024-03-20 12:00:00', 350)), USUARIO,
+        ignorar_arquivadas=True)
+
+    assert gravadas == 1
+    df = _snapshots(conn)
+    assert df['seguidores'].tolist() == [100, 300, 350]
+    assert not df.duplicated(['influencer', 'data']).any()
+    assert _rollup(conn, '2024-01') == (100, 100, 1)
+    assert _rollup(conn, '2024-03') == (300, 350, 2)
+
+
+def test_leitura_conta_uma_vez_coleta_no_banco_e_no_arquivo(conn):
+    # Linha gravada no banco para um mês já arquivado, como a importação fazia antes
+    db.registrar_coleta(conn, USUARIO, '@a', {'seguidores': 150, 'curtidas': 10, 'visualizacoes': 10},
+                        data='2024-01-10 12:00:00', forcar=True)
+
+    df = _snapshots(conn)
+    assert len(df) == 2
+    assert df['seguidores'].tolist() == [150, 300]
+
+
+def test_carga_com_arquivo_e_uma_consulta(conn):
+    metrics.registro.limpar()
+
+    _snapshots(conn)
+
+    assert metrics.registro.resumo()['db_consulta']['contagem'] == 1
+
+
+def test_formato_longo_le_milhar_pt_br(tmp_path):
+    caminho = tmp_path / "longo.csv"
+    caminho.write_text("influencer,tipo,valor,data\n"
+                       "@a,seguidores,12.345,2024-05-01 10:00:00\n"
+                       "@a,curtidas,\"1,2 mi\",2024-05-01 10:00:00\n"
+                       "@a,ganhos,3.5,2024-05-01 10:00:00\n", encoding="utf-8")
+
+    linha = ingest.preparar_metricas(ingest.ler_arquivo(caminho), USUARIO).iloc[0]
+
+    assert (linha['seguidores'], linha['curtidas'], linha['ganhos']) == (12345, 1_200_000, 3.5)
@@ -0,0 +1,34 @@
+import pandas as pd
+import pytest
+
+from app_tiktok.parsing import convert_series_to_int, convert_to_int
+
+CASOS = [('12', 12), ('1.2M', 1_200_000), ('1,2 mi', 1_200_000), ('12.345', 12345), ('12,345', 12345),
+         ('1.234.567', 1_234_567), ('1.234,5', 1234), ('1,234.5', 1234), ('1 234', 1234), ('1,2 mil', 1200),
+         ('3 bi', 3_000_000_000), ('1.2m.', 1_200_000), ('12 .', 12), ('1,23', 1), ('5 mln', 5_000_000)]
+INVALIDOS = ['', 'k', '1..2', '.5', '12x', '12 mi .']
+
+
+@pytest.mark.parametrize('texto, esperado', CASOS)
+def test_convert_to_int(texto, esperado):
+    assert convert_to_int(texto) == esperado
+
+
+@pytest.mark.parametrize('texto', INVALIDOS)
+def test_convert_to_int_invalido(texto):
+    with pytest.raises(ValueError):
+        convert_to_int(texto)
+
+
+def test_vetorizado_concorda_com_escalar():
+    textos = [texto for texto, _ in CASOS] + INVALIDOS + [None]
+    resultado = convert_series_to_int(pd.Series(textos), errors='coerce')
+
+    assert resultado.tolist()[:len(CASOS)] == [esperado for _, esperado in CASOS]
+    assert resultado.iloc[len(CASOS):].isna().all()
+    with pytest.raises(ValueError):
+        convert_series_to_int(pd.Series(['12', 'abc']))
+
+
+def test_vetorizado_so_digitos():
+    assert convert_series_to_int(pd.Series(['1', None, '300'])).tolist() == [1, pd.NA, 300]
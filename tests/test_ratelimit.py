@@ -0,0 +1,42 @@
+import asyncio
+import threading
+import time
+
+from app_tiktok import ratelimit
+from app_tiktok.ratelimit import HostRateLimiter
+
+
+def test_limite_vale_entre_event_loops_de_threads_diferentes():
+    limitador = HostRateLimiter(rate=20, capacity=1)
+
+    def buscar():
+        async def varias():
+            for _ in range(3):
+                await limitador.acquire("https://www.tiktok.com/@a")
+        asyncio.run(varias())
+
+    inicio = time.monotonic()
+    threads = [threading.Thread(target=buscar) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # 6 fichas a 20/s com só 1 de rajada: pelo menos 5 intervalos de 50 ms
+    assert time.monotonic() - inicio >= 0.24
+
+
+def test_hosts_tem_baldes_separados():
+    limitador = HostRateLimiter(rate=1, capacity=1)
+
+    async def um_de_cada():
+        await limitador.acquire("https://www.tiktok.com/@a")
+        await limitador.acquire("https://m.tiktok.com/@a")
+    inicio = time.monotonic()
+    asyncio.run(um_de_cada())
+
+    assert time.monotonic() - inicio < 0.5
+
+
+def test_limitador_padrao_e_unico_no_processo():
+    assert ratelimit.limitador_padrao() is ratelimit.limitador_padrao()
@@ -0,0 +1,86 @@
+import threading
+import time
+
+import pytest
+
+from app_tiktok import collector, db, scrape_cache
+from app_tiktok.scrape_cache import CacheColetas
+from app_tiktok.scraper import BatchResult
+
+
+@pytest.fixture
+def conectar(tmp_path, monkeypatch):
+    monkeypatch.setattr(scrape_cache, 'INTERVALO_ESPERA', 0.01)
+    caminho = str(tmp_path / "influencers.db")
+    conn = db.connect(caminho)
+    db.criar_tabelas(conn.cursor())
+    conn.commit()
+    local = threading.local()
+
+    def conexao_da_thread():
+        if not hasattr(local, 'conn'):
+            local.conn = db.connect(caminho)
+        return local.conn
+    return conexao_da_thread
+
+
+def _raspar(chamadas):
+    def raspar(usernames, concurrency, include_live, disjuntor):
+        chamadas.append(list(usernames))
+        return BatchResult(results={u: {'seguidores': 1, 'curtidas': 2, 'visualizacoes': 3} for u in usernames})
+    return raspar
+
+
+def test_coletor_espera_perfil_reservado_por_outro_processo(conectar):
+    painel, coletor = CacheColetas(conectar=conectar), CacheColetas(conectar=conectar)
+    assert painel._reservar('a')
+
+    def painel_termina():
+        time.sleep(0.1)
+        painel.gravar('a', {'seguidores': 10, 'curtidas': 20, 'visualizacoes': 30})
+    threading.Thread(target=painel_termina).start()
+
+    chamadas = []
+    lote = collector._coletar(['a', 'b'], set(), 1, coletor, None, _raspar(chamadas))
+
+    assert chamadas == [['b']]
+    assert lote.results['a']['seguidores'] == 10
+    assert lote.results['b']['seguidores'] == 1
+
+
+def test_coletor_nao_libera_reserva_alheia(conectar):
+    painel, coletor = CacheColetas(conectar=conectar, reserva_segundos=0.2), CacheColetas(conectar=conectar)
+    assert painel._reservar('a')
+
+    chamadas = []
+    lote = collector._coletar(['a'], set(), 1, coletor, None, _raspar(chamadas))
+
+    # Só depois de a reserva do painel vencer o coletor busca o perfil
+    assert chamadas == [['a']]
+    assert 'a' in lote.results
+
+
+def test_busca_unificada_no_processo(conectar):
+    cache = CacheColetas(conectar=conectar)
+    liberar = threading.Event()
+    buscas = []
+
+    def coletar_devagar():
+        buscas.append('obter')
+        liberar.wait(5)
+        return {'seguidores': 5}, None
+
+    painel = threading.Thread(target=cache.obter, args=('a', coletar_devagar))
+    painel.start()
+    while not buscas:
+        time.sleep(0.01)
+
+    def coletar_lote(pendentes):
+        buscas.append('lote')
+        return {u: ({'seguidores': 1}, None) for u in pendentes}
+    threading.Timer(0.1, liberar.set).start()
+    resultado = cache.obter_varios(['a', 'b'], coletar_lote)
+    painel.join()
+
+    assert buscas == ['obter', 'lote']
+    assert resultado == {'a': ({'seguidores': 5}, None), 'b': ({'seguidores': 1}, None)}